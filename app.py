@@ -1,4 +1,5 @@
-from flask import Flask
+from flask import Flask, g, jsonify, request
+from itsdangerous import BadSignature
 from routes.auth import auth_bp
 from routes.user import user_bp
 from routes.project import project_bp
@@ -17,6 +18,15 @@ from routes.qc_afd import qc_afd_bp
 from routes.qc_audit import qc_audit_bp
 from routes.qc_rework import qc_rework_bp
 from scheduler import start_scheduler
+from utils.db_pool import pool_stats
+from utils.upload_queue import ensure_upload_worker, upload_queue_stats
+from utils.email_outbox import ensure_email_sender, email_outbox_stats
+from utils.api_log_utils import api_log_stats
+from utils.cache import cache_stats
+from utils.session_token import load_session_token, request_token
+from utils.response import api_response
+from utils.sql_instrumentation import finish_request_sql
+from config import SESSION_TOKEN_REQUIRED
 
 
 from flask_cors import CORS
@@ -57,6 +67,53 @@ app.register_blueprint(qc_rework_bp, url_prefix="/qc_rework")
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 
+@app.before_request
+def start_upload_worker():
+    # lazily, so each gunicorn worker starts its own thread after the fork
+    ensure_upload_worker()
+    ensure_email_sender()
+    # same for the scheduler; its jobs take a DB lock so only one process runs them
+    start_scheduler()
+
+
+# reachable without a session token even with SESSION_TOKEN_REQUIRED=1
+PUBLIC_ENDPOINTS = {"home", "health", "health_metrics", "auth.user_handler"}
+PUBLIC_BLUEPRINTS = {"password_reset"}
+
+
+@app.before_request
+def load_identity():
+    # verified from the signature alone, no DB hit; see utils/session_token.py
+    g.identity = None
+    if request.method == "OPTIONS":
+        return None
+
+    # public routes ignore whatever token comes along, so a client still
+    # sending an expired one can log in again / reset its password
+    if request.endpoint in PUBLIC_ENDPOINTS or request.blueprint in PUBLIC_BLUEPRINTS:
+        return None
+
+    token = request_token()
+    if token:
+        try:
+            g.identity = load_session_token(token)
+            return None
+        except (BadSignature, KeyError, TypeError, ValueError):  # SignatureExpired is a BadSignature
+            if SESSION_TOKEN_REQUIRED:
+                return api_response(401, "Invalid or expired session token")
+            # tokens are optional: treat the request as one without a token
+
+    if SESSION_TOKEN_REQUIRED:
+        return api_response(401, "Session token required")
+    return None
+
+
+@app.after_request
+def sql_request_summary(response):
+    # N+1 warnings always; X-SQL-* headers in debug / SQL_DEBUG_HEADERS=1
+    return finish_request_sql(response, debug=app.debug)
+
+
 @app.route("/")
 def home():
     return "Flask Auth API is running!"
@@ -65,6 +122,17 @@ def home():
 def health():
     return "OK", 200
 
+@app.route("/health/metrics")
+def health_metrics():
+    # per-worker numbers: each gunicorn worker owns its own pool
+    return jsonify({
+        "db_pool": pool_stats(),
+        "upload_queue": upload_queue_stats(),
+        "email_outbox": email_outbox_stats(),
+        "api_log": api_log_stats(),
+        "caches": cache_stats(),
+    }), 200
+
 if __name__ == "__main__":
     # Start the scheduler
     start_scheduler()
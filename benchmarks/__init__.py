@@ -0,0 +1 @@
+# Benchmarks: run against a scratch database (DB_* env vars), never production.
@@ -0,0 +1,177 @@
+"""
+/dashboard/filter: previous four-scan plan vs the single grouped scan.
+
+Runs both query plans for the same scope against the configured database
+(seed it first with `python -m benchmarks.seed`) and prints statements,
+tracker-scope scans and wall time per plan:
+
+    python -m benchmarks.dashboard_filter --user-id 12 --repeat 20
+    python -m benchmarks.dashboard_filter --user-id 12 --date-from 2026-01-01 --date-to 2026-03-31
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from config import get_db_connection
+from routes.dashboard import (
+    DASHBOARD_TRACKER_FROM,
+    apply_qc_filters,
+    build_dashboard_tracker_where,
+    build_in_clause_int,
+    fetch_dashboard_users,
+    get_subordinate_user_ids,
+    overall_qc_average,
+    summarize_tracker_scope,
+)
+from utils.role_context import get_user_role
+
+
+class CountingCursor:
+    """Counts execute() calls on a dictionary cursor."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.statements = 0
+
+    def execute(self, sql, params=()):
+        self.statements += 1
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def legacy_plan(cursor, where_sql, params, qc_where, qc_params):
+    """The pre-consolidation queries (users / summary / billable each rescan the scope)."""
+    base_from = DASHBOARD_TRACKER_FROM
+    cursor.execute(f"""
+        SELECT DISTINCT u.user_id, u.user_name, u.user_email, u.user_number, u.user_address,
+               u.user_tenure, r.role_name AS role, d.designation, tm.team_name
+        {base_from}
+        LEFT JOIN user_role r ON r.role_id = u.role_id
+        LEFT JOIN user_designation d ON d.designation_id = u.designation_id
+        LEFT JOIN team tm ON tm.team_id = u.team_id
+        {where_sql}
+        ORDER BY u.user_id DESC
+    """, tuple(params))
+    users = cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT COUNT(DISTINCT twt.user_id) AS user_count, COUNT(DISTINCT twt.project_id) AS project_count,
+               COUNT(DISTINCT twt.task_id) AS task_count, COUNT(*) AS tracker_rows,
+               COALESCE(SUM(twt.production), 0) AS total_production,
+               COALESCE(SUM(twt.billable_hours), 0) AS total_billable_hours
+        {base_from}
+        {where_sql}
+    """, tuple(params))
+    summary = cursor.fetchone() or {}
+
+    cursor.execute(f"""
+        SELECT ROUND(SUM(tq.qc_score) / NULLIF(COUNT(*), 0), 2) AS avg_qc_score, COUNT(*) AS qc_days_count
+        FROM temp_qc tq {qc_where} AND tq.qc_score IS NOT NULL
+    """, tuple(qc_params))
+    cursor.fetchall()
+    cursor.execute(f"""
+        SELECT tq.user_id, ROUND(SUM(tq.qc_score) / NULLIF(COUNT(*), 0), 2) AS avg_qc_score, COUNT(*) AS qc_days_count
+        FROM temp_qc tq {qc_where} AND tq.qc_score IS NOT NULL
+        GROUP BY tq.user_id
+    """, tuple(qc_params))
+    cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT p.project_id, COALESCE(SUM(twt.billable_hours), 0) AS total_billable_hours
+        {base_from}
+        {where_sql}
+        GROUP BY p.project_id
+    """, tuple(params))
+    billable = {r["project_id"]: r["total_billable_hours"] for r in cursor.fetchall()}
+    return users, summary, billable, 3
+
+
+def grouped_plan(cursor, where_sql, params, qc_where, qc_params):
+    """What dashboard_filter runs now."""
+    cursor.execute(f"""
+        SELECT twt.user_id, twt.project_id, twt.task_id, COUNT(*) AS tracker_rows,
+               COALESCE(SUM(twt.production), 0) AS total_production,
+               COALESCE(SUM(twt.billable_hours), 0) AS total_billable_hours
+        {DASHBOARD_TRACKER_FROM}
+        {where_sql}
+        GROUP BY twt.user_id, twt.project_id, twt.task_id
+    """, tuple(params))
+    summary, user_ids, billable = summarize_tracker_scope(cursor.fetchall() or [])
+    users = fetch_dashboard_users(cursor, user_ids)
+
+    cursor.execute(f"""
+        SELECT tq.user_id, SUM(tq.qc_score) AS qc_score_sum,
+               ROUND(SUM(tq.qc_score) / NULLIF(COUNT(*), 0), 2) AS avg_qc_score, COUNT(*) AS qc_days_count
+        FROM temp_qc tq {qc_where} AND tq.qc_score IS NOT NULL
+        GROUP BY tq.user_id
+    """, tuple(qc_params))
+    overall_qc_average(cursor.fetchall() or [])
+    return users, summary, billable, 1
+
+
+def run(plan, conn, args, scope):
+    timings, statements, scans, result = [], 0, 0, None
+    for _ in range(args.repeat):
+        cursor = CountingCursor(conn.cursor(dictionary=True))
+        started = time.perf_counter()
+        result = plan(cursor, *scope)
+        timings.append((time.perf_counter() - started) * 1000)
+        statements, scans = cursor.statements, result[3]
+        cursor.close()
+    return {
+        "p50_ms": statistics.median(timings),
+        "p95_ms": sorted(timings)[max(int(len(timings) * 0.95) - 1, 0)],
+        "statements": statements,
+        "scope_scans": scans,
+        "users": len(result[0]),
+        "tracker_rows": int(result[1].get("tracker_rows") or 0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="compare /dashboard/filter query plans")
+    parser.add_argument("--user-id", type=int, required=True, help="logged_in_user_id to scope as")
+    parser.add_argument("--date-from")
+    parser.add_argument("--date-to")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    data = {"date_from": args.date_from, "date_to": args.date_to}
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        role = get_user_role(cursor, args.user_id)
+        if not role:
+            print(f"user {args.user_id} not found / inactive")
+            return 1
+        visible = get_subordinate_user_ids(cursor, role, args.user_id)
+        cursor.close()
+
+        where_sql, params = build_dashboard_tracker_where(data, visible)
+        qc_where, qc_params = "WHERE 1=1", []
+        if visible is not None:
+            qc_where += f" AND tq.user_id {build_in_clause_int(visible, qc_params)}"
+        qc_where, qc_params = apply_qc_filters(data, qc_where, qc_params)
+        scope = (where_sql, params, qc_where, qc_params)
+
+        legacy = run(legacy_plan, conn, args, scope)
+        grouped = run(grouped_plan, conn, args, scope)
+    finally:
+        conn.close()
+
+    if legacy["tracker_rows"] != grouped["tracker_rows"] or legacy["users"] != grouped["users"]:
+        print("WARNING: plans disagree", legacy, grouped)
+
+    print(f"role={role} scope_users={'all' if visible is None else len(visible)} repeat={args.repeat}")
+    print(f"{'plan':<10}{'p50 ms':>10}{'p95 ms':>10}{'stmts':>8}{'scans':>8}{'users':>8}{'rows':>10}")
+    for name, r in (("legacy", legacy), ("grouped", grouped)):
+        print(f"{name:<10}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['statements']:>8}"
+              f"{r['scope_scans']:>8}{r['users']:>8}{r['tracker_rows']:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Latency / rows / SQL statements of the main read endpoints, through the Flask
+test client (no HTTP server, no network):
+
+    /tracker/view, /tracker/view_daily, /dashboard/filter,
+    /user_monthly_tracker/list, /project_monthly_tracker/list
+
+Generate data first (python -m benchmarks.synthetic), then:
+
+    python -m benchmarks.endpoints --role manager --repeat 20
+    python -m benchmarks.endpoints --user-id 12 --month Jan2026 --only /tracker/view
+
+Each request is sent as a signed session token for the chosen user (the first
+active synthetic user of --role unless --user-id is given). The first request
+per endpoint is a warm-up and is not timed. Statements, DB time and rows
+fetched come from the X-SQL-* headers of utils/sql_instrumentation.py, i.e.
+the request's own queries, not the background api-log / upload writers.
+The scheduler is disabled for the run.
+"""
+import argparse
+import calendar
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault("SCHEDULER_ENABLED", "0")
+os.environ.setdefault("SQL_DEBUG_HEADERS", "1")
+
+import config  # noqa: E402
+from benchmarks.synthetic import BENCH_EMAIL_DOMAIN  # noqa: E402
+from utils.session_token import issue_session_token  # noqa: E402
+
+ENDPOINTS = (
+    "/tracker/view",
+    "/tracker/view_daily",
+    "/dashboard/filter",
+    "/user_monthly_tracker/list",
+    "/project_monthly_tracker/list",
+)
+
+
+def _payload(path: str, user_id: int, month_year: str) -> dict:
+    data = {"logged_in_user_id": user_id, "month_year": month_year}
+    if path == "/dashboard/filter":
+        start = datetime.strptime(month_year, "%b%Y")
+        last_day = calendar.monthrange(start.year, start.month)[1]
+        data.update({
+            "device_id": "bench",
+            "device_type": "bench",
+            "date_from": start.strftime("%Y-%m-%d"),
+            "date_to": start.replace(day=last_day).strftime("%Y-%m-%d"),
+        })
+    return data
+
+
+# ------------------------
+# runner
+# ------------------------
+def _count_rows(body) -> int:
+    """Length of the first list in the response's data (the rows the client renders)."""
+    data = body.get("data") if isinstance(body, dict) else None
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return len(value)
+    return 0
+
+
+def _pick_user(role: str) -> dict | None:
+    conn = config.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT u.user_id, u.role_id, u.team_id, r.role_name
+            FROM tfs_user u
+            JOIN user_role r ON r.role_id = u.role_id
+            WHERE u.user_email LIKE %s AND u.is_active = 1 AND LOWER(TRIM(r.role_name)) = %s
+            ORDER BY u.user_id
+            LIMIT 1
+            """,
+            (f"%@{BENCH_EMAIL_DOMAIN}", role.strip().lower()),
+        )
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _load_user(user_id: int) -> dict | None:
+    conn = config.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT u.user_id, u.role_id, u.team_id, r.role_name
+            FROM tfs_user u
+            LEFT JOIN user_role r ON r.role_id = u.role_id
+            WHERE u.user_id = %s
+            """,
+            (user_id,),
+        )
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run_endpoint(client, path: str, payload: dict, headers: dict, repeat: int) -> dict:
+    client.post(path, json=payload, headers=headers)  # warm-up (caches, pool)
+
+    timings, statements, db_ms, rows, status = [], [], [], 0, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        resp = client.post(path, json=payload, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        statements.append(int(resp.headers.get("X-SQL-Statements") or 0))
+        db_ms.append(float(resp.headers.get("X-SQL-Time-Ms") or 0))
+        status = resp.status_code
+        rows = _count_rows(resp.get_json(silent=True))
+
+    timings.sort()
+    return {
+        "status": status,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[max(int(len(timings) * 0.95) - 1, 0)],
+        "db_p50_ms": statistics.median(db_ms),
+        "rows": rows,
+        "statements": max(statements),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark the read endpoints via the Flask test client")
+    parser.add_argument("--role", default="manager", help="role of the synthetic user to act as (default manager)")
+    parser.add_argument("--user-id", type=int, help="act as this user instead")
+    parser.add_argument("--month", default=datetime.now().strftime("%b%Y"), help="MonYYYY (default current month)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", action="append", choices=ENDPOINTS, help="run only these endpoints")
+    args = parser.parse_args(argv)
+
+    user = _load_user(args.user_id) if args.user_id else _pick_user(args.role)
+    if not user:
+        print("no such user (generate data with `python -m benchmarks.synthetic` first)")
+        return 1
+
+    from app import app
+
+    token = issue_session_token(user, user.get("role_name"))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    print(f"user_id={user['user_id']} role={user.get('role_name')} month={args.month} repeat={args.repeat}")
+    print(f"{'endpoint':<32}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'db ms':>8}{'rows':>8}{'stmts':>7}")
+    with app.test_client() as client:
+        for path in args.only or ENDPOINTS:
+            r = run_endpoint(client, path, _payload(path, user["user_id"], args.month), headers, args.repeat)
+            print(f"{path:<32}{r['status']:>7}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                  f"{r['db_p50_ms']:>8.1f}{r['rows']:>8}{r['statements']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
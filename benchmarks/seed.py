@@ -0,0 +1,110 @@
+"""
+Synthetic task_work_tracker rows for benchmarks.
+
+Rows are attached to the users / projects / tasks already in the database and
+tagged with tracker_note = BENCH_NOTE so they can be removed again:
+
+    python -m benchmarks.seed --rows 50000 --days 90
+    python -m benchmarks.seed --cleanup
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+
+from config import get_db_connection
+from utils.date_utils import SQL_DT_FORMAT
+from utils.tracker_rollup import rebuild_daily_rollup, rebuild_project_month_rollup
+
+BENCH_NOTE = "__bench__"
+
+# params: project, task, user, production, actual/tenure target, billable/actual
+# billable hours, note, shift, date_time x3 (text, dt, yyyymm source), updated_date
+TRACKER_INSERT_SQL = """
+    INSERT INTO task_work_tracker
+    (project_id, task_id, user_id, production, actual_target, tenure_target,
+     billable_hours, actual_billable_hours, tracker_note, shift, is_active,
+     date_time, date_time_dt, yyyymm, updated_date)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,1,%s,%s,EXTRACT(YEAR_MONTH FROM CAST(%s AS DATETIME)),%s)
+"""
+
+
+def _ids(cursor, sql):
+    cursor.execute(sql)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def seed_trackers(cursor, rows: int, days: int, batch_size: int = 1000, rng=None) -> int:
+    rng = rng or random.Random(42)
+    user_ids = _ids(cursor, "SELECT user_id FROM tfs_user WHERE is_active=1 AND is_delete=1")
+    tasks = {}
+    cursor.execute("SELECT task_id, project_id FROM task WHERE is_active=1")
+    for task_id, project_id in cursor.fetchall():
+        tasks.setdefault(project_id, []).append(task_id)
+    if not user_ids or not tasks:
+        raise SystemExit("seed needs at least one active user and one active task")
+
+    project_ids = list(tasks)
+    now = datetime.now().replace(microsecond=0)
+
+    written = 0
+    batch = []
+    for _ in range(rows):
+        project_id = rng.choice(project_ids)
+        target = rng.choice([40, 60, 80, 100])
+        production = rng.randint(0, 120)
+        ts = (now - timedelta(days=rng.randrange(days), minutes=rng.randrange(24 * 60))).strftime(SQL_DT_FORMAT)
+        batch.append((
+            project_id, rng.choice(tasks[project_id]), rng.choice(user_ids), production, target, target,
+            production / target, production / target, BENCH_NOTE, rng.choice(["DAY", "NIGHT"]),
+            ts, ts, ts, ts,
+        ))
+        if len(batch) >= batch_size:
+            cursor.executemany(TRACKER_INSERT_SQL, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(TRACKER_INSERT_SQL, batch)
+        written += len(batch)
+
+    date_from = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+    rebuild_daily_rollup(cursor, date_from, now.strftime("%Y-%m-%d"))
+    rebuild_project_month_rollup(cursor, date_from, now.strftime("%Y-%m-%d"))
+    return written
+
+
+def cleanup(cursor) -> int:
+    cursor.execute("DELETE FROM task_work_tracker WHERE tracker_note=%s", (BENCH_NOTE,))
+    deleted = cursor.rowcount
+    rebuild_daily_rollup(cursor, None, None)
+    rebuild_project_month_rollup(cursor, None, None)
+    return deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="seed synthetic tracker rows")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--cleanup", action="store_true", help="delete previously seeded rows")
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        if args.cleanup:
+            print(f"deleted {cleanup(cursor)} seeded tracker rows")
+        else:
+            print(f"inserted {seed_trackers(cursor, args.rows, args.days)} tracker rows")
+        conn.commit()
+        return 0
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+Self-contained synthetic data set for the endpoint benchmarks.
+
+Unlike benchmarks.seed (which attaches trackers to existing users), this
+creates its own organisation so a fresh local MySQL/MariaDB gives the same
+data on every machine for the same arguments:
+
+    N users across the role hierarchy (managers, assistant managers, QAs, agents;
+        every agent reports to one of each through tfs_user + user_supervisor)
+    M projects with --tasks-per-project tasks each
+    K months (the current one included) of task_work_tracker, temp_qc,
+        user_monthly_tracker and project_monthly_tracker rows
+
+Everything is tagged (users: @bench.invalid e-mails, projects: BENCH- codes,
+trackers: BENCH_NOTE) and removed again with --cleanup:
+
+    python -m benchmarks.synthetic --users 200 --projects 20 --months 3
+    python -m benchmarks.synthetic --cleanup
+
+The user_role rows (agent, qa, assistant manager, manager / project manager)
+must already exist; team / designation / project_category ids are borrowed
+from the first existing rows when there are any.
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+from benchmarks.seed import BENCH_NOTE, TRACKER_INSERT_SQL
+from config import get_db_connection
+from utils.date_utils import SQL_DT_FORMAT
+from utils.hierarchy import rebuild_user_supervisors
+from utils.tracker_rollup import rebuild_daily_rollup, rebuild_project_month_rollup
+
+BENCH_EMAIL_DOMAIN = "bench.invalid"
+BENCH_PROJECT_PREFIX = "BENCH-"
+
+# role -> (accepted user_role names, share of --users); agents get the rest
+SUPERVISOR_ROLES = {
+    "manager": (("manager", "project manager"), 0.025),
+    "assistant manager": (("assistant manager",), 0.05),
+    "qa": (("qa",), 0.1),
+}
+AGENT_ROLE_NAMES = ("agent",)
+
+
+def _role_ids(cursor) -> dict:
+    cursor.execute("SELECT role_id, LOWER(TRIM(role_name)) AS role_name FROM user_role")
+    by_name = {row["role_name"]: row["role_id"] for row in cursor.fetchall()}
+
+    roles = {}
+    for role, (names, _) in list(SUPERVISOR_ROLES.items()) + [("agent", (AGENT_ROLE_NAMES, 0))]:
+        role_id = next((by_name[n] for n in names if n in by_name), None)
+        if role_id is None:
+            raise SystemExit(f"user_role has no {' / '.join(names)} row")
+        roles[role] = role_id
+    return roles
+
+
+def _first_id(cursor, sql):
+    cursor.execute(sql)
+    row = cursor.fetchone()
+    return next(iter(row.values())) if row else None
+
+
+def _month_starts(months: int, today: date) -> list[date]:
+    starts = []
+    y, m = today.year, today.month
+    for _ in range(max(months, 1)):
+        starts.append(date(y, m, 1))
+        y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+    return starts[::-1]
+
+
+def _month_end(start: date) -> date:
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def _work_days(date_from: date, date_to: date) -> list[date]:
+    days, d = [], date_from
+    while d <= date_to:
+        if d.weekday() < 5:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def seed_users(cursor, users: int, rng, now_str: str) -> dict:
+    """Returns {role: [user_id, ...]}."""
+    roles = _role_ids(cursor)
+    cursor.execute("SELECT team_id FROM team ORDER BY team_id LIMIT 10")
+    team_ids = [row["team_id"] for row in cursor.fetchall()]
+    designation_id = _first_id(cursor, "SELECT designation_id FROM user_designation ORDER BY designation_id LIMIT 1")
+
+    counts = {role: max(1, int(users * share)) for role, (_, share) in SUPERVISOR_ROLES.items()}
+    counts["agent"] = max(1, users - sum(counts.values()))
+
+    sql = """
+        INSERT INTO tfs_user
+        (user_name, user_email, user_password, user_number, user_address, is_active, is_delete,
+         role_id, designation_id, user_tenure, project_manager_id, asst_manager_id, qa_id,
+         team_id, created_date, updated_date)
+        VALUES (%s,%s,'',%s,'',1,1,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    """
+
+    ids = {}
+    seq = 0
+    # supervisors first: agents point at their ids
+    for role in list(SUPERVISOR_ROLES) + ["agent"]:
+        rows = []
+        for _ in range(counts[role]):
+            seq += 1
+            if role == "agent":
+                pm, am, qa = (rng.choice(ids[r]) for r in SUPERVISOR_ROLES)
+                hierarchy = (json.dumps([pm]), json.dumps([am]), json.dumps([qa]))
+            else:
+                hierarchy = (None, None, None)
+            rows.append((
+                f"bench_{role.replace(' ', '_')}_{seq}",
+                f"bench.{seq}@{BENCH_EMAIL_DOMAIN}",
+                f"90000{seq:05d}",
+                roles[role],
+                designation_id,
+                rng.choice([0.5, 1, 2, 3, 5]),
+                *hierarchy,
+                rng.choice(team_ids) if team_ids else None,
+                now_str,
+                now_str,
+            ))
+        cursor.executemany(sql, rows)
+        cursor.execute(
+            "SELECT user_id FROM tfs_user WHERE role_id=%s AND user_email LIKE %s ORDER BY user_id",
+            (roles[role], f"%@{BENCH_EMAIL_DOMAIN}"),
+        )
+        ids[role] = [row["user_id"] for row in cursor.fetchall()]
+
+    rebuild_user_supervisors(cursor)
+    return ids
+
+
+def seed_projects(cursor, projects: int, tasks_per_project: int, ids: dict, rng, now_str: str) -> dict:
+    """Returns {project_id: [task_id, ...]}."""
+    category_id = _first_id(cursor, "SELECT project_category_id FROM project_category ORDER BY project_category_id LIMIT 1")
+
+    cursor.executemany(
+        """
+        INSERT INTO project
+        (project_name, project_code, project_description, project_manager_id, asst_project_manager_id,
+         project_team_id, project_qa_id, project_pprt, project_category_id, created_date, updated_date, is_active)
+        VALUES (%s,%s,'',%s,%s,'[]',%s,'[]',%s,%s,%s,1)
+        """,
+        [
+            (
+                f"Bench project {n}", f"{BENCH_PROJECT_PREFIX}{n:04d}",
+                rng.choice(ids["manager"]),
+                json.dumps([rng.choice(ids["assistant manager"])]),
+                json.dumps([rng.choice(ids["qa"])]),
+                category_id or 0, now_str, now_str,
+            )
+            for n in range(1, projects + 1)
+        ],
+    )
+    cursor.execute("SELECT project_id FROM project WHERE project_code LIKE %s ORDER BY project_id",
+                   (f"{BENCH_PROJECT_PREFIX}%",))
+    project_ids = [row["project_id"] for row in cursor.fetchall()]
+
+    cursor.executemany(
+        """
+        INSERT INTO task
+        (project_id, task_team_id, task_name, task_description, task_target, task_file,
+         important_columns, is_active, created_date, updated_date)
+        VALUES (%s,'[]',%s,'',%s,NULL,'[]',1,%s,%s)
+        """,
+        [
+            (project_id, f"Bench task {project_id}-{t}", rng.choice([40, 60, 80, 100]), now_str, now_str)
+            for project_id in project_ids
+            for t in range(1, tasks_per_project + 1)
+        ],
+    )
+    placeholders = ", ".join(["%s"] * len(project_ids))
+    cursor.execute(f"SELECT task_id, project_id FROM task WHERE project_id IN ({placeholders})", tuple(project_ids))
+    tasks = {project_id: [] for project_id in project_ids}
+    for row in cursor.fetchall():
+        tasks[row["project_id"]].append(row["task_id"])
+    return tasks
+
+
+def seed_activity(cursor, ids: dict, tasks: dict, months: int, trackers_per_day: int,
+                  rng, now: datetime, batch_size: int = 1000) -> dict:
+    """Trackers, temp_qc and monthly targets for every agent / project over the months."""
+    month_starts = _month_starts(months, now.date())
+    days = _work_days(month_starts[0], now.date())
+    project_ids = list(tasks)
+    now_str = now.strftime(SQL_DT_FORMAT)
+    agents = ids["agent"]
+
+    # each agent works on a couple of projects, like the real data
+    agent_projects = {a: rng.sample(project_ids, min(len(project_ids), 2)) for a in agents}
+
+    tracker_rows, qc_rows, written = [], [], {"trackers": 0, "temp_qc": 0}
+
+    def flush(force=False):
+        if tracker_rows and (force or len(tracker_rows) >= batch_size):
+            cursor.executemany(TRACKER_INSERT_SQL, tracker_rows)
+            written["trackers"] += len(tracker_rows)
+            tracker_rows.clear()
+        if qc_rows and (force or len(qc_rows) >= batch_size):
+            cursor.executemany(
+                """
+                INSERT INTO temp_qc (user_id, qc_score, assigned_hours, date, updated_date)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE qc_score=VALUES(qc_score), assigned_hours=VALUES(assigned_hours)
+                """,
+                qc_rows,
+            )
+            written["temp_qc"] += len(qc_rows)
+            qc_rows.clear()
+
+    for day in days:
+        for agent in agents:
+            shift = "NIGHT" if agent % 5 == 0 else "DAY"
+            for _ in range(trackers_per_day):
+                project_id = rng.choice(agent_projects[agent])
+                target = rng.choice([40, 60, 80, 100])
+                production = rng.randint(0, 120)
+                ts = datetime(day.year, day.month, day.day, 9 if shift == "DAY" else 21) \
+                    + timedelta(minutes=rng.randrange(8 * 60))
+                ts = ts.strftime(SQL_DT_FORMAT)
+                tracker_rows.append((
+                    project_id, rng.choice(tasks[project_id]), agent, production, target, target,
+                    production / target, production / target, BENCH_NOTE, shift,
+                    ts, ts, ts, ts,
+                ))
+            qc_rows.append((agent, round(rng.uniform(80, 100), 2), 9, day.isoformat(), now_str))
+            flush()
+    flush(force=True)
+
+    umt_rows = []
+    pmt_rows = []
+    for start in month_starts:
+        month_year = start.strftime("%b%Y")
+        yyyymm = start.year * 100 + start.month
+        working_days = len(_work_days(start, _month_end(start)))
+        umt_rows += [(a, month_year, yyyymm, working_days * 9, 0, working_days, now_str) for a in agents]
+        pmt_rows += [(p, month_year, yyyymm, rng.choice([500, 1000, 2000]), now_str) for p in project_ids]
+
+    cursor.executemany(
+        """
+        INSERT INTO user_monthly_tracker
+        (user_id, month_year, yyyymm, monthly_target, extra_assigned_hours, working_days, is_active, created_date)
+        VALUES (%s, %s, %s, %s, %s, %s, 1, %s)
+        ON DUPLICATE KEY UPDATE monthly_target=VALUES(monthly_target), is_active=1
+        """,
+        umt_rows,
+    )
+    cursor.executemany(
+        """
+        INSERT INTO project_monthly_tracker (project_id, month_year, yyyymm, monthly_target, created_date, is_active)
+        VALUES (%s, %s, %s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE monthly_target=VALUES(monthly_target), is_active=1
+        """,
+        pmt_rows,
+    )
+    written.update({"user_monthly_tracker": len(umt_rows), "project_monthly_tracker": len(pmt_rows)})
+
+    date_from, date_to = month_starts[0].isoformat(), now.date().isoformat()
+    rebuild_daily_rollup(cursor, date_from, date_to)
+    rebuild_project_month_rollup(cursor, date_from, date_to)
+    return written
+
+
+def generate(cursor, users: int, projects: int, tasks_per_project: int, months: int,
+             trackers_per_day: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    now_str = now.strftime(SQL_DT_FORMAT)
+
+    cursor.execute("SELECT COUNT(*) AS n FROM tfs_user WHERE user_email LIKE %s", (f"%@{BENCH_EMAIL_DOMAIN}",))
+    if cursor.fetchone()["n"]:
+        raise SystemExit("synthetic data already present; run with --cleanup first")
+
+    ids = seed_users(cursor, users, rng, now_str)
+    tasks = seed_projects(cursor, projects, tasks_per_project, ids, rng, now_str)
+    written = seed_activity(cursor, ids, tasks, months, trackers_per_day, rng, now)
+    written.update({role: len(v) for role, v in ids.items()})
+    written.update({"projects": len(tasks), "tasks": sum(len(t) for t in tasks.values())})
+    return written
+
+
+def cleanup(cursor) -> dict:
+    email_like = f"%@{BENCH_EMAIL_DOMAIN}"
+    users_sql = "SELECT user_id FROM tfs_user WHERE user_email LIKE %s"
+    projects_sql = "SELECT project_id FROM project WHERE project_code LIKE %s"
+    project_like = f"{BENCH_PROJECT_PREFIX}%"
+
+    deleted = {}
+    for table, sql, params in (
+        ("task_work_tracker", f"DELETE FROM task_work_tracker WHERE user_id IN (SELECT user_id FROM ({users_sql}) b)", (email_like,)),
+        ("temp_qc", f"DELETE FROM temp_qc WHERE user_id IN (SELECT user_id FROM ({users_sql}) b)", (email_like,)),
+        ("user_monthly_tracker", f"DELETE FROM user_monthly_tracker WHERE user_id IN (SELECT user_id FROM ({users_sql}) b)", (email_like,)),
+        ("project_monthly_tracker", f"DELETE FROM project_monthly_tracker WHERE project_id IN (SELECT project_id FROM ({projects_sql}) b)", (project_like,)),
+        ("task", f"DELETE FROM task WHERE project_id IN (SELECT project_id FROM ({projects_sql}) b)", (project_like,)),
+        ("project", "DELETE FROM project WHERE project_code LIKE %s", (project_like,)),
+        ("user_supervisor", f"DELETE FROM user_supervisor WHERE user_id IN (SELECT user_id FROM ({users_sql}) b)", (email_like,)),
+        ("tfs_user", "DELETE FROM tfs_user WHERE user_email LIKE %s", (email_like,)),
+    ):
+        cursor.execute(sql, params)
+        deleted[table] = cursor.rowcount
+
+    rebuild_daily_rollup(cursor, None, None)
+    rebuild_project_month_rollup(cursor, None, None)
+    return deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="generate a synthetic benchmark data set")
+    parser.add_argument("--users", type=int, default=200, help="total users across all roles (default 200)")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--tasks-per-project", type=int, default=4)
+    parser.add_argument("--months", type=int, default=3, help="months of activity, current one included")
+    parser.add_argument("--trackers-per-day", type=int, default=2, help="tracker rows per agent per work day")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (same seed, same data)")
+    parser.add_argument("--cleanup", action="store_true", help="delete a previously generated data set")
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        if args.cleanup:
+            result = cleanup(cursor)
+        else:
+            result = generate(cursor, args.users, args.projects, args.tasks_per_project,
+                              args.months, args.trackers_per_day, args.seed)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(("deleted " if args.cleanup else "inserted ") + ", ".join(f"{k}={v}" for k, v in result.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 import cloudinary
 from cloudinary.uploader import upload
 from cloudinary.api import resource
+from utils.db_pool import get_pool
+from utils.sql_instrumentation import instrument_connection
 
 load_dotenv()
 
@@ -32,6 +34,12 @@ RESET_SECRET_KEY = os.getenv("RESET_SECRET_KEY")
 RESET_TOKEN_TTL_SECONDS = int(os.getenv("RESET_TOKEN_TTL_SECONDS", "300"))
 RESET_FRONTEND_URL = os.getenv("RESET_FRONTEND_URL")
 
+# signed login tokens (utils/session_token.py); falls back to the reset key
+SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY") or RESET_SECRET_KEY
+SESSION_TOKEN_TTL_SECONDS = int(os.getenv("SESSION_TOKEN_TTL_SECONDS", "43200"))
+# 1 = reject requests without a token (once all clients send one)
+SESSION_TOKEN_REQUIRED = os.getenv("SESSION_TOKEN_REQUIRED", "0").strip().lower() in ("1", "true", "yes", "on")
+
 # Cloudinary Configuration
 CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.getenv("PYTHON_CLOUDINARY_API_KEY")
@@ -66,8 +74,8 @@ else:
         print("A new key will be generated. Please update your .env file.")
         
         
-def get_db_connection():
-    return mysql.connector.connect(
+def get_db_connect_kwargs():
+    return dict(
         host=os.getenv("DB_HOST"),  # Use env var or default to 'localhost'
         port=int(os.getenv("DB_PORT", 3306)),  # Use env var or default to 3306
         user=os.getenv("DB_USERNAME"),  # Use env var or default to 'root'
@@ -76,6 +84,19 @@ def get_db_connection():
             "DB_DATABASE", "tfs_hrms"
         ),  # Use env var or default to 'tfs_hrms'
     )
+
+
+# Pooled connections (per process). Tune with DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW,
+# DB_POOL_TIMEOUT (seconds) and DB_POOL_PRE_PING; DB_POOL_ENABLED=0 falls back
+# to one fresh connection per call.
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "1").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_db_connection():
+    # per-request statement / time / row accounting, see utils/sql_instrumentation.py
+    if not DB_POOL_ENABLED:
+        return instrument_connection(mysql.connector.connect(**get_db_connect_kwargs()))
+    return instrument_connection(get_pool(get_db_connect_kwargs()).get_connection())
     
     # Environment validation on startup
 def validate_environment():
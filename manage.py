@@ -0,0 +1,196 @@
+"""
+Maintenance commands (run from the project root):
+
+    python manage.py sync-hierarchy     # rebuild user_supervisor from tfs_user
+    python manage.py rebuild-rollup [--month Jan2026 | --from 2026-01-01 --to 2026-01-31]
+    python manage.py verify-rollup  [--month Jan2026 | --from 2026-01-01 --to 2026-01-31]
+    python manage.py archive-api-logs [--days 90] [--batch 5000]
+    python manage.py assign-daily-hours --from 2026-01-01 [--to 2026-01-31] [--overwrite]
+    python manage.py send-emails [--batches N]   # drain email_outbox once
+"""
+import argparse
+import sys
+
+from config import get_db_connection
+
+
+def cmd_sync_hierarchy(args):
+    from utils.hierarchy import rebuild_user_supervisors
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        written = rebuild_user_supervisors(cursor)
+        conn.commit()
+        print(f"user_supervisor rebuilt: {written} rows")
+        return 0
+    except Exception as e:
+        conn.rollback()
+        print(f"sync-hierarchy failed: {e}")
+        return 1
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _rollup_range(args):
+    """(date_from, date_to) from --month or --from/--to; (None, None) = everything."""
+    if args.month:
+        from datetime import datetime, timedelta
+        from utils.date_utils import month_year_bounds
+
+        bounds = month_year_bounds(args.month)
+        if not bounds:
+            raise SystemExit(f"invalid --month {args.month!r}, expected like Jan2026")
+        end = datetime.strptime(bounds[1], "%Y-%m-%d %H:%M:%S") - timedelta(days=1)
+        return bounds[0][:10], end.strftime("%Y-%m-%d")
+    return args.date_from, args.date_to
+
+
+def cmd_rebuild_rollup(args):
+    from utils.tracker_rollup import rebuild_daily_rollup, rebuild_project_month_rollup
+
+    date_from, date_to = _rollup_range(args)
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        written = rebuild_daily_rollup(cursor, date_from, date_to)
+        months = rebuild_project_month_rollup(cursor, date_from, date_to)
+        conn.commit()
+        print(f"tracker_daily_rollup rebuilt ({date_from or 'start'} .. {date_to or 'end'}): {written} rows")
+        print(f"project_month_rollup rebuilt (whole months): {months} rows")
+        return 0
+    except Exception as e:
+        conn.rollback()
+        print(f"rebuild-rollup failed: {e}")
+        return 1
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def cmd_verify_rollup(args):
+    from utils.tracker_rollup import verify_daily_rollup, verify_project_month_rollup
+
+    date_from, date_to = _rollup_range(args)
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        mismatches = verify_daily_rollup(cursor, date_from, date_to)
+        for m in mismatches[:50]:
+            print(
+                f"user={m['user_id']} date={m['work_date']} shift={m['shift']} "
+                f"hours raw={m['raw_billable_hours']:.4f} rollup={m['rollup_billable_hours']:.4f} "
+                f"count raw={m['raw_tracker_count']} rollup={m['rollup_tracker_count']}"
+            )
+        month_mismatches = verify_project_month_rollup(cursor, date_from, date_to)
+        for m in month_mismatches[:50]:
+            print(
+                f"project={m['project_id']} month={m['yyyymm']} "
+                f"achieved raw={m['raw_achieved_hours']:.2f} rollup={m['rollup_achieved_hours']:.2f} "
+                f"count raw={m['raw_tracker_count']} rollup={m['rollup_tracker_count']}"
+            )
+        if mismatches or month_mismatches:
+            print(
+                f"{len(mismatches)} mismatched day bucket(s), {len(month_mismatches)} mismatched project month(s); "
+                "run rebuild-rollup for the same range"
+            )
+            return 1
+        print("tracker_daily_rollup and project_month_rollup match task_work_tracker")
+        return 0
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def cmd_archive_api_logs(args):
+    from datetime import datetime, timedelta
+    from utils.api_log_utils import archive_api_logs
+    from utils.date_utils import SQL_DT_FORMAT
+
+    before = (datetime.now() - timedelta(days=args.days)).strftime(SQL_DT_FORMAT)
+    try:
+        moved = archive_api_logs(before, batch_size=args.batch)
+    except Exception as e:
+        print(f"archive-api-logs failed: {e}")
+        return 1
+    print(f"api_call_logs: moved {moved} rows older than {before} to api_call_logs_archive")
+    return 0
+
+
+def cmd_assign_daily_hours(args):
+    from utils.daily_hours import run_assign_daily_hours
+
+    try:
+        affected = run_assign_daily_hours(
+            args.date_from, args.date_to, overwrite=args.overwrite, lock_timeout=args.wait
+        )
+    except Exception as e:
+        print(f"assign-daily-hours failed: {e}")
+        return 1
+    if affected is None:
+        print("assign-daily-hours: another process is running the assignment, try again later")
+        return 1
+    print(f"temp_qc: {affected} rows affected for {args.date_from} to {args.date_to or args.date_from}")
+    return 0
+
+
+def cmd_send_emails(args):
+    from utils.email_outbox import drain_outbox
+
+    try:
+        totals = drain_outbox(max_batches=args.batches)
+    except Exception as e:
+        print(f"send-emails failed: {e}")
+        return 1
+    print(
+        f"email_outbox: sent {totals['sent']}, retry {totals['retry']}, failed {totals['failed']}, "
+        f"released {totals['released']} in {totals['batches']} batch(es)"
+    )
+    if totals["connection_error"]:
+        print(f"send-emails: SMTP connection error: {totals['connection_error']}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HRMS maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("sync-hierarchy", help="rebuild user_supervisor from tfs_user id columns")
+    p.set_defaults(func=cmd_sync_hierarchy)
+
+    for name, func, help_text in (
+        ("rebuild-rollup", cmd_rebuild_rollup, "recompute tracker_daily_rollup / project_month_rollup"),
+        ("verify-rollup", cmd_verify_rollup, "compare the rollups against task_work_tracker"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--month", help="MonYYYY, e.g. Jan2026")
+        p.add_argument("--from", dest="date_from", help="YYYY-MM-DD (inclusive)")
+        p.add_argument("--to", dest="date_to", help="YYYY-MM-DD (inclusive)")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser("archive-api-logs", help="move old api_call_logs rows to api_call_logs_archive")
+    p.add_argument("--days", type=int, default=90, help="keep this many days in api_call_logs (default 90)")
+    p.add_argument("--batch", type=int, default=5000, help="rows per transaction (default 5000)")
+    p.set_defaults(func=cmd_archive_api_logs)
+
+    p = sub.add_parser("assign-daily-hours", help="give active agents their daily assigned hours for a date range")
+    p.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD (inclusive)")
+    p.add_argument("--to", dest="date_to", help="YYYY-MM-DD (inclusive, default --from)")
+    p.add_argument("--overwrite", action="store_true", help="replace hours already set (default: only fill missing)")
+    p.add_argument("--wait", type=int, default=10, help="seconds to wait for the assignment lock (default 10)")
+    p.set_defaults(func=cmd_assign_daily_hours)
+
+    p = sub.add_parser("send-emails", help="send due email_outbox rows now")
+    p.add_argument("--batches", type=int, help="stop after this many batches (default: until empty)")
+    p.set_defaults(func=cmd_send_emails)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ from datetime import datetime
 from config import get_db_connection
 from utils.validators import validate_request
 from utils.response import api_response
+from utils.reference_data import bump_reference_version
 
 afd_master_bp = Blueprint("afd_master", __name__, url_prefix="/qc/afd-master")
 
@@ -42,12 +43,14 @@ def create_afd():
             INSERT INTO {AFD_TABLE} (afd_name, is_active, created_date)
             VALUES (%s, %s, %s)
         """, (afd_name, 1, _today()))
+        afd_id = cursor.lastrowid
+        bump_reference_version(cursor, AFD_TABLE)
         conn.commit()
 
         return api_response(
             message="AFD created successfully",
             status=201,
-            data={"afd_id": cursor.lastrowid}
+            data={"afd_id": afd_id}
         )
     except Exception as e:
         conn.rollback()
@@ -120,6 +123,7 @@ def update_afd():
             SET {", ".join(updates)}
             WHERE afd_id=%s
         """, tuple(params))
+        bump_reference_version(cursor, AFD_TABLE)
         conn.commit()
 
         return api_response(message="AFD updated successfully", status=200)
@@ -150,6 +154,7 @@ def delete_afd():
             return api_response(message="AFD not found", status=404)
 
         cursor.execute(f"UPDATE {AFD_TABLE} SET is_active=0 WHERE afd_id=%s", (afd_id,))
+        bump_reference_version(cursor, AFD_TABLE)
         conn.commit()
 
         return api_response(message="AFD deleted (disabled) successfully", status=200)
@@ -1,6 +1,8 @@
 from flask import Blueprint, request
 from config import get_db_connection
 from utils.response import api_response
+from utils.date_utils import SQL_DT_FORMAT, day_bounds
+from utils.pagination import encode_cursor, decode_cursor, parse_limit
 from datetime import datetime
 
 def get_action_description(api_name):
@@ -17,23 +19,103 @@ def get_action_description(api_name):
     }
     return mapping.get(api_name, api_name)
 
+
+def parse_log_time(value, end=False):
+    """
+    'YYYY-MM-DD HH:MM:SS' is used as-is; a bare 'YYYY-MM-DD' means the start of
+    that day (from) or the start of the next day (to, so the day is included).
+    Returns a SQL datetime string, None if empty; raises ValueError if garbled.
+    """
+    s = str(value or "").strip()
+    if not s:
+        return None
+    if len(s) > 10:
+        return datetime.strptime(s, SQL_DT_FORMAT).strftime(SQL_DT_FORMAT)
+    bounds = day_bounds(s)
+    if not bounds:
+        raise ValueError(f"Invalid date: {s}")
+    return bounds[1] if end else bounds[0]
+
+
 api_log_list_bp = Blueprint("api_log_list", __name__)
 
 @api_log_list_bp.route("/logs", methods=["POST"])
 def get_api_logs():
+    """
+    Newest first (ORDER BY timestamp DESC, id DESC); data is the list of logs.
+
+    Optional filters: user_id, api_name, from / to ('YYYY-MM-DD' or
+    'YYYY-MM-DD HH:MM:SS'; `to` is exclusive for datetimes, inclusive for dates).
+    Optional keyset pagination: send limit (max 1000), then pass back
+    next_cursor as cursor; data is then {logs, next_cursor, has_more}.
+    Rows moved to api_call_logs_archive (python manage.py archive-api-logs) are not listed.
+    """
+    data = request.get_json(silent=True) or {}
+
+    paginate = data.get("limit") not in (None, "") or bool(data.get("cursor"))
+    try:
+        limit = parse_limit(data.get("limit"))
+        time_from = parse_log_time(data.get("from"))
+        time_to = parse_log_time(data.get("to"), end=True)
+        user_id = int(data["user_id"]) if data.get("user_id") not in (None, "") else None
+    except ValueError as e:
+        return api_response(400, str(e))
+
+    after = None
+    if data.get("cursor"):
+        after = decode_cursor(data["cursor"])
+        if not after or "ts" not in after or "id" not in after:
+            return api_response(400, "Invalid cursor")
+
+    where = ["1=1"]
+    params = []
+    if user_id is not None:
+        where.append("l.user_id = %s")
+        params.append(user_id)
+    if data.get("api_name"):
+        where.append("l.api_name = %s")
+        params.append(str(data["api_name"]).strip())
+    if time_from:
+        where.append("l.timestamp >= %s")
+        params.append(time_from)
+    if time_to:
+        where.append("l.timestamp < %s")
+        params.append(time_to)
+    if after:
+        where.append("(l.timestamp < %s OR (l.timestamp = %s AND l.id < %s))")
+        params.extend([after["ts"], after["ts"], int(after["id"])])
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("""
+        # served by idx_acl_ts / idx_acl_user_ts / idx_acl_api_ts
+        cursor.execute(f"""
             SELECT l.*, u.user_name
             FROM api_call_logs l
             LEFT JOIN tfs_user u ON l.user_id = u.user_id
-            ORDER BY l.timestamp DESC
-        """)
+            WHERE {" AND ".join(where)}
+            ORDER BY l.timestamp DESC, l.id DESC
+            {"LIMIT %s" if paginate else ""}
+        """, tuple(params + ([limit + 1] if paginate else [])))
         logs = cursor.fetchall()
+
+        has_more = paginate and len(logs) > limit
+        if has_more:
+            logs = logs[:limit]
+        next_cursor = None
+        if has_more:
+            last = logs[-1]
+            next_cursor = encode_cursor({"ts": str(last["timestamp"]), "id": int(last["id"])})
+
         for log in logs:
             log["action"] = f"{log.get('user_name', 'Unknown User')} {get_action_description(log['api_name'])} at {log['timestamp']} from {log.get('device_type', '')} ({log.get('device_id', '')})"
-        return api_response(200, "API logs fetched successfully", logs)
+        if not paginate:
+            return api_response(200, "API logs fetched successfully", logs)
+        return api_response(200, "API logs fetched successfully", {
+            "logs": logs,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        })
     except Exception as e:
         return api_response(500, f"Failed to fetch logs: {str(e)}")
     finally:
@@ -10,6 +10,10 @@ from utils.validators import (
     is_valid_phone
 )
 from utils.validators import validate_request
+from utils.hierarchy import sync_user_supervisors, invalidate_subordinate_cache
+from utils.role_context import get_user_role
+from utils.session_token import issue_session_token
+from config import SESSION_TOKEN_TTL_SECONDS
 import json
 import re
 
@@ -137,6 +141,11 @@ def user_handler():
                 user["profile_picture"] = None
 
             user.pop("user_password", None)
+
+            # signed token with id / role / permission flags; send it back as
+            # "Authorization: Bearer <session_token>"
+            user["session_token"] = issue_session_token(user, get_user_role(cursor, user["user_id"]))
+            user["session_expires_in"] = SESSION_TOKEN_TTL_SECONDS
             return api_response(200, "Login successful", user)
 
         finally:
@@ -261,6 +270,12 @@ def user_handler():
 
         new_user_id = cursor.lastrowid
 
+        sync_user_supervisors(cursor, new_user_id, {
+            "project_manager": project_manager,
+            "asst_manager": assistant_manager,
+            "qa": qa,
+        })
+
         cursor.execute("""SELECT role_name FROM user_role WHERE role_id=%s""", (role_id,))
         role = cursor.fetchone()
 
@@ -287,6 +302,7 @@ def user_handler():
         ))
 
         conn.commit()
+        invalidate_subordinate_cache()
         return api_response(201, "User registered successfully")
 
     except Exception as e:
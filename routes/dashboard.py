@@ -3,31 +3,22 @@
 from flask import Blueprint, request
 from config import get_db_connection, UPLOAD_FOLDER, UPLOAD_SUBDIRS, BASE_UPLOAD_URL
 from utils.response import api_response
+from utils.date_utils import day_bounds
+from utils.hierarchy import relation_for_role, cached_reporting_user_ids
+from utils.role_context import get_user_role
+from utils.session_token import current_user_id
+from utils.export_utils import export_format, iter_query_rows, stream_export
+from decimal import Decimal, ROUND_HALF_UP
 
 dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/dashboard")
 
-TRACKER_DT = "CAST(twt.date_time AS DATETIME)"
+# indexed DATETIME copy of task_work_tracker.date_time (TEXT)
+TRACKER_DT = "twt.date_time_dt"
 
 
 # -----------------------------
 # Helpers
 # -----------------------------
-def get_user_role(cursor, user_id: int) -> str | None:
-    cursor.execute(
-        """
-        SELECT r.role_name
-        FROM tfs_user u
-        JOIN user_role r ON r.role_id = u.role_id
-        WHERE u.user_id=%s AND u.is_active=1 AND u.is_delete=1
-        """,
-        (user_id,),
-    )
-    row = cursor.fetchone()
-    if not row:
-        return None
-    return (row.get("role_name") or "").strip().lower()
-
-
 def multi_id_match_sql(col: str) -> str:
     cleaned = f"REPLACE(REPLACE(REPLACE(REPLACE({col}, '[', ''), ']', ''), CHAR(34), ''), ' ', '')"
     return f"({col} = %s OR FIND_IN_SET(%s, {cleaned}) > 0)"
@@ -55,8 +46,13 @@ def apply_tracker_filters(data: dict, where_sql: str, params: list) -> tuple[str
         params.append(data["task_id"])
 
     if data.get("date"):
-        where_sql += f" AND DATE({TRACKER_DT}) = %s"
-        params.append(data["date"])
+        bounds = day_bounds(data["date"])
+        if bounds:
+            where_sql += f" AND {TRACKER_DT} >= %s AND {TRACKER_DT} < %s"
+            params.extend(bounds)
+        else:
+            where_sql += f" AND DATE({TRACKER_DT}) = %s"
+            params.append(data["date"])
 
     if data.get("date_from"):
         date_from = data["date_from"]
@@ -120,116 +116,26 @@ def apply_qc_filters(data: dict, where_sql: str, params: list) -> tuple[str, lis
 # -----------------------------
 # USER → TRACKER SCOPING (IMPORTANT PART)
 # -----------------------------
-def detect_existing_column(cursor, table: str, candidates: list[str]) -> str | None:
-    cursor.execute(
-        """
-        SELECT COLUMN_NAME
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = DATABASE()
-          AND TABLE_NAME = %s
-        """,
-        (table,),
-    )
-    cols = {r["COLUMN_NAME"].lower() for r in (cursor.fetchall() or [])}
-    for c in candidates:
-        if c.lower() in cols:
-            return c
-    return None
-
-
 def get_subordinate_user_ids(cursor, role: str, logged_in_user_id: int) -> list[int] | None:
     """
     Returns:
       - None for admin (means ALL)
       - list[int] for other roles (users under them, including self)
+
+    QA / Assistant Manager / Project Manager each see the users mapped to
+    them through their own relation in user_supervisor (cached in memory,
+    see utils/hierarchy.py).
     """
     role = (role or "").strip().lower()
-    v = str(logged_in_user_id)
 
     if role in ["admin", "super admin"]:
         return None
 
-    if role == "agent":
+    relation = relation_for_role(role)
+    if not relation:
         return [logged_in_user_id]
 
-    # ✅ QA: agents mapped via tfs_user.qa_id containing QA user_id
-    if role == "qa":
-        cursor.execute(
-            f"""
-            SELECT DISTINCT tu.user_id
-            FROM tfs_user tu
-            WHERE tu.is_active=1 AND tu.is_delete=1
-              AND {multi_id_match_sql("tu.qa_id")}
-            """,
-            (v, v),
-        )
-        rows = cursor.fetchall() or []
-        ids = [int(r["user_id"]) for r in rows if r.get("user_id") is not None]
-        if logged_in_user_id not in ids:
-            ids.append(logged_in_user_id)
-        return ids
-
-    # ✅ Assistant Manager: MUST come from tfs_user mapping (NOT project table)
-    if role == "assistant manager":
-        col = detect_existing_column(
-            cursor,
-            "tfs_user",
-            [
-                "assistant_manager_id",
-                "asst_manager_id",
-                "asst_reporting_manager_id",
-                "reporting_manager_id",
-            ],
-        )
-        if not col:
-            return [logged_in_user_id]
-
-        cursor.execute(
-            f"""
-            SELECT tu.user_id
-            FROM tfs_user tu
-            WHERE tu.is_active=1 AND tu.is_delete=1
-              AND {multi_id_match_sql(f"tu.{col}")}
-            """,
-            (v, v),
-        )
-        rows = cursor.fetchall() or []
-        ids = [int(r["user_id"]) for r in rows if r.get("user_id") is not None]
-        if logged_in_user_id not in ids:
-            ids.append(logged_in_user_id)
-        return ids
-
-    # ✅ Project Manager: also from tfs_user mapping (not project table)
-    if role in ["manager", "project manager", "product manager"]:
-        col = detect_existing_column(
-            cursor,
-            "tfs_user",
-            [
-                "reporting_manager_id",
-                "manager_id",
-                "project_manager_id",
-                "reporting_to",
-            ],
-        )
-        if not col:
-            return [logged_in_user_id]
-
-        cursor.execute(
-            f"""
-            SELECT tu.user_id
-            FROM tfs_user tu
-            WHERE tu.is_active=1 AND tu.is_delete=1
-              AND {multi_id_match_sql(f"tu.{col}")}
-            """,
-            (v, v),
-        )
-        rows = cursor.fetchall() or []
-        ids = [int(r["user_id"]) for r in rows if r.get("user_id") is not None]
-        if logged_in_user_id not in ids:
-            ids.append(logged_in_user_id)
-        return ids
-
-    return [logged_in_user_id]
+    return cached_reporting_user_ids(cursor, logged_in_user_id, relations=[relation])
 
 
 # -----------------------------
@@ -324,6 +230,138 @@ def get_tasks_for_role(cursor, role: str, logged_in_user_id: int, project_ids: l
     return cursor.fetchall() or []
 
 
+# -----------------------------
+# TRACKER SCOPE (shared by /filter and /export)
+# -----------------------------
+DASHBOARD_TRACKER_FROM = """
+    FROM task_work_tracker twt
+    JOIN tfs_user u ON u.user_id = twt.user_id
+    JOIN project p ON p.project_id = twt.project_id
+"""
+
+DASHBOARD_TRACKER_COLUMNS = [
+    "tracker_id", "user_id", "actual_target", "tenure_target", "user_name",
+    "project_id", "project_name", "task_id", "production", "billable_hours",
+    "date_time", "tracker_file",
+]
+
+DASHBOARD_TRACKER_SELECT = """
+    twt.tracker_id,
+    twt.user_id,
+    twt.actual_target,
+    twt.tenure_target,
+    u.user_name,
+    twt.project_id,
+    p.project_name,
+    twt.task_id,
+    twt.production,
+    twt.billable_hours,
+    twt.date_time,
+    twt.tracker_file
+"""
+
+
+def build_dashboard_tracker_where(data: dict, visible_user_ids: list[int] | None) -> tuple[str, list]:
+    where_sql = """
+        WHERE u.is_active=1 AND u.is_delete=1
+          AND twt.is_active=1
+          AND p.is_active=1
+    """
+    params: list = []
+
+    if visible_user_ids is not None:
+        where_sql += f" AND twt.user_id {build_in_clause_int(visible_user_ids, params)}"
+
+    # Apply all existing tracker filters (UNCHANGED)
+    return apply_tracker_filters(data, where_sql, params)
+
+
+def requested_user_outside_scope(data: dict, visible_user_ids: list[int] | None) -> bool:
+    """Ensure requested user_id cannot leak outside visible set."""
+    if not data.get("user_id") or visible_user_ids is None:
+        return False
+    return int(data["user_id"]) not in set(visible_user_ids)
+
+
+def summarize_tracker_scope(groups: list[dict]) -> tuple[dict, list[int], dict]:
+    """
+    Folds (user_id, project_id, task_id) aggregate rows into what /filter
+    returns: (summary, user_ids in scope, {project_id: total_billable_hours}).
+    """
+    user_ids, project_ids, task_ids = set(), set(), set()
+    billable_map: dict = {}
+    tracker_rows = 0
+    total_production = 0
+    total_billable_hours = 0
+
+    for g in groups:
+        user_ids.add(g["user_id"])
+        project_ids.add(g["project_id"])
+        task_ids.add(g["task_id"])
+        tracker_rows += int(g["tracker_rows"] or 0)
+        total_production += g["total_production"] or 0
+        total_billable_hours += g["total_billable_hours"] or 0
+        billable_map[g["project_id"]] = billable_map.get(g["project_id"], 0) + (g["total_billable_hours"] or 0)
+
+    summary = {
+        "user_count": len(user_ids),
+        "project_count": len(project_ids),
+        "task_count": len({t for t in task_ids if t is not None}),
+        "tracker_rows": tracker_rows,
+        "total_production": total_production,
+        "total_billable_hours": total_billable_hours,
+    }
+    return summary, sorted(int(u) for u in user_ids if u is not None), billable_map
+
+
+def fetch_dashboard_users(cursor, user_ids: list[int]) -> list[dict]:
+    if not user_ids:
+        return []
+    params: list = []
+    in_sql = build_in_clause_int(user_ids, params)
+    cursor.execute(
+        f"""
+        SELECT
+            u.user_id,
+            u.user_name,
+            u.user_email,
+            u.user_number,
+            u.user_address,
+            u.user_tenure,
+            r.role_name AS role,
+            d.designation,
+            tm.team_name
+        FROM tfs_user u
+        LEFT JOIN user_role r ON r.role_id = u.role_id
+        LEFT JOIN user_designation d ON d.designation_id = u.designation_id
+        LEFT JOIN team tm ON tm.team_id = u.team_id
+        WHERE u.user_id {in_sql}
+        ORDER BY u.user_id DESC
+        """,
+        tuple(params),
+    )
+    return cursor.fetchall() or []
+
+
+def overall_qc_average(qc_user_rows: list[dict]) -> tuple:
+    """(avg_qc_score rounded like MySQL ROUND(x, 2), qc_days_count) over all users."""
+    total_days = sum(int(r.get("qc_days_count") or 0) for r in qc_user_rows)
+    if not total_days:
+        return None, 0
+    total_score = sum(Decimal(str(r.get("qc_score_sum") or 0)) for r in qc_user_rows)
+    avg = (total_score / total_days).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return avg, total_days
+
+
+def tracker_file_url(value) -> str | None:
+    tracker_file_temp = (value or "").strip()
+    if not tracker_file_temp:
+        return None
+    if tracker_file_temp.lower().startswith(("http://", "https://")):
+        return tracker_file_temp
+    return f"{BASE_UPLOAD_URL}/{UPLOAD_SUBDIRS['TRACKER_FILES']}/" + tracker_file_temp
+
+
 # -----------------------------
 # Dashboard Filter API
 # -----------------------------
@@ -331,7 +369,7 @@ def get_tasks_for_role(cursor, role: str, logged_in_user_id: int, project_ids: l
 def dashboard_filter():
     data = request.get_json() or {}
 
-    logged_in_user_id = data.get("logged_in_user_id")
+    logged_in_user_id = current_user_id(data)
     device_id = data.get("device_id")
     device_type = data.get("device_type")
 
@@ -356,95 +394,64 @@ def dashboard_filter():
         # --------------------
         # TRACKERS (ONLY THOSE USERS)
         # --------------------
-        base_from = """
-            FROM task_work_tracker twt
-            JOIN tfs_user u ON u.user_id = twt.user_id
-            JOIN project p ON p.project_id = twt.project_id
-        """
-        where_sql = """
-            WHERE u.is_active=1 AND u.is_delete=1
-              AND twt.is_active=1
-              AND p.is_active=1
-        """
-        params: list = []
-
-        if visible_user_ids is not None:
-            where_sql += f" AND twt.user_id {build_in_clause_int(visible_user_ids, params)}"
+        base_from = DASHBOARD_TRACKER_FROM
 
         # Ensure requested user_id cannot leak outside visible set
-        if data.get("user_id") and visible_user_ids is not None:
-            req_uid = int(data["user_id"])
-            if req_uid not in set(visible_user_ids):
-                return api_response(
-                    200,
-                    "Dashboard data fetched successfully",
-                    {
-                        "logged_in_role": logged_role,
-                        "filters_applied": {
-                            "user_id": data.get("user_id"),
-                            "project_id": data.get("project_id"),
-                            "task_id": data.get("task_id"),
-                            "date": data.get("date"),
-                            "date_from": data.get("date_from"),
-                            "date_to": data.get("date_to"),
-                        },
-                        "summary": {
-                            "user_count": 0,
-                            "project_count": 0,
-                            "task_count": 0,
-                            "tracker_rows": 0,
-                            "total_production": 0,
-                            "total_billable_hours": 0,
-                            "avg_qc_score": None,
-                            "qc_days_count": 0,
-                        },
-                        "users": [],
-                        "projects": [],
-                        "tasks": [],
-                        "tracker": [],
+        if requested_user_outside_scope(data, visible_user_ids):
+            return api_response(
+                200,
+                "Dashboard data fetched successfully",
+                {
+                    "logged_in_role": logged_role,
+                    "filters_applied": {
+                        "user_id": data.get("user_id"),
+                        "project_id": data.get("project_id"),
+                        "task_id": data.get("task_id"),
+                        "date": data.get("date"),
+                        "date_from": data.get("date_from"),
+                        "date_to": data.get("date_to"),
                     },
-                )
-
-        # Apply all existing tracker filters (UNCHANGED)
-        where_sql, params = apply_tracker_filters(data, where_sql, params)
-
-        # USERS list (from trackers scope)
-        users_query = f"""
-            SELECT DISTINCT
-                u.user_id,
-                u.user_name,
-                u.user_email,
-                u.user_number,
-                u.user_address,
-                u.user_tenure,
-                r.role_name AS role,
-                d.designation,
-                tm.team_name
-            {base_from}
-            LEFT JOIN user_role r ON r.role_id = u.role_id
-            LEFT JOIN user_designation d ON d.designation_id = u.designation_id
-            LEFT JOIN team tm ON tm.team_id = u.team_id
-            {where_sql}
-            ORDER BY u.user_id DESC
-        """
-        cursor.execute(users_query, tuple(params))
-        users = cursor.fetchall()
+                    "summary": {
+                        "user_count": 0,
+                        "project_count": 0,
+                        "task_count": 0,
+                        "tracker_rows": 0,
+                        "total_production": 0,
+                        "total_billable_hours": 0,
+                        "avg_qc_score": None,
+                        "qc_days_count": 0,
+                    },
+                    "users": [],
+                    "projects": [],
+                    "tasks": [],
+                    "tracker": [],
+                },
+            )
 
-        # TRACKER rows
-        tracker_query = f"""
+        where_sql, params = build_dashboard_tracker_where(data, visible_user_ids)
+
+        # ONE scan of the tracker scope: users, summary and per-project
+        # billable totals are all derived from these (user, project, task) groups
+        cursor.execute(f"""
             SELECT
-                twt.tracker_id,
                 twt.user_id,
-                twt.actual_target,
-                twt.tenure_target,
-                u.user_name,
                 twt.project_id,
-                p.project_name,
                 twt.task_id,
-                twt.production,
-                twt.billable_hours,
-                twt.date_time,
-                twt.tracker_file
+                COUNT(*) AS tracker_rows,
+                COALESCE(SUM(twt.production), 0) AS total_production,
+                COALESCE(SUM(twt.billable_hours), 0) AS total_billable_hours
+            {base_from}
+            {where_sql}
+            GROUP BY twt.user_id, twt.project_id, twt.task_id
+        """, tuple(params))
+        summary, scope_user_ids, billable_map = summarize_tracker_scope(cursor.fetchall() or [])
+
+        # USERS list (from trackers scope): PK lookups, no second tracker scan
+        users = fetch_dashboard_users(cursor, scope_user_ids)
+
+        # TRACKER rows
+        tracker_query = f"""
+            SELECT {DASHBOARD_TRACKER_SELECT}
             {base_from}
             {where_sql}
             ORDER BY {TRACKER_DT} DESC
@@ -453,30 +460,8 @@ def dashboard_filter():
         cursor.execute(tracker_query, tuple(params))
         tracker_rows = cursor.fetchall()
 
-        tracker_files_url = f"{BASE_UPLOAD_URL}/{UPLOAD_SUBDIRS['TRACKER_FILES']}/"
         for t in tracker_rows:
-            tracker_file_temp = (t.get("tracker_file") or "").strip()
-            if not tracker_file_temp:
-                t["tracker_file"] = None
-            elif tracker_file_temp.lower().startswith(("http://", "https://")):
-                t["tracker_file"] = tracker_file_temp
-            else:
-                t["tracker_file"] = tracker_files_url + tracker_file_temp
-
-        # SUMMARY (UNCHANGED)
-        summary_query = f"""
-            SELECT
-                COUNT(DISTINCT twt.user_id) AS user_count,
-                COUNT(DISTINCT twt.project_id) AS project_count,
-                COUNT(DISTINCT twt.task_id) AS task_count,
-                COUNT(*) AS tracker_rows,
-                COALESCE(SUM(twt.production), 0) AS total_production,
-                COALESCE(SUM(twt.billable_hours), 0) AS total_billable_hours
-            {base_from}
-            {where_sql}
-        """
-        cursor.execute(summary_query, tuple(params))
-        summary = cursor.fetchone() or {}
+            t["tracker_file"] = tracker_file_url(t.get("tracker_file"))
 
         # --------------------
         # QC SUMMARY + QC PER USER (NEW)
@@ -492,24 +477,11 @@ def dashboard_filter():
 
         qc_where, qc_params = apply_qc_filters(data, qc_where, qc_params)
 
-        # overall avg qc for current dashboard filters
-        qc_summary_query = f"""
-            SELECT
-                ROUND(SUM(tq.qc_score) / NULLIF(COUNT(*), 0), 2) AS avg_qc_score,
-                COUNT(*) AS qc_days_count
-            FROM temp_qc tq
-            {qc_where}
-              AND tq.qc_score IS NOT NULL
-        """
-        cursor.execute(qc_summary_query, tuple(qc_params))
-        qc_summary = cursor.fetchone() or {}
-        summary["avg_qc_score"] = qc_summary.get("avg_qc_score")
-        summary["qc_days_count"] = qc_summary.get("qc_days_count") or 0
-
-        # per-user avg qc
+        # per-user avg qc; the overall avg is rebuilt from the per-user sums
         qc_user_query = f"""
             SELECT
                 tq.user_id,
+                SUM(tq.qc_score) AS qc_score_sum,
                 ROUND(SUM(tq.qc_score) / NULLIF(COUNT(*), 0), 2) AS avg_qc_score,
                 COUNT(*) AS qc_days_count
             FROM temp_qc tq
@@ -519,6 +491,7 @@ def dashboard_filter():
         """
         cursor.execute(qc_user_query, tuple(qc_params))
         qc_user_rows = cursor.fetchall() or []
+        summary["avg_qc_score"], summary["qc_days_count"] = overall_qc_average(qc_user_rows)
         qc_user_map = {
             int(r["user_id"]): {
                 "avg_qc_score": r.get("avg_qc_score"),
@@ -544,18 +517,7 @@ def dashboard_filter():
         project_ids = [p["project_id"] for p in projects]
         tasks = get_tasks_for_role(cursor, logged_role, int(logged_in_user_id), project_ids)
 
-        # Billable hours for only returned projects but from SAME tracker scope (UNCHANGED)
-        billable_query = f"""
-            SELECT
-                p.project_id,
-                COALESCE(SUM(twt.billable_hours), 0) AS total_billable_hours
-            {base_from}
-            {where_sql}
-            GROUP BY p.project_id
-        """
-        cursor.execute(billable_query, tuple(params))
-        bill_rows = cursor.fetchall() or []
-        billable_map = {r["project_id"]: r["total_billable_hours"] for r in bill_rows}
+        # Billable hours for only returned projects but from SAME tracker scope
         for pr in projects:
             pr["total_billable_hours"] = billable_map.get(pr["project_id"], 0)
 
@@ -595,3 +557,60 @@ def dashboard_filter():
             conn.close()
         except Exception:
             pass
+
+
+# -----------------------------
+# Dashboard Export API (streamed NDJSON / CSV of the tracker rows,
+# same scope + filters as /filter, without the 500-row cap)
+# -----------------------------
+@dashboard_bp.route("/export", methods=["POST"])
+def dashboard_export():
+    data = request.get_json() or {}
+
+    logged_in_user_id = current_user_id(data)
+    if not logged_in_user_id:
+        return api_response(400, "logged_in_user_id is required")
+
+    fmt = export_format(data.get("format"))
+    if not fmt:
+        return api_response(400, "format must be ndjson or csv")
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        logged_role = get_user_role(cursor, int(logged_in_user_id))
+        if not logged_role:
+            return api_response(404, "Logged in user not found")
+        visible_user_ids = get_subordinate_user_ids(cursor, logged_role, int(logged_in_user_id))
+    except Exception:
+        import logging
+
+        logging.exception("Dashboard export failed")
+        return api_response(500, "Dashboard export failed due to an internal error.")
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    if requested_user_outside_scope(data, visible_user_ids):
+        rows = iter(())
+    else:
+        where_sql, params = build_dashboard_tracker_where(data, visible_user_ids)
+        query = f"""
+            SELECT {DASHBOARD_TRACKER_SELECT}
+            {DASHBOARD_TRACKER_FROM}
+            {where_sql}
+            ORDER BY {TRACKER_DT} DESC, twt.tracker_id DESC
+        """
+        rows = iter_query_rows(query, params)
+
+    def _row(t):
+        t["tracker_file"] = tracker_file_url(t.get("tracker_file"))
+        return t
+
+    return stream_export(rows, fmt, "dashboard_trackers", columns=DASHBOARD_TRACKER_COLUMNS, transform=_row)
@@ -1,6 +1,10 @@
 from flask import Blueprint, request
 from utils.response import api_response
 from config import get_db_connection
+from utils.hierarchy import relation_for_role, subordinate_scope_sql
+from utils.role_context import get_user_role
+from utils.session_token import current_user_id
+from utils.reference_data import get_reference_list, etag_matches
 
 dropdown_bp = Blueprint("dropdown", __name__)
 
@@ -13,18 +17,39 @@ ROLE_BASED_USER_DROPDOWNS = (
     "agent"
 )
 
-def get_user_role(cursor, user_id: int) -> str | None:
-    cursor.execute("""
-        SELECT r.role_name
-        FROM tfs_user u
-        JOIN user_role r ON r.role_id = u.role_id
-        WHERE u.user_id=%s AND u.is_active=1 AND u.is_delete=1
-    """, (user_id,))
-    row = cursor.fetchone()
-    if not row:
-        return None
-    return (row.get("role_name") or "").strip().lower()
-
+# dropdown_type -> (table guarding the cache entry, query)
+REFERENCE_DROPDOWNS = {
+    "designations": ("user_designation", """
+        SELECT designation_id, designation AS label
+        FROM user_designation
+        WHERE is_active = 1
+        ORDER BY designation
+    """),
+    "user roles": ("user_role", """
+        SELECT role_id, role_name AS label
+        FROM user_role
+        WHERE is_active = 1
+        ORDER BY role_name
+    """),
+    "teams": ("team", """
+        SELECT team_id, team_name AS label
+        FROM team
+        WHERE is_active = 1
+        ORDER BY team_name
+    """),
+    "project categories": ("project_category", """
+        SELECT project_category_id, project_category_name AS label
+        FROM project_category
+        WHERE is_active = 1
+        ORDER BY project_category_name
+    """),
+    "afd": ("afd", """
+        SELECT afd_id, afd_name AS label
+        FROM afd
+        WHERE is_active = 1
+        ORDER BY afd_name
+    """),
+}
 
 def multi_id_match_sql(col: str) -> str:
     # supports: 78 / 78,81 / [78] / [78,81] / ["78","81"] / spaces
@@ -45,96 +70,26 @@ def get():
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # -------------------- DESIGNATIONS -------------------- #
-        if dropdown_type == "designations":
-            query = """
-                SELECT designation_id, designation AS label
-                FROM user_designation
-                WHERE is_active = 1
-                ORDER BY designation
-            """
-            params = []
-
-            cursor.execute(query, params)
-            result = cursor.fetchall()
-
-            for item in result:
-                if item.get("label"):
-                    item["label"] = item["label"].title()
-
-            return api_response(200, "Dropdown data fetched successfully", result)
-
-        # -------------------- USER ROLES -------------------- #
-        if dropdown_type == "user roles":
-            query = """
-                SELECT role_id, role_name AS label
-                FROM user_role
-                WHERE is_active = 1
-                ORDER BY role_name
-            """
-            params = []
-
-            cursor.execute(query, params)
-            result = cursor.fetchall()
-
-            for item in result:
-                if item.get("label"):
-                    item["label"] = item["label"].title()
-
-            return api_response(200, "Dropdown data fetched successfully", result)
-
-        # -------------------- TEAMS -------------------- #
-        if dropdown_type == "teams":
-            query = """
-                SELECT team_id, team_name AS label
-                FROM team
-                WHERE is_active = 1
-                ORDER BY team_name
-            """
-            params = []
-
-            cursor.execute(query, params)
-            result = cursor.fetchall()
-
-            for item in result:
-                if item.get("label"):
-                    item["label"] = item["label"].title()
-
-            return api_response(200, "Dropdown data fetched successfully", result)
-
-        # -------------------- PROJECT CATEGORIES -------------------- #
-        if dropdown_type == "project categories":
-            query = """
-                SELECT project_category_id, project_category_name AS label
-                FROM project_category
-                WHERE is_active = 1
-                ORDER BY project_category_name
-            """
-            cursor.execute(query)
-            result = cursor.fetchall()
-
-            for item in result:
-                if item.get("label"):
-                    item["label"] = item["label"].title()
-
-            return api_response(200, "Dropdown data fetched successfully", result)
-
-        # -------------------- AFD -------------------- #
-        if dropdown_type == "afd":
-            query = """
-                SELECT afd_id, afd_name AS label
-                FROM afd
-                WHERE is_active = 1
-                ORDER BY afd_name
-            """
-            cursor.execute(query)
-            result = cursor.fetchall()
-
-            for item in result:
-                if item.get("label"):
-                    item["label"] = item["label"].title()
-
-            return api_response(200, "Dropdown data fetched successfully", result)
+        # -------------------- REFERENCE LISTS (cached) -------------------- #
+        if dropdown_type in REFERENCE_DROPDOWNS:
+            table, query = REFERENCE_DROPDOWNS[dropdown_type]
+
+            def load():
+                cursor.execute(query)
+                result = cursor.fetchall()
+                for item in result:
+                    if item.get("label"):
+                        item["label"] = item["label"].title()
+                return result
+
+            result, etag = get_reference_list(cursor, dropdown_type, table, load)
+            if etag_matches(request.headers.get("If-None-Match"), etag):
+                return "", 304, {"ETag": etag}
+
+            resp, status = api_response(200, "Dropdown data fetched successfully", result)
+            resp.headers["ETag"] = etag
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp, status
 
         # -------------------- ROLE-BASED USER LIST -------------------- #
         if dropdown_type in ROLE_BASED_USER_DROPDOWNS:
@@ -193,7 +148,7 @@ def get():
                 return api_response(200, "Dropdown data fetched successfully", result)
             elif dropdown_type == "agent":
 
-                logged_in_user_id = data.get("logged_in_user_id")
+                logged_in_user_id = current_user_id(data)
                 team_id = data.get("team_id")
                 clean_team = "REPLACE(REPLACE(REPLACE(REPLACE(u.team_id,'[',''),']',''), '\"',''),' ','')"
 
@@ -202,9 +157,6 @@ def get():
 
                 user_role = get_user_role(cursor, logged_in_user_id)
 
-                clean_pm = "REPLACE(REPLACE(REPLACE(REPLACE(u.project_manager_id,'[',''),']',''), '\"',''),' ','')"
-                clean_am = "REPLACE(REPLACE(REPLACE(REPLACE(u.asst_manager_id,'[',''),']',''), '\"',''),' ','')"
-                clean_qa = "REPLACE(REPLACE(REPLACE(REPLACE(u.qa_id,'[',''),']',''), '\"',''),' ','')"
 
                 # ---------------- ADMIN / SUPER ADMIN ---------------- #
                 if user_role in ["admin", "super admin"]:
@@ -228,7 +180,7 @@ def get():
 
                 # ---------------- PROJECT MANAGER ---------------- #
                 elif user_role in ["project manager", "manager"]:
-                    query = f"""
+                    query = """
                         SELECT u.user_id, u.user_name AS label
                         FROM tfs_user u
                         JOIN user_role r ON r.role_id = u.role_id
@@ -236,10 +188,12 @@ def get():
                         AND u.is_delete = 1
                         AND r.is_active = 1
                         AND LOWER(r.role_name) = 'agent'
-                        AND FIND_IN_SET(%s, {clean_pm})
                     """
 
-                    params = [logged_in_user_id]
+                    params = []
+                    query += " AND " + subordinate_scope_sql(
+                        "u.user_id", logged_in_user_id, params, relations=["project_manager"]
+                    )
 
                     if team_id:
                         query += f" AND FIND_IN_SET(%s, {clean_team})"
@@ -247,23 +201,9 @@ def get():
 
                     query += " ORDER BY u.user_name"
 
-                # ---------------- ASSISTANT MANAGER ---------------- #
-                elif user_role == "assistant manager":
-                    query = f"""
-                        SELECT u.user_id, u.user_name AS label
-                        FROM tfs_user u
-                        JOIN user_role r ON r.role_id = u.role_id
-                        WHERE u.is_active = 1
-                        AND u.is_delete = 1
-                        AND r.is_active = 1
-                        AND LOWER(r.role_name) = 'agent'
-                        AND FIND_IN_SET(%s, {clean_am})
-                        ORDER BY u.user_name
-                    """
-                    params = (logged_in_user_id,)
-
-                # ---------------- QA ---------------- #
-                elif user_role == "qa":
+                # ---------------- ASSISTANT MANAGER / QA ---------------- #
+                elif user_role in ["assistant manager", "qa"]:
+                    params = []
                     query = f"""
                         SELECT u.user_id, u.user_name AS label
                         FROM tfs_user u
@@ -272,10 +212,9 @@ def get():
                         AND u.is_delete = 1
                         AND r.is_active = 1
                         AND LOWER(r.role_name) = 'agent'
-                        AND FIND_IN_SET(%s, {clean_qa})
+                        AND {subordinate_scope_sql("u.user_id", logged_in_user_id, params, relations=[relation_for_role(user_role)])}
                         ORDER BY u.user_name
                     """
-                    params = (logged_in_user_id,)
 
                 else:
                     return api_response(403, "Not allowed")
@@ -313,7 +252,7 @@ def get():
         # -------------------- PROJECTS WITH TASKS -------------------- #
         if dropdown_type == "projects with tasks":
             user_id = data.get("user_id")
-            logged_in_user_id = data.get("logged_in_user_id")
+            logged_in_user_id = current_user_id(data)
             if user_id:
                 # Only return projects/tasks assigned to this user (regardless of role, including agent logic)
                 v = str(user_id)
@@ -1,4 +1,3 @@
-import os
 
 from flask import Blueprint, request
 from datetime import datetime
@@ -8,8 +7,8 @@ from config import get_db_connection, RESET_SECRET_KEY, RESET_TOKEN_TTL_SECONDS,
 from utils.response import api_response
 from utils.validators import validate_request, is_valid_email, is_valid_password
 
-# ✅ NEW: reusable email util (SMTP / provider)
-from utils.email_utils import send_email
+# mail goes through the outbox; a background sender delivers it
+from utils.email_outbox import queue_email, wake_email_sender
 
 # ✅ NEW: use same encryption as user.py
 from utils.security import encrypt_password
@@ -130,10 +129,6 @@ def _build_reset_email_html(reset_link: str) -> str:
 @password_reset_bp.route("/forgot-password", methods=["POST"])
 def forgot_password():
     data, err = validate_request(required=["user_email"])
-    print("HOST:", os.getenv("SMTP_HOST"))
-    print("USER:", os.getenv("SMTP_USER"))
-    print("PASS LENGTH:", len(os.getenv("SMTP_PASS")))
-    print("PASS REPR:", repr(os.getenv("SMTP_PASS")))
     if err:
         return err
 
@@ -167,13 +162,16 @@ def forgot_password():
         token = serializer.dumps(payload, salt=RESET_SALT)
         reset_link = f"{RESET_FRONTEND_URL}?token={token}"
 
-        # ✅ send email (does not change your current API response logic)
+        # queued, not sent inline: a slow relay no longer holds up the response
         try:
             subject = "Reset your password"
             html_body = _build_reset_email_html(reset_link)
-            send_email(user_email, subject, html_body)
+            queue_email(user_email, subject, html_body, cursor=cursor)
+            conn.commit()
+            wake_email_sender()
         except Exception as mail_err:
-            print(f"[forgot_password] Email send failed for {user_email}: {mail_err}")
+            conn.rollback()
+            print(f"[forgot_password] Email queue failed for {user_email}: {mail_err}")
 
         # ✅ Backend-only for now: return token/link so you can test (unchanged)
         response_data.update({"token": token, "reset_link": reset_link})
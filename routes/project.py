@@ -3,8 +3,12 @@
 from flask import Blueprint, request
 from utils.response import api_response
 from config import get_db_connection
-from utils.cloudinary_utils import upload_to_cloudinary, delete_from_cloudinary, FOLDER_PROJECT
+from utils.cloudinary_utils import upload_many, delete_many, FOLDER_PROJECT
+from utils.upload_queue import spool_files, enqueue_upload, discard_job, STATUS_PENDING, STATUS_UPLOADED
 from utils.file_utils import is_allowed_file
+from utils.role_context import get_user_role
+from utils.session_token import current_user_id
+from utils.tracker_context import invalidate_tracker_context
 import json
 import os
 from datetime import datetime
@@ -64,13 +68,11 @@ def _get_uploaded_files():
 
 
 def safe_delete_cloudinary_project_files(file_list):
-    """Silently delete a list of Cloudinary URLs/public_ids."""
-    for f in file_list or []:
-        try:
-            if f:
-                delete_from_cloudinary(f, resource_type="raw")
-        except Exception as e:
-            print("Cloudinary project delete failed:", e, "file=", f)
+    """Silently delete a list of Cloudinary URLs/public_ids (in parallel)."""
+    try:
+        delete_many(file_list, resource_type="raw")
+    except Exception as e:
+        print("Cloudinary project delete failed:", e, "files=", file_list)
 
 
 def parse_db_files(val):
@@ -126,18 +128,22 @@ def create_project():
 
     uploaded_files = _get_uploaded_files()
 
-    saved_urls = []
+    # files are spooled here and uploaded by the background queue, which
+    # writes project_pprt / project_pprt_status once all of them are on Cloudinary
+    upload_job = None
+    pprt_status = None
     try:
         total = len(uploaded_files)
+        spool = []
         for idx, fs in enumerate(uploaded_files, start=1):
             if not is_allowed_file(fs.filename):
                 raise ValueError(f"Unsupported file type: {fs.filename}")
             custom_name = build_project_filename(project_name, project_code, fs.filename, idx, total)
-            url, _ = upload_to_cloudinary(fs, FOLDER_PROJECT, display_name=custom_name, resource_type="raw")
-            saved_urls.append(url)
+            spool.append({"file": fs, "folder": FOLDER_PROJECT, "display_name": custom_name, "resource_type": "raw"})
+        if spool:
+            upload_job = spool_files(spool)
+            pprt_status = STATUS_PENDING
     except Exception as e:
-        # cleanup already-uploaded files
-        safe_delete_cloudinary_project_files(saved_urls)
         return api_response(400, f"File handling failed: {str(e)}")
 
     conn = get_db_connection()
@@ -157,12 +163,14 @@ def create_project():
                 project_team_id,
                 project_qa_id,
                 project_pprt,
+                project_pprt_status,
+                project_pprt_job_id,
                 project_category_id,
                 created_date,
                 updated_date,
                 is_active
             )
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,1)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,1)
             """,
             (
                 project_name,
@@ -172,22 +180,30 @@ def create_project():
                 json.dumps(asst_project_manager_id),
                 json.dumps(project_team_id),
                 json.dumps(project_qa_id),
-                json.dumps(saved_urls),   # ✅ store Cloudinary URLs
+                json.dumps([]),   # ✅ Cloudinary URLs are filled in by the upload queue
+                pprt_status,
+                upload_job["job_id"] if upload_job else None,
                 project_category_id,
                 now_str,
                 now_str,
             ),
         )
+        project_id = cursor.lastrowid
         conn.commit()
 
-        # ✅ Cloudinary URLs are already absolute
+        if upload_job:
+            enqueue_upload(upload_job, "project", project_id, as_json_list=True)
+            upload_job = None
+
         return api_response(201, "Project created successfully", {
-            "files": saved_urls
+            "project_id": project_id,
+            "files": [],
+            "project_pprt_status": pprt_status,
         })
 
     except Exception as e:
         conn.rollback()
-        safe_delete_cloudinary_project_files(saved_urls)
+        discard_job(upload_job)
         return api_response(500, f"Project creation failed: {str(e)}")
     finally:
         cursor.close()
@@ -246,6 +262,9 @@ def update_project():
             # delete old Cloudinary files + set DB to empty array
             old_files_to_delete = parse_db_files(existing.get("project_pprt"))
             update_values["project_pprt"] = json.dumps([])
+            # a create-time upload still in the queue must not write over this
+            update_values["project_pprt_status"] = None
+            update_values["project_pprt_job_id"] = None
 
         elif uploaded_files:
             # replace with new uploaded files (upload to Cloudinary first)
@@ -254,17 +273,21 @@ def update_project():
             use_project_name = update_values.get("project_name") or existing.get("project_name") or "PROJECT"
             use_project_code = update_values.get("project_code") or existing.get("project_code") or "CODE"
 
-            new_saved_urls = []
+            to_upload = []
             total = len(uploaded_files)
             for idx, fs in enumerate(uploaded_files, start=1):
                 if not is_allowed_file(fs.filename):
                     raise ValueError(f"Unsupported file type: {fs.filename}")
                 custom_name = build_project_filename(use_project_name, use_project_code, fs.filename, idx, total)
-                url, _ = upload_to_cloudinary(fs, FOLDER_PROJECT, display_name=custom_name, resource_type="raw")
-                new_saved_urls.append(url)
+                to_upload.append({"source": fs, "folder": FOLDER_PROJECT, "display_name": custom_name, "resource_type": "raw"})
+
+            # parallel; upload_many() deletes its own partial uploads if any file fails
+            new_saved_urls = [r["url"] for r in upload_many(to_upload)]
 
             new_saved_files = new_saved_urls
             update_values["project_pprt"] = json.dumps(new_saved_urls)
+            update_values["project_pprt_status"] = STATUS_UPLOADED
+            update_values["project_pprt_job_id"] = None
 
         # if nothing to update
         if not update_values:
@@ -280,6 +303,7 @@ def update_project():
         )
 
         conn.commit()
+        invalidate_tracker_context(project_id=project_id)
 
         # ✅ delete old Cloudinary files only AFTER commit
         if old_files_to_delete:
@@ -354,7 +378,7 @@ def delete_project():
 @project_bp.route("/list", methods=["POST"])
 def list_projects():
     data = request.get_json(silent=True) or {}
-    logged_in_user_id = data.get("logged_in_user_id")
+    logged_in_user_id = current_user_id(data)
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -362,14 +386,7 @@ def list_projects():
     try:
         role_name = None
         if logged_in_user_id:
-            cursor.execute("""
-                SELECT r.role_name FROM tfs_user u
-                JOIN user_role r ON r.role_id = u.role_id
-                WHERE u.user_id=%s AND u.is_active=1 AND u.is_delete=1
-            """, (logged_in_user_id,))
-            row = cursor.fetchone()
-            if row:
-                role_name = (row["role_name"] or "").strip().lower()
+            role_name = get_user_role(cursor, logged_in_user_id)
 
         # ✅ Role-based project filtering
         base_query = """
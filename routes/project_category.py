@@ -3,6 +3,7 @@
 from flask import Blueprint, request
 from utils.response import api_response
 from config import get_db_connection
+from utils.reference_data import bump_reference_version
 from datetime import datetime
 
 project_category_bp = Blueprint("project_category", __name__)
@@ -39,6 +40,7 @@ def create_project_category():
             """,
             (project_category_name, afd_id, now_str, now_str)
         )
+        bump_reference_version(cursor, "project_category")
         conn.commit()
 
         return api_response(201, "Project category created successfully", {
@@ -100,6 +102,7 @@ def update_project_category():
             """,
             (project_category_name, afd_id, updated_str, project_category_id)
         )
+        bump_reference_version(cursor, "project_category")
         conn.commit()
 
         return api_response(200, "Project category updated successfully")
@@ -138,6 +141,7 @@ def delete_project_category():
             "UPDATE project_category SET is_active = 0, updated_date = %s WHERE project_category_id = %s",
             (updated_str, project_category_id)
         )
+        bump_reference_version(cursor, "project_category")
         conn.commit()
 
         return api_response(200, "Project category deleted successfully")
@@ -1,10 +1,31 @@
+import mysql.connector
 from flask import Blueprint, request
+from mysql.connector import errorcode
 from config import get_db_connection
 from utils.response import api_response
+from utils.date_utils import month_year_to_yyyymm, normalize_month_year
+from utils.tracker_rollup import ACHIEVED_HOURS_SQL, TENURE_ACHIEVED_HOURS_SQL
+from utils.validators import parse_decimal
 from datetime import datetime
 
 project_monthly_tracker_bp = Blueprint("project_monthly_tracker",__name__)
 
+# tracker filters that /list can't answer from project_month_rollup
+ROLLUP_BYPASS_FILTERS = ("task_id", "user_id", "date_from", "date_to")
+
+# rows per multi-row INSERT in /add
+UPSERT_CHUNK_ROWS = 500
+
+# /add takes over a soft-deleted row on uq_pmt_project_yyyymm, never an active one;
+# is_active goes last so the IF()s above it still see the old value
+REVIVE_ON_DUPLICATE_SQL = """
+    ON DUPLICATE KEY UPDATE
+        month_year=IF(is_active=0, VALUES(month_year), month_year),
+        monthly_target=IF(is_active=0, VALUES(monthly_target), monthly_target),
+        created_date=IF(is_active=0, VALUES(created_date), created_date),
+        is_active=1
+"""
+
 def now_str() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -22,6 +43,61 @@ def project_exists(cursor, project_id: int) -> bool:
     return cursor.fetchone() is not None
 
 
+def _write_project_targets(cursor, candidates: list[dict], active_projects: set) -> tuple[list[dict], list[dict]]:
+    """
+    Inserts the new (project, month) targets and revives soft-deleted ones.
+    Returns (written candidates, skipped entries).
+
+    The existing rows are read FOR UPDATE, so an active target is never
+    overwritten; brand-new keys go in with a plain INSERT, which fails with a
+    duplicate-key error if a concurrent /add got there first (the caller
+    rolls back and calls again).
+    """
+    project_ids = sorted({c["project_id"] for c in candidates})
+    months = sorted({c["yyyymm"] for c in candidates})
+    cursor.execute(
+        f"""
+        SELECT project_id, yyyymm, is_active
+        FROM project_monthly_tracker
+        WHERE project_id IN ({','.join(['%s'] * len(project_ids))})
+          AND yyyymm IN ({','.join(['%s'] * len(months))})
+        FOR UPDATE
+        """,
+        tuple(project_ids + months)
+    )
+    existing = {(r["project_id"], r["yyyymm"]): r["is_active"] for r in cursor.fetchall()}
+
+    skipped, new_rows, revive_rows = [], [], []
+    for c in candidates:
+        key = (c["project_id"], c["yyyymm"])
+        if c["project_id"] not in active_projects:
+            skipped.append({"index": c["index"], "project_id": c["project_id"], "reason": "Project not found or inactive"})
+        elif existing.get(key):
+            skipped.append({"index": c["index"], "project_id": c["project_id"], "month_year": c["month_year"], "reason": "Already exists"})
+        else:
+            (new_rows if key not in existing else revive_rows).append(c)
+            existing[key] = 1  # a repeat later in the same payload is a duplicate too
+
+    for rows, on_duplicate in ((new_rows, ""), (revive_rows, REVIVE_ON_DUPLICATE_SQL)):
+        for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+            chunk = rows[start:start + UPSERT_CHUNK_ROWS]
+            params = []
+            for c in chunk:
+                params.extend([c["project_id"], c["month_year"], c["yyyymm"], c["monthly_target"], c["created_date"]])
+            cursor.execute(
+                f"""
+                INSERT INTO project_monthly_tracker
+                    (project_id, month_year, yyyymm, monthly_target, created_date, is_active)
+                VALUES {",".join(["(%s, %s, %s, %s, %s, 1)"] * len(chunk))}
+                {on_duplicate}
+                """,
+                tuple(params)
+            )
+
+    written = sorted(new_rows + revive_rows, key=lambda c: c["index"])
+    return written, skipped
+
+
 # -----------------------------
 # ADD (supports single or bulk insert)
 # -----------------------------
@@ -51,47 +127,65 @@ def add_project_monthly_tracker():
         err = validate_required(data, required_fields)
         if err:
             return api_response(400, f"Record {idx + 1}: {err}")
+        try:
+            data["monthly_target"] = parse_decimal(data["monthly_target"], "monthly_target")
+        except ValueError as e:
+            return api_response(400, f"Record {idx + 1}: {e}")
+        if not normalize_month_year(data["month_year"]):
+            return api_response(400, f"Record {idx + 1}: month_year must be like Jan2026")
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        inserted_ids = []
         skipped = []
+        candidates = [
+            {
+                "index": idx + 1,
+                "project_id": int(data["project_id"]),
+                "month_year": normalize_month_year(data["month_year"]),
+                "yyyymm": month_year_to_yyyymm(data["month_year"]),
+                "monthly_target": data["monthly_target"],
+                "created_date": str(data.get("created_date") or now_str()),
+            }
+            for idx, data in enumerate(records)
+        ]
+        project_ids = sorted({c["project_id"] for c in candidates})
+
+        # Projects that exist (one IN-query)
+        cursor.execute(
+            f"SELECT project_id FROM project WHERE project_id IN ({','.join(['%s'] * len(project_ids))}) AND is_active=1",
+            tuple(project_ids)
+        )
+        active_projects = {r["project_id"] for r in cursor.fetchall()}
+
+        # insert new / revive soft-deleted (project + month) rows
+        for attempt in (1, 2):
+            try:
+                written, db_skipped = _write_project_targets(cursor, candidates, active_projects)
+                break
+            except mysql.connector.IntegrityError as e:
+                # a key that was new here got inserted by a concurrent /add first: look again
+                if e.errno != errorcode.ER_DUP_ENTRY or attempt == 2:
+                    raise
+                conn.rollback()
+        skipped.extend(db_skipped)
 
-        for idx, data in enumerate(records):
-            project_id = int(data["project_id"])
-            month_year = str(data["month_year"]).strip()
-            monthly_target = str(data["monthly_target"]).strip()
-            created_date = str(data.get("created_date") or now_str())
-
-            # Check project exists
-            if not project_exists(cursor, project_id):
-                skipped.append({"index": idx + 1, "project_id": project_id, "reason": "Project not found or inactive"})
-                continue
-
-            # Check for duplicate (project + month)
+        inserted_ids = []
+        if written:
+            ins_projects = sorted({c["project_id"] for c in written})
+            ins_months = sorted({c["yyyymm"] for c in written})
             cursor.execute(
-                """
-                SELECT project_monthly_tracker_id
+                f"""
+                SELECT project_monthly_tracker_id, project_id, yyyymm
                 FROM project_monthly_tracker
-                WHERE project_id=%s AND month_year=%s AND is_active=1
+                WHERE project_id IN ({','.join(['%s'] * len(ins_projects))})
+                  AND yyyymm IN ({','.join(['%s'] * len(ins_months))})
                 """,
-                (project_id, month_year)
+                tuple(ins_projects + ins_months)
             )
-            if cursor.fetchone():
-                skipped.append({"index": idx + 1, "project_id": project_id, "month_year": month_year, "reason": "Already exists"})
-                continue
-
-            cursor.execute(
-                """
-                INSERT INTO project_monthly_tracker
-                    (project_id, month_year, monthly_target, created_date, is_active)
-                VALUES (%s, %s, %s, %s, 1)
-                """,
-                (project_id, month_year, monthly_target, created_date)
-            )
-            inserted_ids.append(cursor.lastrowid)
+            ids = {(r["project_id"], r["yyyymm"]): r["project_monthly_tracker_id"] for r in cursor.fetchall()}
+            inserted_ids = [ids.get((c["project_id"], c["yyyymm"])) for c in written]
 
         conn.commit()
 
@@ -138,13 +232,24 @@ def update_project_monthly_tracker():
         updates.append("project_id=%s")
         params.append(int(data["project_id"]))
 
+    new_yyyymm = None
     if "month_year" in data and data["month_year"] not in [None, ""]:
+        month_year = normalize_month_year(data["month_year"])
+        if not month_year:
+            return api_response(400, "month_year must be like Jan2026")
+        new_yyyymm = month_year_to_yyyymm(month_year)
         updates.append("month_year=%s")
-        params.append(str(data["month_year"]).strip())
+        params.append(month_year)
+        updates.append("yyyymm=%s")
+        params.append(new_yyyymm)
 
     if "monthly_target" in data and data["monthly_target"] not in [None, ""]:
+        try:
+            monthly_target = parse_decimal(data["monthly_target"], "monthly_target")
+        except ValueError as e:
+            return api_response(400, str(e))
         updates.append("monthly_target=%s")
-        params.append(str(data["monthly_target"]).strip())
+        params.append(monthly_target)
 
     if "created_date" in data and data["created_date"] not in [None, ""]:
         updates.append("created_date=%s")
@@ -164,7 +269,7 @@ def update_project_monthly_tracker():
     try:
         cursor.execute(
             """
-            SELECT project_id, month_year
+            SELECT project_id, yyyymm
             FROM project_monthly_tracker
             WHERE project_monthly_tracker_id=%s
             """,
@@ -179,20 +284,19 @@ def update_project_monthly_tracker():
             if not project_exists(cursor, int(data["project_id"])):
                 return api_response(404, "Project not found or inactive")
 
-        # prevent duplicate active rows for final (project_id, month_year)
-        if ("project_id" in data and data["project_id"] not in [None, ""]) or ("month_year" in data and data["month_year"] not in [None, ""]):
+        # prevent duplicates for final (project_id, month); uq_pmt_project_yyyymm counts soft-deleted rows too
+        if ("project_id" in data and data["project_id"] not in [None, ""]) or new_yyyymm is not None:
             final_project_id = int(data["project_id"]) if ("project_id" in data and data["project_id"] not in [None, ""]) else int(current["project_id"])
-            final_month_year = str(data["month_year"]).strip() if ("month_year" in data and data["month_year"] not in [None, ""]) else str(current["month_year"])
+            final_yyyymm = new_yyyymm if new_yyyymm is not None else current["yyyymm"]
 
             cursor.execute(
                 """
                 SELECT project_monthly_tracker_id
                 FROM project_monthly_tracker
-                WHERE project_id=%s AND month_year=%s
-                  AND is_active=1
+                WHERE project_id=%s AND yyyymm=%s
                   AND project_monthly_tracker_id<>%s
                 """,
-                (final_project_id, final_month_year, pm_id)
+                (final_project_id, final_yyyymm, pm_id)
             )
             if cursor.fetchone():
                 return api_response(409, "Monthly target for this project and month already exists")
@@ -284,9 +388,13 @@ def list_project_monthly_tracker():
         where_pmt += " AND pmt.project_id=%s"
         pmt_params.append(int(data["project_id"]))
 
+    month_yyyymm = None
     if data.get("month_year"):
-        where_pmt += " AND pmt.month_year=%s"
-        pmt_params.append(str(data["month_year"]).strip())
+        month_yyyymm = month_year_to_yyyymm(data["month_year"])
+        if month_yyyymm is None:
+            return api_response(400, "month_year must be like Jan2026")
+        where_pmt += " AND pmt.yyyymm=%s"
+        pmt_params.append(month_yyyymm)
 
     if data.get("project_name"):
         where_pmt += " AND p.project_name LIKE %s"
@@ -302,9 +410,9 @@ def list_project_monthly_tracker():
         where_twt += " AND twt.project_id=%s"
         twt_params.append(int(data["project_id"]))
 
-    if data.get("month_year"):
-        where_twt += " AND DATE_FORMAT(twt.date_time, '%b%Y')=%s"
-        twt_params.append(str(data["month_year"]).strip())
+    if month_yyyymm is not None:
+        where_twt += " AND twt.yyyymm=%s"
+        twt_params.append(month_yyyymm)
 
     if data.get("task_id"):
         where_twt += " AND twt.task_id=%s"
@@ -315,16 +423,44 @@ def list_project_monthly_tracker():
         twt_params.append(int(data["user_id"]))
 
     if data.get("date_from"):
-        where_twt += " AND twt.date_time >= %s"
+        where_twt += " AND twt.date_time_dt >= %s"
         twt_params.append(str(data["date_from"]).strip() + " 00:00:00")
 
     if data.get("date_to"):
-        where_twt += " AND twt.date_time <= %s"
+        where_twt += " AND twt.date_time_dt <= %s"
         twt_params.append(str(data["date_to"]).strip() + " 23:59:59")
 
     limit = int(data.get("limit") or 200)
     offset = int(data.get("offset") or 0)
 
+    # project_month_rollup holds exactly the unfiltered per-month sums; any
+    # row-level tracker filter needs the raw table
+    if any(data.get(k) for k in ROLLUP_BYPASS_FILTERS):
+        achieved_join = f"""
+            LEFT JOIN (
+                SELECT
+                    twt.project_id,
+                    twt.yyyymm,
+                    -- existing logic
+                    {ACHIEVED_HOURS_SQL} AS achieved_hours,
+                    -- NEW: sum based on billable_hours
+                    {TENURE_ACHIEVED_HOURS_SQL} AS tenure_achieved_hours
+                FROM task_work_tracker twt
+                {where_twt}
+                GROUP BY twt.project_id, twt.yyyymm
+            ) twt_sum
+                ON twt_sum.project_id = pmt.project_id
+               AND twt_sum.yyyymm = pmt.yyyymm
+        """
+        join_params = twt_params
+    else:
+        achieved_join = """
+            LEFT JOIN project_month_rollup twt_sum
+                ON twt_sum.project_id = pmt.project_id
+               AND twt_sum.yyyymm = pmt.yyyymm
+        """
+        join_params = []
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
@@ -340,14 +476,14 @@ def list_project_monthly_tracker():
                 -- Original achieved/pending based on actual_billable_hours
                 COALESCE(twt_sum.achieved_hours, 0) AS achieved_hours,
                 (
-                    COALESCE(CAST(pmt.monthly_target AS DECIMAL(12,2)), 0)
+                    COALESCE(pmt.monthly_target, 0)
                     - COALESCE(twt_sum.achieved_hours, 0)
                 ) AS pending_hours,
 
                 -- NEW: achieved/pending based on billable_hours
                 COALESCE(twt_sum.tenure_achieved_hours, 0) AS tenure_achieved_hours,
                 (
-                    COALESCE(CAST(pmt.monthly_target AS DECIMAL(12,2)), 0)
+                    COALESCE(pmt.monthly_target, 0)
                     - COALESCE(twt_sum.tenure_achieved_hours, 0)
                 ) AS tenure_pending_hours,
 
@@ -356,39 +492,14 @@ def list_project_monthly_tracker():
             FROM project_monthly_tracker pmt
             LEFT JOIN project p ON p.project_id = pmt.project_id
 
-            LEFT JOIN (
-                SELECT
-                    twt.project_id,
-                    DATE_FORMAT(twt.date_time, '%b%Y') AS month_year,
-                    -- existing logic
-                    SUM(
-                        CASE
-                            WHEN twt.actual_billable_hours REGEXP '^[0-9]+(\\.[0-9]+)?$'
-                            THEN CAST(twt.actual_billable_hours AS DECIMAL(12,2))
-                            ELSE 0
-                        END
-                    ) AS achieved_hours,
-                    -- NEW: sum based on billable_hours
-                    SUM(
-                        CASE
-                            WHEN twt.billable_hours REGEXP '^[0-9]+(\\.[0-9]+)?$'
-                            THEN CAST(twt.billable_hours AS DECIMAL(12,2))
-                            ELSE 0
-                        END
-                    ) AS tenure_achieved_hours
-                FROM task_work_tracker twt
-                {where_twt}
-                GROUP BY twt.project_id, DATE_FORMAT(twt.date_time, '%b%Y')
-            ) twt_sum
-                ON twt_sum.project_id = pmt.project_id
-               AND twt_sum.month_year = pmt.month_year
+            {achieved_join}
 
             {where_pmt}
             ORDER BY pmt.project_monthly_tracker_id DESC
             LIMIT %s OFFSET %s
         """
 
-        cursor.execute(query, tuple(twt_params + pmt_params + [limit, offset]))
+        cursor.execute(query, tuple(join_params + pmt_params + [limit, offset]))
         rows = cursor.fetchall()
 
         count_query = f"""
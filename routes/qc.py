@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from config import get_db_connection
+from utils.daily_hours import DAILY_ASSIGNED_HOURS, run_assign_daily_hours
 
 qc_bp = Blueprint("qc", __name__)
 
@@ -15,60 +16,29 @@ def response(status, message, data=None, code=200):
 @qc_bp.route("/assign-daily-hours", methods=["POST"])
 def assign_daily_hours():
     """
-    Scheduled job endpoint.
-    Assigns 9 hours to all active agents for the current day.
+    Assigns the daily hours to all active agents for today (overwriting), or
+    fills a past range {"date_from": "YYYY-MM-DD", "date_to": "YYYY-MM-DD"}
+    (only days without assigned_hours unless "overwrite": true).
+    The scheduler runs the same code in-process (scheduler.py).
     """
-    now = datetime.now()
-    today_str = now.strftime("%Y-%m-%d")
-    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
+    data = request.get_json(silent=True) or {}
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    date_from = (data.get("date_from") or "").strip() or today_str
+    date_to = (data.get("date_to") or "").strip() or date_from
+    overwrite = bool(data.get("overwrite")) if data.get("date_from") else True
 
-    conn = None
-    cur = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
-
-        # 1. Get all active agent user_ids
-        cur.execute("""
-            SELECT u.user_id
-            FROM tfs_user u
-            JOIN user_role ur ON u.role_id = ur.role_id
-            WHERE ur.role_name = 'agent' AND u.is_active = 1 AND u.is_delete = 1
-        """)
-        agent_rows = cur.fetchall()
-        agent_ids = [row['user_id'] for row in agent_rows]
-
-        if not agent_ids:
-            return response(True, "No active agents found to assign hours.", None, 200)
-
-        # 2. Bulk insert/update
-        # Use ON DUPLICATE KEY UPDATE to be idempotent
-        sql = f"""
-            INSERT INTO temp_qc (user_id, assigned_hours, {QC_DATE_COL}, updated_date)
-            VALUES (%s, 9, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                assigned_hours = VALUES(assigned_hours),
-                updated_date = VALUES(updated_date)
-        """
-        
-        # Prepare data for executemany
-        data_to_insert = [(agent_id, today_str, now_str) for agent_id in agent_ids]
-        
-        cur.executemany(sql, data_to_insert)
-        
-        conn.commit()
-
-        return response(True, f"Successfully assigned 9 hours to {cur.rowcount} agents for {today_str}.", None, 200)
-
+        affected = run_assign_daily_hours(date_from, date_to, overwrite=overwrite, lock_timeout=10)
+    except ValueError as e:
+        return response(False, str(e), None, 400)
     except Exception as e:
-        if conn:
-            conn.rollback()
         return response(False, f"An error occurred: {str(e)}", None, 500)
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+
+    if affected is None:
+        return response(False, "Daily hour assignment is already running, try again shortly.", None, 409)
+
+    period = date_from if date_from == date_to else f"{date_from} to {date_to}"
+    return response(True, f"Successfully assigned {DAILY_ASSIGNED_HOURS:g} hours ({affected} row(s) affected) for {period}.", None, 200)
 
 
 # ---------------------------
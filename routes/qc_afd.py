@@ -3,6 +3,7 @@
 from flask import Blueprint, request
 from config import get_db_connection
 from utils.response import api_response
+from utils.reference_data import bump_reference_version
 from datetime import datetime
 
 qc_afd_bp = Blueprint("qc_afd", __name__)
@@ -56,6 +57,7 @@ def add_qc_afd():
                 VALUES (%s, %s, %s)
             """, (master_afd_name.strip(), created_at, updated_at))
             afd_id = cursor.lastrowid
+            bump_reference_version(cursor, "afd")
 
         inserted_ids = []
 
@@ -189,6 +191,7 @@ def update_full_qc_afd():
                 "UPDATE afd SET afd_name=%s, updated_at=%s WHERE afd_id=%s",
                 (master_name, datetime.now(), master_id)
             )
+            bump_reference_version(cursor, "afd")
 
         # --------------------
         # Update Categories
@@ -323,6 +326,7 @@ def delete_qc_afd():
                 f"DELETE FROM afd WHERE afd_id IN ({format_strings})",
                 tuple(afd_ids)
             )
+            bump_reference_version(cursor, "afd")
 
         # ----------------------------------
         # DELETE MULTIPLE CATEGORY / SUBCATEGORY
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from config import get_db_connection
 from datetime import datetime
-from utils.cloudinary_utils import upload_to_cloudinary, delete_from_cloudinary
+from utils.upload_queue import spool_files, enqueue_upload, discard_job, STATUS_PENDING
 
 qc_audit_bp = Blueprint("qc_audit", __name__)
 
@@ -24,10 +24,11 @@ def create_qc_audit():
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
+    upload_job = None
 
     try:
 
-        qc_file_url = None
+        qc_file_status = None
         uploaded = request.files.get("qc_checked_file")
 
         if uploaded and uploaded.filename:
@@ -36,37 +37,48 @@ def create_qc_audit():
 
             custom_name = f"qc_checked_file_{qc_record_id}_{timestamp}.{extension}"
 
-            qc_file_url, _ = upload_to_cloudinary(
-                uploaded,
-                FOLDER_QC_AUDIT,
-                display_name=custom_name ,
-                resource_type="raw"
-            )
+            # uploaded to Cloudinary in the background (utils/upload_queue.py)
+            upload_job = spool_files([{
+                "file": uploaded,
+                "folder": FOLDER_QC_AUDIT,
+                "display_name": custom_name,
+                "resource_type": "raw"
+            }])
+            qc_file_status = STATUS_PENDING
 
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         cursor.execute("""
         INSERT INTO qc_audit
-        (qc_record_id,qc_score,qc_checked_file,error_notes,created_date,updated_date)
-        VALUES(%s,%s,%s,%s,%s,%s)
+        (qc_record_id,qc_score,qc_checked_file,qc_checked_file_status,qc_checked_file_job_id,error_notes,created_date,updated_date)
+        VALUES(%s,%s,%s,%s,%s,%s,%s,%s)
         """,(
             qc_record_id,
             qc_score,
-            qc_file_url,
+            None,
+            qc_file_status,
+            upload_job["job_id"] if upload_job else None,
             error_notes,
             now,
             now
         ))
+        audit_id = cursor.lastrowid
 
         conn.commit()
 
+        if upload_job:
+            enqueue_upload(upload_job, "qc_audit", audit_id)
+            upload_job = None
+
         return jsonify({
             "status":201,
-            "message":"QC audit created"
+            "message":"QC audit created",
+            "data":{"qc_checked_file_status": qc_file_status}
         }),201
 
     except Exception as e:
         conn.rollback()
+        discard_job(upload_job)
         return jsonify({
             "status":500,
             "message":str(e)
@@ -1,7 +1,8 @@
 from flask import Blueprint, request
 from utils.response import api_response
 from config import get_db_connection
-from utils.cloudinary_utils import upload_to_cloudinary, FOLDER_QC_REWORK
+from utils.cloudinary_utils import FOLDER_QC_REWORK
+from utils.upload_queue import spool_files, enqueue_upload, discard_job, STATUS_PENDING
 from datetime import datetime
 
 qc_rework_bp = Blueprint("qc_rework", __name__)
@@ -20,6 +21,7 @@ def add_rework_file():
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
+    upload_job = None
 
     try:
         # Get project and user details to build a descriptive filename
@@ -54,39 +56,51 @@ def add_rework_file():
 
         custom_filename = f"{clean_project_code}_{clean_task_name}_{clean_user_name}_{date_part}_{time_part}_rework.{ext}"
 
-        # Upload to Cloudinary
+        # Spool locally; the upload queue pushes it to Cloudinary and writes
+        # rework_file_path / rework_file_status when done
         try:
-            cloudinary_url, _ = upload_to_cloudinary(
-                uploaded_file,
-                FOLDER_QC_REWORK,
-                display_name=custom_filename,
-                resource_type="raw"
-            )
+            upload_job = spool_files([{
+                "file": uploaded_file,
+                "folder": FOLDER_QC_REWORK,
+                "display_name": custom_filename,
+                "resource_type": "raw",
+            }])
         except Exception as e:
-            return api_response(500, f"File upload to Cloudinary failed: {str(e)}")
+            return api_response(500, f"File upload failed: {str(e)}")
 
-        # Update the database with the Cloudinary URL
+        # Mark the rework row pending; the previous file stays visible until the new one lands
         query = """
             UPDATE qc_rework_tracker
-            SET rework_file_path = %s,
+            SET rework_file_status = %s,
+                rework_file_job_id = %s,
                 timestamp = %s
             WHERE tracker_id = %s
         """
         
         updated_at = now.strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute(query, (cloudinary_url, updated_at, tracker_id))
-        conn.commit()
+        cursor.execute(query, (STATUS_PENDING, upload_job["job_id"], updated_at, tracker_id))
 
         if cursor.rowcount == 0:
             # This case might happen if the tracker_id exists but is not in qc_rework_tracker yet.
             # Depending on business logic, you might want to INSERT instead.
             # For now, we assume the record is pre-existing.
+            conn.rollback()
+            discard_job(upload_job)
             return api_response(404, "No rework record found for this tracker_id. Please ensure it is marked for rework first.")
 
-        return api_response(200, "Rework file uploaded and path updated successfully", {"rework_file_path": cloudinary_url})
+        conn.commit()
+        enqueue_upload(upload_job, "qc_rework_tracker", tracker_id)
+        upload_job = None
+
+        # same 200 as before; the URL lands in rework_file_path once rework_file_status is 'uploaded'
+        return api_response(200, "Rework file uploaded and path updated successfully", {
+            "rework_file_path": None,
+            "rework_file_status": STATUS_PENDING,
+        })
 
     except Exception as e:
         conn.rollback()
+        discard_job(upload_job)
         return api_response(500, f"Failed to update rework file path: {str(e)}")
 
     finally:
@@ -5,6 +5,7 @@ from utils.response import api_response
 from config import get_db_connection
 from utils.cloudinary_utils import upload_to_cloudinary, delete_from_cloudinary, FOLDER_TASK
 from utils.file_utils import is_allowed_file
+from utils.tracker_context import invalidate_tracker_context
 from datetime import datetime
 import json
 import os
@@ -288,6 +289,7 @@ def update_task():
         )
 
         conn.commit()
+        invalidate_tracker_context(task_id=task_id)
 
         # ✅ delete old Cloudinary file only after commit
         try:
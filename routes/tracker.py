@@ -2,8 +2,22 @@ from flask import Blueprint, request
 from config import get_db_connection
 from utils.response import api_response
 from utils.api_log_utils import log_api_call
-from utils.cloudinary_utils import upload_to_cloudinary, delete_from_cloudinary, FOLDER_TRACKER
+from utils.cloudinary_utils import delete_from_cloudinary, FOLDER_TRACKER
+from utils.upload_queue import spool_files, enqueue_upload, discard_job, STATUS_PENDING
+from utils.date_utils import month_year_bounds, month_year_to_yyyymm, normalize_month_year
+from utils.hierarchy import subordinate_scope_sql
+from utils.role_context import get_role_context, get_user_role
+from utils.session_token import current_user_id
+from utils.tracker_rollup import (
+    ACTIVE_TRACKER_SQL,
+    add_tracker_contribution,
+    remove_tracker_contribution,
+)
+from utils.tracker_context import load_tracker_context
+from utils.pagination import encode_cursor, decode_cursor, parse_limit
+from utils.export_utils import export_format, iter_query_rows, stream_export
 from datetime import datetime, timedelta
+import json
 import re
 import os
 
@@ -22,43 +36,6 @@ def calculate_targets(base_target, user_tenure):
     return actual_target, tenure_target
 
 
-def normalize_month_year(month_year: str) -> str:
-    month_year = (month_year or "").strip()
-    if not month_year:
-        return ""
-
-    s = month_year.lower()
-    month_abbr = s[:3].capitalize()
-    year_part = s[3:]
-    return f"{month_abbr}{year_part}"
-
-
-def get_role_context(cursor, user_id: int) -> dict:
-    cursor.execute(
-        """
-        SELECT
-            u.role_id AS user_role_id,
-            r.role_name AS user_role_name,
-            (
-                SELECT ur2.role_id
-                FROM user_role ur2
-                WHERE LOWER(TRIM(ur2.role_name)) = 'agent'
-                LIMIT 1
-            ) AS agent_role_id
-        FROM tfs_user u
-        JOIN user_role r ON r.role_id = u.role_id
-        WHERE u.user_id=%s AND u.is_active=1 AND u.is_delete=1
-        """,
-        (int(user_id),),
-    )
-    row = cursor.fetchone() or {}
-    return {
-        "user_role_id": row.get("user_role_id"),
-        "user_role_name": (row.get("user_role_name") or "").strip().lower(),
-        "agent_role_id": row.get("agent_role_id"),
-    }
-
-
 def cleaned_csv_col(col_sql: str) -> str:
     return f"REPLACE(REPLACE(REPLACE({col_sql}, '[', ''), ']', ''), ' ', '')"
 
@@ -105,6 +82,17 @@ def safe_delete_cloudinary_tracker(url_or_public_id: str) -> None:
     except Exception as e:
         print(f"Cloudinary tracker delete failed: {e} | ref={url_or_public_id}")
 
+def shift_adjusted_now(shift: str) -> str:
+    """
+    Tracker date when the client sends none: now, except a NIGHT shift
+    submitting between 00:00 and 09:00 still books on the previous day.
+    """
+    now = datetime.now()
+    if shift == "NIGHT" and now.hour < 9:
+        now = now - timedelta(days=1)
+    return now.strftime("%Y-%m-%d %H:%M:%S")
+
+
 # ------------------------
 # ADD TRACKER  (multipart + custom filename)
 # ------------------------
@@ -128,14 +116,15 @@ def add_tracker():
     print(now_str)
 
     billable_hours = production / tenure_target if tenure_target else 0
+    upload_job = None
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # --- validate task + get task_target
-        cursor.execute("SELECT task_target, task_name FROM task WHERE task_id=%s", (task_id,))
-        task_row = cursor.fetchone()
+        # --- task (validated, task_target) + project_code + user_name in one query
+        ctx = load_tracker_context(cursor, task_id, project_id, user_id)
+        task_row = ctx["task"]
         if not task_row:
             return api_response(404, "Task not found")
         
@@ -145,29 +134,23 @@ def add_tracker():
         actual_target = task_row["task_target"]
         actual_billable_hours = production / actual_target if actual_target else 0
         task_name = task_row.get("task_name") or "Task"
+        project_code = (ctx["project"] or {}).get("project_code") or "PROJECT"
+        user_name = (ctx["user"] or {}).get("user_name") or "USER"
 
-        # --- get project_code
-        cursor.execute("SELECT project_code FROM project WHERE project_id=%s", (project_id,))
-        proj_row = cursor.fetchone() or {}
-        project_code = proj_row.get("project_code") or "PROJECT"
-
-        # --- get user_name
-        cursor.execute("SELECT user_name FROM tfs_user WHERE user_id=%s", (user_id,))
-        usr_row = cursor.fetchone() or {}
-        user_name = usr_row.get("user_name") or "USER"
-
-        # ✅ file upload to Cloudinary
+        # ✅ file is spooled locally; the upload queue pushes it to Cloudinary
+        # and fills tracker_file / tracker_file_status after the response
         tracker_file = None
+        tracker_file_status = None
         uploaded = request.files.get("tracker_file")
         if uploaded and uploaded.filename:
             try:
                 custom_name = build_tracker_filename(project_code, task_name, user_name, uploaded.filename)
                 # public_id includes extension (raw resource)
-                cloudinary_url, _ = upload_to_cloudinary(
-                    uploaded, FOLDER_TRACKER, display_name=custom_name, resource_type="raw"
-                )
-                print(f"Cloudinary upload successful: {cloudinary_url}")
-                tracker_file = cloudinary_url
+                upload_job = spool_files([{
+                    "file": uploaded, "folder": FOLDER_TRACKER,
+                    "display_name": custom_name, "resource_type": "raw",
+                }])
+                tracker_file_status = STATUS_PENDING
             except ValueError as e:
                 return api_response(400, str(e))
             except Exception as e:
@@ -176,14 +159,7 @@ def add_tracker():
         # now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         if now_str is None:
             print("Received date:", now_str)
-            now = datetime.now()
-            # If NIGHT shift and time is between 00:00–09:00
-            if shift == "NIGHT" and now.hour < 9:
-                adjusted_datetime = now - timedelta(days=1)
-            else:
-                adjusted_datetime = now
-                
-            now_str = adjusted_datetime.strftime("%Y-%m-%d %H:%M:%S")
+            now_str = shift_adjusted_now(shift)
         
         tracker_note = form.get("tracker_note")  # optional, can be null
 
@@ -191,26 +167,39 @@ def add_tracker():
             """
             INSERT INTO task_work_tracker
             (project_id, task_id, user_id, production, actual_target, tenure_target, billable_hours, actual_billable_hours,
-             tracker_file, tracker_note, shift, is_active, date_time, updated_date)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+             tracker_file, tracker_file_status, tracker_file_job_id, tracker_note, shift, is_active, date_time, date_time_dt, yyyymm, updated_date)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,CAST(%s AS DATETIME),EXTRACT(YEAR_MONTH FROM CAST(%s AS DATETIME)),%s)
             """,
             (
                 project_id, task_id, user_id, production, actual_target, tenure_target,
-                billable_hours, actual_billable_hours, tracker_file, tracker_note, shift, 1, now_str, now_str
+                billable_hours, actual_billable_hours, tracker_file, tracker_file_status,
+                upload_job["job_id"] if upload_job else None, tracker_note, shift, 1,
+                now_str, now_str, now_str, now_str
             ),
         )
-        conn.commit()
         tracker_id = cursor.lastrowid
 
+        # rollups move in the same transaction as the tracker row
+        add_tracker_contribution(cursor, tracker_id)
+        conn.commit()
+
+        if upload_job:
+            enqueue_upload(upload_job, "task_work_tracker", tracker_id)
+            upload_job = None
+
         device_id = form.get("device_id")
         device_type = form.get("device_type")
         api_call_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_api_call("add_tracker", user_id, device_id, device_type, api_call_time)
 
-        return api_response(201, "Tracker added successfully", {"tracker_id": tracker_id})
+        return api_response(201, "Tracker added successfully", {
+            "tracker_id": tracker_id,
+            "tracker_file_status": tracker_file_status,
+        })
 
     except Exception as e:
         conn.rollback()
+        discard_job(upload_job)
         return api_response(500, f"Failed to add tracker: {str(e)}")
 
     finally:
@@ -218,6 +207,243 @@ def add_tracker():
         conn.close()
 
 
+# ------------------------
+# ADD TRACKERS IN BULK (end-of-shift submission)
+# ------------------------
+TRACKER_BULK_MAX_ROWS = int(os.getenv("TRACKER_BULK_MAX_ROWS", "500"))
+
+# one multi-row INSERT of BULK_INSERT_ROW_SQL tuples; the date goes through
+# CAST(... AS DATETIME) exactly as in /add, so both accept the same inputs
+BULK_INSERT_SQL = """
+    INSERT INTO task_work_tracker
+    (project_id, task_id, user_id, production, actual_target, tenure_target, billable_hours, actual_billable_hours,
+     tracker_file, tracker_file_status, tracker_file_job_id, tracker_note, shift, is_active, date_time, date_time_dt, yyyymm, updated_date)
+    VALUES {rows}
+"""
+BULK_INSERT_ROW_SQL = "(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,CAST(%s AS DATETIME),EXTRACT(YEAR_MONTH FROM CAST(%s AS DATETIME)),%s)"
+
+
+def _parse_bulk_rows():
+    """
+    rows come either as a JSON body {"rows": [...]} or, when files are
+    attached, as multipart with a JSON string in the "rows" field; the file
+    for row N (1-based, as in the results) is the part named tracker_file_N.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True) or {}
+        return payload.get("rows"), payload
+    form = request.form
+    try:
+        rows = json.loads(form.get("rows") or "null")
+    except ValueError:
+        rows = None
+    return rows, form
+
+
+def _fetch_by_ids(cursor, sql: str, ids: set, key: str) -> dict:
+    if not ids:
+        return {}
+    marks = ",".join(["%s"] * len(ids))
+    cursor.execute(sql.format(marks=marks), tuple(ids))
+    return {r[key]: r for r in (cursor.fetchall() or [])}
+
+
+def _same_tracker_row(db: dict, row: dict) -> bool:
+    """Does the row read back by id carry what /add_bulk wrote for `row`?"""
+    return (
+        (db["project_id"], db["task_id"], db["user_id"], db["shift"], int(db["is_active"] or 0))
+        == (row["project_id"], row["task_id"], row["user_id"], row["shift"], 1)
+        and str(db["date_time"]) == str(row["date_time"])
+        and str(db["tracker_note"] or "") == str(row["tracker_note"] or "")
+        and db["tracker_file_job_id"] == row["tracker_file_job_id"]
+        and abs(float(db["production"] or 0) - row["production"]) < 0.01
+    )
+
+
+@tracker_bp.route("/add_bulk", methods=["POST"])
+def add_trackers_bulk():
+    """
+    Same per-row rules as /add (required fields, DAY/NIGHT shift, task must
+    exist, billable_hours = production / tenure_target, actual_billable_hours
+    = production / task_target, NIGHT rows without a date before 09:00 book
+    on the previous day, date / updated_date stored as sent and CAST by
+    MySQL). Valid rows are inserted in one transaction; every
+    row gets a result entry with its tracker_id or the reason it was skipped.
+    """
+    rows, meta = _parse_bulk_rows()
+    if not isinstance(rows, list) or not rows:
+        return api_response(400, "rows must be a non-empty list")
+    if len(rows) > TRACKER_BULK_MAX_ROWS:
+        return api_response(400, f"At most {TRACKER_BULK_MAX_ROWS} rows per request")
+
+    required_fields = ["project_id", "task_id", "user_id", "production", "tenure_target"]
+    results = [None] * len(rows)
+    parsed = []
+
+    # ---- per-row validation (no DB yet)
+    for idx, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[idx] = {"index": idx + 1, "status": "skipped", "reason": "row must be an object"}
+            continue
+        missing = next((f for f in required_fields if row.get(f) in (None, "")), None)
+        if missing:
+            results[idx] = {"index": idx + 1, "status": "skipped", "reason": f"{missing} is required"}
+            continue
+        shift = str(row.get("shift") or "DAY").upper()
+        if shift not in ["DAY", "NIGHT"]:
+            results[idx] = {"index": idx + 1, "status": "skipped", "reason": "Shift must be DAY or NIGHT"}
+            continue
+        try:
+            item = {
+                "index": idx + 1,
+                "project_id": int(row["project_id"]),
+                "task_id": int(row["task_id"]),
+                "user_id": int(row["user_id"]),
+                "production": float(row["production"]),
+                "tenure_target": float(row["tenure_target"]),
+                "shift": shift,
+                "tracker_note": row.get("tracker_note"),
+                "date_time": row.get("date") or shift_adjusted_now(shift),
+            }
+        except (TypeError, ValueError):
+            results[idx] = {"index": idx + 1, "status": "skipped", "reason": "Invalid number"}
+            continue
+        parsed.append(item)
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    upload_jobs = {}
+
+    try:
+        # ---- metadata: one IN-query per table instead of three lookups per row
+        tasks = _fetch_by_ids(
+            cursor, "SELECT task_id, task_target, task_name FROM task WHERE task_id IN ({marks})",
+            {r["task_id"] for r in parsed}, "task_id",
+        )
+        projects = _fetch_by_ids(
+            cursor, "SELECT project_id, project_code FROM project WHERE project_id IN ({marks})",
+            {r["project_id"] for r in parsed}, "project_id",
+        )
+        users = _fetch_by_ids(
+            cursor, "SELECT user_id, user_name FROM tfs_user WHERE user_id IN ({marks})",
+            {r["user_id"] for r in parsed}, "user_id",
+        )
+
+        to_insert = []
+        for item in parsed:
+            task_row = tasks.get(item["task_id"])
+            if not task_row:
+                results[item["index"] - 1] = {"index": item["index"], "status": "skipped", "reason": "Task not found"}
+                continue
+
+            actual_target = task_row["task_target"]
+            production, tenure_target = item["production"], item["tenure_target"]
+            item["actual_target"] = actual_target
+            item["billable_hours"] = production / tenure_target if tenure_target else 0
+            item["actual_billable_hours"] = production / actual_target if actual_target else 0
+            item["tracker_file"] = None
+            item["tracker_file_status"] = None
+
+            uploaded = request.files.get(f"tracker_file_{item['index']}")
+            if uploaded and uploaded.filename:
+                try:
+                    custom_name = build_tracker_filename(
+                        (projects.get(item["project_id"]) or {}).get("project_code") or "PROJECT",
+                        task_row.get("task_name") or "Task",
+                        (users.get(item["user_id"]) or {}).get("user_name") or "USER",
+                        uploaded.filename,
+                    )
+                    upload_jobs[item["index"]] = spool_files([{
+                        "file": uploaded, "folder": FOLDER_TRACKER,
+                        "display_name": custom_name, "resource_type": "raw",
+                    }])
+                    item["tracker_file_status"] = STATUS_PENDING
+                except ValueError as e:
+                    results[item["index"] - 1] = {"index": item["index"], "status": "skipped", "reason": str(e)}
+                    continue
+            to_insert.append(item)
+
+        if to_insert:
+            params = []
+            for r in to_insert:
+                r["tracker_file_job_id"] = upload_jobs[r["index"]]["job_id"] if r["index"] in upload_jobs else None
+                params.extend([
+                    r["project_id"], r["task_id"], r["user_id"], r["production"], r["actual_target"],
+                    r["tenure_target"], r["billable_hours"], r["actual_billable_hours"], r["tracker_file"],
+                    r["tracker_file_status"], r["tracker_file_job_id"], r["tracker_note"], r["shift"], 1,
+                    r["date_time"], r["date_time"], r["date_time"], r["date_time"],  # updated_date as in /add
+                ])
+            cursor.execute(
+                BULK_INSERT_SQL.format(rows=",".join([BULK_INSERT_ROW_SQL] * len(to_insert))),
+                tuple(params),
+            )
+
+            # one multi-row INSERT is a "simple insert": InnoDB gives it
+            # consecutive ids from lastrowid in every innodb_autoinc_lock_mode
+            # (see table changes List.txt). Read them back and check each row
+            # against everything this request wrote, so a mismatch can't go
+            # unnoticed.
+            first_id = int(cursor.lastrowid)
+            cursor.execute(
+                """
+                SELECT tracker_id, project_id, task_id, user_id, production, tracker_file_job_id,
+                       tracker_note, shift, date_time, is_active
+                FROM task_work_tracker
+                WHERE tracker_id >= %s AND tracker_id < %s
+                ORDER BY tracker_id
+                """,
+                (first_id, first_id + len(to_insert)),
+            )
+            inserted = cursor.fetchall() or []
+            if len(inserted) != len(to_insert) or not all(_same_tracker_row(db, r) for db, r in zip(inserted, to_insert)):
+                raise RuntimeError(
+                    "could not match the inserted trackers to their ids (innodb_autoinc_lock_mode?); nothing was saved"
+                )
+
+            add_tracker_contribution(cursor, *(db["tracker_id"] for db in inserted))
+            for db, r in zip(inserted, to_insert):
+                r["tracker_id"] = db["tracker_id"]
+                results[r["index"] - 1] = {
+                    "index": r["index"],
+                    "status": "inserted",
+                    "tracker_id": db["tracker_id"],
+                    "tracker_file_status": r["tracker_file_status"],
+                }
+
+        conn.commit()
+
+        for r in to_insert:
+            job = upload_jobs.pop(r["index"], None)
+            if job:
+                enqueue_upload(job, "task_work_tracker", r["tracker_id"])
+
+        inserted_count = len(to_insert)
+        log_api_call(
+            "add_tracker_bulk",
+            current_user_id(meta) or (to_insert[0]["user_id"] if to_insert else None),
+            meta.get("device_id"), meta.get("device_type"),
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+        if not inserted_count:
+            return api_response(400, "No trackers added", {"results": results})
+        return api_response(201, f"{inserted_count} tracker(s) added", {
+            "inserted_count": inserted_count,
+            "skipped_count": len(rows) - inserted_count,
+            "results": results,
+        })
+
+    except Exception as e:
+        conn.rollback()
+        for job in upload_jobs.values():
+            discard_job(job)
+        return api_response(500, f"Failed to add trackers: {str(e)}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
 # ------------------------
 # UPDATE TRACKER (multipart + optional file replace + custom filename)
 # ------------------------
@@ -231,11 +457,13 @@ def update_tracker():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    # for rollback safety if DB update fails after saving file
-    new_file_saved = None
+    # spooled replacement file, dropped again if the DB update fails
+    upload_job = None
 
     try:
-        cursor.execute("SELECT * FROM task_work_tracker WHERE tracker_id=%s", (tracker_id,))
+        # locked until commit: the rollup deltas below assume nobody else
+        # changes this row in between
+        cursor.execute("SELECT * FROM task_work_tracker WHERE tracker_id=%s FOR UPDATE", (tracker_id,))
         tracker = cursor.fetchone()
         if not tracker:
             return api_response(404, "Tracker not found")
@@ -248,9 +476,9 @@ def update_tracker():
         date_time = form.get("date_time", tracker["date_time"])
         print(date_time)
 
-        # tenure + user_name
-        cursor.execute("SELECT user_tenure, user_name FROM tfs_user WHERE user_id=%s", (tracker["user_id"],))
-        user_row = cursor.fetchone()
+        # tenure + user_name, plus project_code / task_name for the file name
+        ctx = load_tracker_context(cursor, tracker["task_id"], tracker["project_id"], tracker["user_id"])
+        user_row = ctx["user"]
         if not user_row:
             return api_response(404, "User not found")
 
@@ -259,6 +487,8 @@ def update_tracker():
         actual_billable_hours = production / actual_target if actual_target else 0
 
         tracker_file = old_file
+        tracker_file_status = tracker.get("tracker_file_status")
+        tracker_file_job_id = tracker.get("tracker_file_job_id")
         uploaded = request.files.get("tracker_file")
         
         shift = form.get("shift", tracker.get("shift", "DAY")).upper()
@@ -267,31 +497,20 @@ def update_tracker():
 
         # ✅ Replace file only if new file provided
         if uploaded and uploaded.filename:
-            # project_code
-            cursor.execute("SELECT project_code FROM project WHERE project_id=%s", (tracker["project_id"],))
-            proj = cursor.fetchone() or {}
-            project_code = proj.get("project_code") or "PROJECT"
-
-            # task_name
-            cursor.execute("SELECT task_name FROM task WHERE task_id=%s", (tracker["task_id"],))
-            trow = cursor.fetchone() or {}
-            task_name = trow.get("task_name") or "TASK"
-
+            project_code = (ctx["project"] or {}).get("project_code") or "PROJECT"
+            task_name = (ctx["task"] or {}).get("task_name") or "TASK"
             user_name = user_row.get("user_name") or "USER"
 
             custom_filename = build_tracker_filename(project_code, task_name, user_name, uploaded.filename)
 
-            # ✅ Upload new file to Cloudinary first
-            cloudinary_url, _ = upload_to_cloudinary(
-                uploaded, FOLDER_TRACKER, display_name=custom_filename, resource_type="raw"
-            )
-            new_file_saved = cloudinary_url
-
-            # ✅ Delete old Cloudinary file (only if it differs)
-            if old_file and old_file != cloudinary_url:
-                safe_delete_cloudinary_tracker(old_file)
-
-            tracker_file = cloudinary_url
+            # ✅ Spool the new file; the upload queue swaps tracker_file and
+            # deletes the old Cloudinary file once the upload succeeded
+            upload_job = spool_files([{
+                "file": uploaded, "folder": FOLDER_TRACKER,
+                "display_name": custom_filename, "resource_type": "raw",
+            }])
+            tracker_file_status = STATUS_PENDING
+            tracker_file_job_id = upload_job["job_id"]
 
         # updated_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         now = datetime.now()
@@ -305,6 +524,8 @@ def update_tracker():
         
         tracker_note = form.get("tracker_note", tracker.get("tracker_note"))  # optional, keep existing if not provided
 
+        # take the row out of its current daily bucket / project month before it changes
+        remove_tracker_contribution(cursor, tracker_id)
         cursor.execute(
             """
             UPDATE task_work_tracker
@@ -314,10 +535,14 @@ def update_tracker():
                 billable_hours=(%s / NULLIF(%s, 0)),
                 actual_billable_hours=%s,
                 tracker_file=%s,
+                tracker_file_status=%s,
+                tracker_file_job_id=%s,
                 tracker_note=%s,
                 shift=%s,
                 updated_date=%s,
-                date_time=%s
+                date_time=%s,
+                date_time_dt=CAST(%s AS DATETIME),
+                yyyymm=EXTRACT(YEAR_MONTH FROM CAST(%s AS DATETIME))
             WHERE tracker_id=%s
             """,
             (
@@ -328,36 +553,42 @@ def update_tracker():
                 tenure_target,
                 actual_billable_hours,
                 tracker_file,
+                tracker_file_status,
+                tracker_file_job_id,
                 tracker_note,
                 shift,
                 updated_date,
                 date_time,
+                date_time,
+                date_time,
                 tracker_id,
             ),
         )
+
+        # shift/date may have changed: add the row back under its new bucket / month
+        add_tracker_contribution(cursor, tracker_id)
         conn.commit()
 
-        # if DB commit succeeded, clear rollback marker
-        new_file_saved = None
+        if upload_job:
+            enqueue_upload(upload_job, "task_work_tracker", int(tracker_id), delete_after=[old_file])
+            upload_job = None
 
         device_id = form.get("device_id")
         device_type = form.get("device_type")
         api_call_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_api_call("update_tracker", tracker["user_id"], device_id, device_type, api_call_time)
 
-        return api_response(200, "Tracker updated successfully")
+        return api_response(200, "Tracker updated successfully", {"tracker_file_status": tracker_file_status})
 
     except ValueError as e:
         conn.rollback()
-        # rollback: if Cloudinary upload succeeded but DB failed, delete newly uploaded file
-        if new_file_saved:
-            safe_delete_cloudinary_tracker(new_file_saved)
+        # rollback: DB failed, drop the spooled replacement file
+        discard_job(upload_job)
         return api_response(400, str(e))
 
     except Exception as e:
         conn.rollback()
-        if new_file_saved:
-            safe_delete_cloudinary_tracker(new_file_saved)
+        discard_job(upload_job)
         return api_response(500, f"Failed to update tracker: {str(e)}")
 
     finally:
@@ -380,7 +611,7 @@ def delete_tracker():
 
     try:
         cursor.execute(
-            "SELECT tracker_id, user_id, tracker_file FROM task_work_tracker WHERE tracker_id=%s",
+            "SELECT tracker_id, user_id, project_id, shift, date_time, date_time_dt, tracker_file FROM task_work_tracker WHERE tracker_id=%s FOR UPDATE",
             (tracker_id,),
         )
         tracker = cursor.fetchone()
@@ -388,6 +619,7 @@ def delete_tracker():
             return api_response(404, "Tracker not found")
 
         # ✅ soft delete DB
+        remove_tracker_contribution(cursor, tracker_id)
         cursor.execute(
             "UPDATE task_work_tracker SET is_active = 0 WHERE tracker_id = %s",
             (tracker_id,),
@@ -415,6 +647,176 @@ def delete_tracker():
 # ------------------------
 # VIEW TRACKERS (with totals)
 # ------------------------
+
+# FROM clause shared by /view, its totals and /export.
+# One assistant manager per user (lowest id) so the join never multiplies rows.
+TRACKER_VIEW_FROM = """
+    FROM task_work_tracker twt
+    LEFT JOIN tfs_user u ON u.user_id = twt.user_id
+    LEFT JOIN (
+        SELECT user_id, MIN(supervisor_id) AS supervisor_id
+        FROM user_supervisor
+        WHERE relation = 'asst_manager'
+        GROUP BY user_id
+    ) am_map ON am_map.user_id = twt.user_id
+    LEFT JOIN tfs_user am ON am.user_id = am_map.supervisor_id
+    LEFT JOIN project p ON p.project_id = twt.project_id
+    LEFT JOIN task tk ON tk.task_id = twt.task_id
+    LEFT JOIN team t ON u.team_id = t.team_id
+"""
+
+TRACKER_VIEW_DEFAULT_SELECT = """
+    twt.*, u.user_name, u.user_email,
+    am.user_id AS assistant_manager_id, am.user_name AS assistant_manager_name, am.user_email AS assistant_manager_email,
+    p.project_id, p.project_name, p.project_category_id,
+    tk.task_name, t.team_name,
+    (twt.production / NULLIF(twt.tenure_target, 0)) AS billable_hours
+"""
+
+# `fields` projection whitelist: response key -> SQL expression
+TRACKER_VIEW_FIELDS = {
+    "tracker_id": "twt.tracker_id",
+    "project_id": "twt.project_id",
+    "task_id": "twt.task_id",
+    "user_id": "twt.user_id",
+    "production": "twt.production",
+    "actual_target": "twt.actual_target",
+    "tenure_target": "twt.tenure_target",
+    "billable_hours": "(twt.production / NULLIF(twt.tenure_target, 0))",
+    "actual_billable_hours": "twt.actual_billable_hours",
+    "tracker_file": "twt.tracker_file",
+    "tracker_note": "twt.tracker_note",
+    "shift": "twt.shift",
+    "is_active": "twt.is_active",
+    "qc_status": "twt.qc_status",
+    "date_time": "twt.date_time",
+    "date_time_dt": "twt.date_time_dt",
+    "updated_date": "twt.updated_date",
+    "user_name": "u.user_name",
+    "user_email": "u.user_email",
+    "assistant_manager_id": "am.user_id",
+    "assistant_manager_name": "am.user_name",
+    "assistant_manager_email": "am.user_email",
+    "project_name": "p.project_name",
+    "project_category_id": "p.project_category_id",
+    "task_name": "tk.task_name",
+    "team_name": "t.team_name",
+}
+
+# always selected with a projection (keyset cursor + month summary need them)
+TRACKER_VIEW_KEY_FIELDS = ("tracker_id", "user_id", "date_time_dt")
+
+
+def resolve_view_month_year(cursor, data: dict) -> str:
+    """Smart month detection: date_to/date_from month, else month_year, else current month."""
+    month_year = None
+    if data.get("date_from") or data.get("date_to"):
+        try:
+            ref_date = data.get("date_to") or data.get("date_from")
+            dt_obj = datetime.strptime(str(ref_date)[:10], "%Y-%m-%d")
+            month_year = dt_obj.strftime("%b%Y")
+        except Exception:
+            month_year = None
+
+    if not month_year:
+        month_year = normalize_month_year(data.get("month_year"))
+
+    if not month_year:
+        cursor.execute("SELECT DATE_FORMAT(CURDATE(), '%b%Y') AS m")
+        month_year = normalize_month_year((cursor.fetchone() or {}).get("m") or "")
+
+    return month_year
+
+
+def build_tracker_view_where(data: dict, logged_in_user_id, role_name: str, month_year: str) -> tuple[str, list]:
+    """WHERE clause + params for /view and /export (expects TRACKER_VIEW_FROM aliases)."""
+    params = []
+    where = "WHERE twt.is_active != 0"
+
+    # Month filter (range on indexed date_time_dt)
+    bounds = month_year_bounds(month_year)
+    if bounds:
+        where += " AND twt.date_time_dt >= %s AND twt.date_time_dt < %s"
+        params.extend(bounds)
+
+    # Dynamic filters
+    if data.get("team_id"):
+        where += " AND u.team_id=%s"
+        params.append(data["team_id"])
+    if data.get("user_id"):
+        user_ids_filter = data["user_id"]
+
+        # if single value convert to list
+        if not isinstance(user_ids_filter, list):
+            user_ids_filter = [user_ids_filter]
+
+        placeholders = ",".join(["%s"] * len(user_ids_filter))
+        where += f" AND twt.user_id IN ({placeholders})"
+
+        params.extend(user_ids_filter)
+    elif role_name not in ("admin", "super admin"):
+        # self + anyone reporting to the logged-in user (PM / AM / QA)
+        where += " AND " + subordinate_scope_sql(
+            "twt.user_id", int(logged_in_user_id), params,
+            include_self=True, active_only=True,
+        )
+    if data.get("project_id"):
+        where += " AND twt.project_id=%s"
+        params.append(data["project_id"])
+    if data.get("task_id"):
+        where += " AND twt.task_id=%s"
+        params.append(data["task_id"])
+    if data.get("shift"):
+        where += " AND twt.shift=%s"
+        params.append(data["shift"].upper())
+    if data.get("date_from"):
+        df = data["date_from"]
+        if len(df) == 10: df += " 00:00:00"
+        where += " AND twt.date_time_dt >= %s"
+        params.append(df)
+    if data.get("date_to"):
+        dt_ = data["date_to"]
+        if len(dt_) == 10: dt_ += " 23:59:59"
+        where += " AND twt.date_time_dt <= %s"
+        params.append(dt_)
+    if data.get("is_active") is not None:
+        where += " AND twt.is_active=%s"
+        params.append(data["is_active"])
+    if data.get("qc_pending") is not None:
+        where += " AND twt.qc_status = %s"
+        params.append(data["qc_pending"])
+
+        # ensure tracker file exists
+        where += " AND twt.tracker_file IS NOT NULL AND twt.tracker_file != ''"
+
+    return where, params
+
+
+def tracker_view_select(fields) -> str:
+    """SELECT list for /view: everything by default, or a whitelisted projection."""
+    if not fields:
+        return TRACKER_VIEW_DEFAULT_SELECT
+
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",")]
+
+    unknown = [f for f in fields if f and f not in TRACKER_VIEW_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    wanted = list(TRACKER_VIEW_KEY_FIELDS) + [f for f in fields if f and f not in TRACKER_VIEW_KEY_FIELDS]
+    return ", ".join(f"{TRACKER_VIEW_FIELDS[f]} AS {f}" for f in wanted)
+
+
+def normalize_tracker_file(path):
+    if not path:
+        return None
+    # If mistakenly prefixed with python path
+    if not path.startswith("http") and "https://" in path:
+        return path[path.index("https://"):]
+    return path
+
+
 @tracker_bp.route("/view", methods=["POST"])
 def view_trackers():
     print("====== INSIDE /tracker/view ======")
@@ -424,169 +826,102 @@ def view_trackers():
     cursor = conn.cursor(dictionary=True)
 
     try:
-        params = []
-
-        logged_in_user_id = data.get("logged_in_user_id")
+        logged_in_user_id = current_user_id(data)
         if not logged_in_user_id:
             return api_response(400, "logged_in_user_id is required")
 
-        # ---------- Smart Month Detection ----------
-        month_year = None
-        if data.get("date_from") or data.get("date_to"):
-            try:
-                ref_date = data.get("date_to") or data.get("date_from")
-                dt_obj = datetime.strptime(str(ref_date)[:10], "%Y-%m-%d")
-                month_year = dt_obj.strftime("%b%Y")
-            except Exception:
-                month_year = None
+        # Optional keyset pagination: send `limit`, then pass back `next_cursor` as `cursor`
+        paginate = data.get("limit") not in (None, "") or bool(data.get("cursor"))
+        try:
+            limit = parse_limit(data.get("limit"))
+            select_sql = tracker_view_select(data.get("fields"))
+        except ValueError as e:
+            return api_response(400, str(e))
 
-        if not month_year:
-            month_year = normalize_month_year(data.get("month_year"))
+        after = None
+        if data.get("cursor"):
+            after = decode_cursor(data["cursor"])
+            if not after or "dt" not in after or "id" not in after:
+                return api_response(400, "Invalid cursor")
 
-        if not month_year:
-            cursor.execute("SELECT DATE_FORMAT(CURDATE(), '%b%Y') AS m")
-            month_year = normalize_month_year((cursor.fetchone() or {}).get("m") or "")
+        month_year = resolve_view_month_year(cursor, data)
 
         ctx = get_role_context(cursor, int(logged_in_user_id))
         role_name = ctx["user_role_name"]
 
+        where, params = build_tracker_view_where(data, logged_in_user_id, role_name, month_year)
+
         # -----------------------------
-        # Main Tracker Query
+        # Main Tracker Query (one page, or everything when not paginating)
         # -----------------------------
-        query = """
-        SELECT 
-            twt.*, u.user_name, u.user_email,
-            am.user_id AS assistant_manager_id, am.user_name AS assistant_manager_name, am.user_email AS assistant_manager_email,
-            p.project_id, p.project_name, p.project_category_id,
-            tk.task_name, t.team_name,
-            (twt.production / NULLIF(twt.tenure_target, 0)) AS billable_hours
-        FROM task_work_tracker twt
-        LEFT JOIN tfs_user u ON u.user_id = twt.user_id
-        LEFT JOIN tfs_user am ON (u.asst_manager_id = am.user_id OR JSON_CONTAINS(u.asst_manager_id, CONCAT('[', am.user_id, ']')))
-        LEFT JOIN project p ON p.project_id = twt.project_id
-        LEFT JOIN task tk ON tk.task_id = twt.task_id
-        LEFT JOIN team t ON u.team_id = t.team_id
-        WHERE twt.is_active != 0
-        """
-
-        # Month filter
-        try:
-            dt = datetime.strptime(month_year, "%b%Y")
-            query += " AND YEAR(CAST(twt.date_time AS DATETIME)) = %s AND MONTH(CAST(twt.date_time AS DATETIME)) = %s"
-            params.extend([dt.year, dt.month])
-        except Exception:
-            pass
-
-        # Dynamic filters
-        if data.get("team_id"):
-            query += " AND u.team_id=%s"
-            params.append(data["team_id"])
-        if data.get("user_id"):
-            user_ids_filter = data["user_id"]
-
-            # if single value convert to list
-            if not isinstance(user_ids_filter, list):
-                user_ids_filter = [user_ids_filter]
-
-            placeholders = ",".join(["%s"] * len(user_ids_filter))
-            query += f" AND twt.user_id IN ({placeholders})"
-
-            params.extend(user_ids_filter)
-        elif role_name not in ("admin", "super admin"):
-            manager_id_str = str(logged_in_user_id)
-            query += """
-                AND twt.user_id IN (
-                    SELECT tu.user_id
-                    FROM tfs_user tu
-                    WHERE tu.is_active = 1 AND tu.is_delete = 1
-                    AND (
-                        tu.project_manager_id=%s OR tu.asst_manager_id=%s OR tu.qa_id=%s
-                        OR tu.user_id=%s
-                        OR JSON_CONTAINS(tu.project_manager_id, JSON_ARRAY(%s))
-                        OR JSON_CONTAINS(tu.asst_manager_id, JSON_ARRAY(%s))
-                        OR JSON_CONTAINS(tu.qa_id, JSON_ARRAY(%s))
-                    )
-                )
-            """
-            params.extend([manager_id_str]*7)
-        if data.get("project_id"):
-            query += " AND twt.project_id=%s"
-            params.append(data["project_id"])
-        if data.get("task_id"):
-            query += " AND twt.task_id=%s"
-            params.append(data["task_id"])
-        if data.get("shift"):
-            query += " AND twt.shift=%s"
-            params.append(data["shift"].upper())
-        if data.get("date_from"):
-            df = data["date_from"]
-            if len(df) == 10: df += " 00:00:00"
-            query += " AND CAST(twt.date_time AS DATETIME) >= %s"
-            params.append(df)   
-        if data.get("date_to"):
-            dt_ = data["date_to"]
-            if len(dt_) == 10: dt_ += " 23:59:59"
-            query += " AND CAST(twt.date_time AS DATETIME) <= %s"
-            params.append(dt_)
-        if data.get("is_active") is not None:
-            query += " AND twt.is_active=%s"
-            params.append(data["is_active"])
-        if data.get("qc_pending") is not None:
-            query += " AND twt.qc_status = %s"
-            params.append(data["qc_pending"])
-
-            # ensure tracker file exists
-            query += " AND twt.tracker_file IS NOT NULL AND twt.tracker_file != ''"
-
-        query += " ORDER BY CAST(twt.date_time AS DATETIME) DESC"
-        cursor.execute(query, tuple(params))
+        query = f"SELECT {select_sql} {TRACKER_VIEW_FROM} {where}"
+        page_params = list(params)
+        if after:
+            query += " AND (twt.date_time_dt < %s OR (twt.date_time_dt = %s AND twt.tracker_id < %s))"
+            page_params.extend([after["dt"], after["dt"], int(after["id"])])
+        query += " ORDER BY twt.date_time_dt DESC, twt.tracker_id DESC"
+        if paginate:
+            query += " LIMIT %s"
+            page_params.append(limit + 1)
+
+        cursor.execute(query, tuple(page_params))
         trackers = cursor.fetchall()
 
+        has_more = paginate and len(trackers) > limit
+        if has_more:
+            trackers = trackers[:limit]
+        next_cursor = None
+        if has_more:
+            last = trackers[-1]
+            next_cursor = encode_cursor({"dt": str(last["date_time_dt"]), "id": int(last["tracker_id"])})
+
         # Normalize tracker_file
         for t in trackers:
-            file_path = t.get("tracker_file")
-
-            if not file_path:
-                t["tracker_file"] = None
-                continue
-
-            # If already cloudinary URL, keep as is
-            if file_path.startswith("http"):
-                t["tracker_file"] = file_path
+            if "tracker_file" in t:
+                t["tracker_file"] = normalize_tracker_file(t.get("tracker_file"))
 
-            # If mistakenly prefixed with python path
-            elif "https://" in file_path:
-                t["tracker_file"] = file_path[file_path.index("https://"):]
+        # -----------------------------
+        # Totals (SQL aggregate over the whole filter, not just this page)
+        # -----------------------------
+        cursor.execute(
+            f"""
+            SELECT
+                COUNT(*) AS total_count,
+                COALESCE(SUM(twt.tenure_target), 0) AS total_tenure_target,
+                COALESCE(SUM(twt.production / NULLIF(twt.tenure_target, 0)), 0) AS total_billable_hours,
+                COALESCE(SUM(twt.production), 0) AS total_production,
+                COUNT(DISTINCT twt.user_id) AS total_active_agents
+            {TRACKER_VIEW_FROM} {where}
+            """,
+            tuple(params),
+        )
+        agg = cursor.fetchone() or {}
 
-            else:
-                t["tracker_file"] = file_path
+        cursor.execute(f"SELECT DISTINCT twt.user_id {TRACKER_VIEW_FROM} {where}", tuple(params))
+        user_ids = sorted({r["user_id"] for r in (cursor.fetchall() or []) if r.get("user_id")})
 
-                # -----------------------------
+        # -----------------------------
         # Month Summary
         # -----------------------------
         month_summary = []
-        user_ids = sorted({t["user_id"] for t in trackers if t.get("user_id")})
         if user_ids:
             in_ph = ",".join(["%s"]*len(user_ids))
             summary_query = f"""
                 SELECT u.user_id, u.user_name, u.user_email, m.mon AS month_year,
                        umt.user_monthly_tracker_id,
-                       COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)),0) AS monthly_target,
+                       COALESCE(umt.monthly_target,0) AS monthly_target,
                        COALESCE(umt.extra_assigned_hours,0) AS extra_assigned_hours,
-                       (COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)),0)+COALESCE(umt.extra_assigned_hours,0)) AS monthly_total_target
+                       (COALESCE(umt.monthly_target,0)+COALESCE(umt.extra_assigned_hours,0)) AS monthly_total_target
                 FROM tfs_user u
-                CROSS JOIN (SELECT %s AS mon) m
+                CROSS JOIN (SELECT %s AS mon, %s AS yyyymm) m
                 LEFT JOIN user_monthly_tracker umt
-                    ON umt.user_id=u.user_id AND umt.is_active=1 AND umt.month_year=m.mon
+                    ON umt.user_id=u.user_id AND umt.is_active=1 AND umt.yyyymm=m.yyyymm
                 WHERE u.user_id IN ({in_ph})
             """
-            summary_params = [month_year] + user_ids
+            summary_params = [month_year, month_year_to_yyyymm(month_year)] + user_ids
             cursor.execute(summary_query, tuple(summary_params))
             month_summary = cursor.fetchall()
 
-        # -----------------------------
-        # Totals
-        # -----------------------------
         # Total assigned hours from temp_qc
         assigned_query = "SELECT COALESCE(SUM(assigned_hours),0) AS total_assigned FROM temp_qc WHERE 1=1"
         assigned_params = []
@@ -603,17 +938,16 @@ def view_trackers():
         cursor.execute(assigned_query, tuple(assigned_params))
         total_assigned_hours = float((cursor.fetchone() or {}).get("total_assigned") or 0)
 
-        
         totals = {
-            "total_tenure_target": round(sum(float(t.get("tenure_target") or 0) for t in trackers), 2),
+            "total_tenure_target": round(float(agg.get("total_tenure_target") or 0), 2),
 
-            "total_billable_hours": round(sum(float(t.get("billable_hours") or 0) for t in trackers), 2),
+            "total_billable_hours": round(float(agg.get("total_billable_hours") or 0), 2),
 
-            "total_production": round(sum(float(t.get("production") or 0) for t in trackers), 2),
+            "total_production": round(float(agg.get("total_production") or 0), 2),
 
             "total_assigned_hours": round(total_assigned_hours, 2),
 
-            "total_active_agents": len(set(t["user_id"] for t in trackers if t.get("user_id")))
+            "total_active_agents": int(agg.get("total_active_agents") or 0)
         }
 
         # -----------------------------
@@ -621,17 +955,19 @@ def view_trackers():
         # -----------------------------
         log_api_call("view_trackers", logged_in_user_id, data.get("device_id"), data.get("device_type"), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
-        return api_response(
-            200,
-            "Trackers fetched successfully",
-            {
-                "count": len(trackers),
-                "month_year": month_year,
-                "trackers": trackers,
-                "month_summary": month_summary,
-                "totals": totals
-            }
-        )
+        result = {
+            "count": len(trackers),
+            "total_count": int(agg.get("total_count") or 0),
+            "month_year": month_year,
+            "trackers": trackers,
+            "month_summary": month_summary,
+            "totals": totals
+        }
+        if paginate:
+            result["next_cursor"] = next_cursor
+            result["has_more"] = has_more
+
+        return api_response(200, "Trackers fetched successfully", result)
 
     except Exception as e:
         return api_response(500, f"Failed to fetch trackers: {str(e)}")
@@ -641,21 +977,52 @@ def view_trackers():
         conn.close()
 
 
-def normalize_month_year(val):
-    """
-    Accepts: Jan2026 / jan2026 / JAN2026
-    Returns: Jan2026
-    """
-    if not val:
-        return None
-    s = str(val).strip()
-    if not s:
-        return None
+# ------------------------
+# EXPORT TRACKERS (streamed NDJSON / CSV, same filters as /view)
+# ------------------------
+@tracker_bp.route("/export", methods=["POST"])
+def export_trackers():
+    data = request.get_json() or {}
+
+    logged_in_user_id = current_user_id(data)
+    if not logged_in_user_id:
+        return api_response(400, "logged_in_user_id is required")
+
+    fmt = export_format(data.get("format"))
+    if not fmt:
+        return api_response(400, "format must be ndjson or csv")
+
     try:
-        dt = datetime.strptime(s.title(), "%b%Y")
-        return dt.strftime("%b%Y")
-    except Exception:
-        return None
+        select_sql = tracker_view_select(data.get("fields"))
+    except ValueError as e:
+        return api_response(400, str(e))
+
+    # resolve role/month on a short-lived connection; the stream opens its own
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        month_year = resolve_view_month_year(cursor, data)
+        role_name = get_role_context(cursor, int(logged_in_user_id))["user_role_name"]
+    except Exception as e:
+        return api_response(500, f"Failed to export trackers: {str(e)}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    where, params = build_tracker_view_where(data, logged_in_user_id, role_name, month_year)
+    query = (
+        f"SELECT {select_sql} {TRACKER_VIEW_FROM} {where}"
+        " ORDER BY twt.date_time_dt DESC, twt.tracker_id DESC"
+    )
+
+    def _row(t):
+        if "tracker_file" in t:
+            t["tracker_file"] = normalize_tracker_file(t.get("tracker_file"))
+        return t
+
+    log_api_call("export_trackers", logged_in_user_id, data.get("device_id"), data.get("device_type"), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    return stream_export(iter_query_rows(query, params), fmt, f"trackers_{month_year}", transform=_row)
 
 
 def cleaned_csv_col(col_name: str) -> str:
@@ -666,6 +1033,38 @@ def cleaned_csv_col(col_name: str) -> str:
     return f"REPLACE(REPLACE(REPLACE({col_name}, '[', ''), ']', ''), ' ', '')"
 
 
+def daily_rollup_covers(data: dict) -> bool:
+    """
+    True when /view_daily can be answered from tracker_daily_rollup, i.e. no
+    filter needs per-tracker columns (project/task/is_active) and any
+    date_from/date_to is a whole day.
+    """
+    if data.get("project_id") or data.get("task_id") or data.get("is_active") is not None:
+        return False
+
+    for key, whole_day_time in (("date_from", "00:00:00"), ("date_to", "23:59:59")):
+        val = str(data.get(key) or "").strip()
+        if len(val) > 10 and val[10:].strip() != whole_day_time:
+            return False
+    return True
+
+
+def month_cutoff_date(month_year: str):
+    """
+    Last day counted as "worked so far" for a MonYYYY month:
+    today for the current month, month end for past months, and the day
+    before the month starts for future months (so nothing counts yet).
+    """
+    start = datetime.strptime(month_year, "%b%Y").date()
+    today = datetime.now().date()
+    if (today.year, today.month) == (start.year, start.month):
+        return today
+    if (today.year, today.month) > (start.year, start.month):
+        next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return next_month - timedelta(days=1)
+    return start - timedelta(days=1)
+
+
 @tracker_bp.route("/view_daily", methods=["POST"])
 def view_daily_trackers():
     data = request.get_json() or {}
@@ -679,7 +1078,7 @@ def view_daily_trackers():
     try:
         params = []
 
-        logged_in_user_id = data.get("logged_in_user_id")
+        logged_in_user_id = current_user_id(data)
         if not logged_in_user_id:
             return api_response(400, "logged_in_user_id is required")
 
@@ -713,35 +1112,39 @@ def view_daily_trackers():
         
         
         # -------- Role check
-        cursor.execute(
+        role_name = get_user_role(cursor, int(logged_in_user_id)) or ""
+
+        # -------- Source: tracker_daily_rollup unless a filter needs raw rows
+        use_rollup = daily_rollup_covers(data)
+        if use_rollup:
+            daily_from = """
+                FROM tracker_daily_rollup r
+                LEFT JOIN tfs_user u ON u.user_id = r.user_id
             """
-            SELECT LOWER(TRIM(r.role_name)) AS role_name
-            FROM tfs_user u
-            JOIN user_role r ON r.role_id = u.role_id
-            WHERE u.user_id=%s
-            LIMIT 1
-            """,
-            (int(logged_in_user_id),),
-        )
-        role_name = ((cursor.fetchone() or {}).get("role_name") or "").lower()
+            user_col, shift_col, date_col = "r.user_id", "r.shift", "r.work_date"
+            where = "WHERE 1=1"
+        else:
+            daily_from = """
+                FROM task_work_tracker twt
+                LEFT JOIN tfs_user u ON u.user_id = twt.user_id
+            """
+            user_col, shift_col, date_col = "twt.user_id", "twt.shift", "twt.date_time_dt"
+            # same predicate as the rollup, so both sources agree
+            where = f"WHERE {ACTIVE_TRACKER_SQL}"
 
         # -------- WHERE (same filters as /view)
-        where = "WHERE twt.is_active != 0"
-
-        # Month filter
-        try:
-            dt = datetime.strptime(month_year, "%b%Y")
-            where += " AND YEAR(CAST(twt.date_time AS DATETIME))=%s AND MONTH(CAST(twt.date_time AS DATETIME))=%s"
-            params.extend([dt.year, dt.month])
-        except Exception:
-            pass
+        # Month filter (half-open range; DATE work_date compares fine against datetime bounds)
+        bounds = month_year_bounds(month_year)
+        if bounds:
+            where += f" AND {date_col} >= %s AND {date_col} < %s"
+            params.extend(bounds)
 
         # Team filter
         if data.get("team_id"):
             where += " AND u.team_id=%s"
             params.append(data["team_id"])
 
-        # Project/task filters
+        # Project/task filters (raw table only, see daily_rollup_covers)
         if data.get("project_id"):
             where += " AND twt.project_id=%s"
             params.append(data["project_id"])
@@ -751,7 +1154,7 @@ def view_daily_trackers():
             params.append(data["task_id"])
             
         if data.get("shift"):
-            where += " AND twt.shift = %s"
+            where += f" AND {shift_col} = %s"
             params.append(data["shift"].upper())
 
         # Date range filters
@@ -759,14 +1162,14 @@ def view_daily_trackers():
             date_from = str(data["date_from"])
             if len(date_from) == 10:
                 date_from += " 00:00:00"
-            where += " AND CAST(twt.date_time AS DATETIME) >= %s"
+            where += f" AND {date_col} >= %s"
             params.append(date_from)
 
         if data.get("date_to"):
             date_to = str(data["date_to"])
             if len(date_to) == 10:
                 date_to += " 23:59:59"
-            where += " AND CAST(twt.date_time AS DATETIME) <= %s"
+            where += f" AND {date_col} <= %s"
             params.append(date_to)
 
         if data.get("is_active") is not None:
@@ -775,44 +1178,45 @@ def view_daily_trackers():
 
         # User filter OR restriction (manager logic)
         if data.get("user_id"):
-            where += " AND twt.user_id=%s"
+            where += f" AND {user_col}=%s"
             params.append(data["user_id"])
         else:
             if "admin" not in role_name:
-                manager_id = str(logged_in_user_id)
-                where += f"""
-                    AND twt.user_id IN (
-                        SELECT tu.user_id
-                        FROM tfs_user tu
-                        WHERE tu.is_active = 1
-                          AND tu.is_delete = 1
-                          AND (
-                                tu.project_manager_id = %s
-                                OR tu.asst_manager_id = %s
-                                OR tu.qa_id = %s
-                                OR tu.user_id = %s
-                                OR JSON_CONTAINS(tu.project_manager_id, JSON_ARRAY(%s))
-                                OR JSON_CONTAINS(tu.asst_manager_id, JSON_ARRAY(%s))
-                                OR JSON_CONTAINS(tu.qa_id, JSON_ARRAY(%s))
-                          )
-                    )
-                """
-                params.extend([manager_id] * 7)
+                # self + anyone reporting to the logged-in user (PM / AM / QA)
+                where += " AND " + subordinate_scope_sql(
+                    user_col, int(logged_in_user_id), params,
+                    include_self=True, active_only=True,
+                )
 
-        # -------- Daily aggregation + cumulative + daily required
-        # ✅ team_id + team_name added in daily rows
-        query = f"""
-            WITH daily AS (
+        if use_rollup:
+            daily_sql = f"""
+                SELECT
+                    r.user_id,
+                    r.shift,
+                    r.work_date,
+                    r.billable_hours AS total_billable_hours_day,
+                    r.tracker_count AS trackers_count_day
+                {daily_from}
+                {where}
+            """
+        else:
+            daily_sql = f"""
                 SELECT
                     twt.user_id,
                     twt.shift,
-                    DATE(CAST(twt.date_time AS DATETIME)) AS work_date,
+                    DATE(twt.date_time_dt) AS work_date,
                     SUM(COALESCE(twt.production, 0) / NULLIF(twt.tenure_target, 0)) AS total_billable_hours_day,
                     COUNT(*) AS trackers_count_day
-                FROM task_work_tracker twt
-                LEFT JOIN tfs_user u ON u.user_id = twt.user_id
+                {daily_from}
                 {where}
-                GROUP BY twt.user_id, twt.shift, DATE(CAST(twt.date_time AS DATETIME))
+                GROUP BY twt.user_id, twt.shift, DATE(twt.date_time_dt)
+            """
+
+        # -------- Daily aggregation + cumulative + daily required
+        # ✅ team_id + team_name added in daily rows
+        query = f"""
+            WITH daily AS (
+                {daily_sql}
             ),
             daily_with_cum AS (
                 SELECT
@@ -846,17 +1250,17 @@ def view_daily_trackers():
                 tqc.assigned_hours AS assigned_hours,
 
                 umt.user_monthly_tracker_id,
-                COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0) AS monthly_target,
+                COALESCE(umt.monthly_target, 0) AS monthly_target,
                 COALESCE(umt.extra_assigned_hours, 0) AS extra_assigned_hours,
                 (
-                  COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0)
+                  COALESCE(umt.monthly_target, 0)
                   + COALESCE(umt.extra_assigned_hours, 0)
                 ) AS monthly_total_target,
 
-                CAST(umt.working_days AS SIGNED) AS working_days,
+                umt.working_days AS working_days,
 
                 GREATEST(
-                    COALESCE(CAST(umt.working_days AS SIGNED), 0)
+                    COALESCE(umt.working_days, 0)
                     - COALESCE(dwc.worked_days_till_day, 0),
                     0
                 ) AS pending_days_after_this_day,
@@ -864,21 +1268,21 @@ def view_daily_trackers():
                 CASE
                   WHEN umt.user_monthly_tracker_id IS NULL THEN NULL
                   WHEN GREATEST(
-                        COALESCE(CAST(umt.working_days AS SIGNED), 0)
+                        COALESCE(umt.working_days, 0)
                         - COALESCE(dwc.worked_days_till_day, 0),
                         0
                       ) = 0 THEN NULL
                   ELSE
                     (
                       (
-                        COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0)
+                        COALESCE(umt.monthly_target, 0)
                         + COALESCE(umt.extra_assigned_hours, 0)
                       )
                       - COALESCE(dwc.cumulative_billable_hours_till_day, 0)
                     )
                     / NULLIF(
                         GREATEST(
-                            COALESCE(CAST(umt.working_days AS SIGNED), 0)
+                            COALESCE(umt.working_days, 0)
                             - COALESCE(dwc.worked_days_till_day, 0),
                             0
                         ),
@@ -900,12 +1304,12 @@ def view_daily_trackers():
             LEFT JOIN user_monthly_tracker umt
               ON umt.user_id = dwc.user_id
              AND umt.is_active = 1
-             AND umt.month_year = %s
+             AND umt.yyyymm = %s
 
             ORDER BY dwc.work_date DESC, u.user_name ASC
         """
 
-        final_params = list(params) + [month_year]
+        final_params = list(params) + [month_year_to_yyyymm(month_year)]
         cursor.execute(query, tuple(final_params))
         rows = cursor.fetchall()
 
@@ -914,10 +1318,15 @@ def view_daily_trackers():
         user_ids = sorted({r.get("user_id") for r in rows if r.get("user_id") is not None})
         month_summary = []
 
-        if user_ids:
+        if user_ids and bounds:
             in_ph = ",".join(["%s"] * len(user_ids))
             team_id = data.get("team_id")  # may be None
 
+            # month totals / worked days come from tracker_daily_rollup (one grouped
+            # pass per request instead of correlated subqueries per user)
+            month_start, month_end = bounds
+            cutoff = month_cutoff_date(month_year)
+
             summary_query = f"""
                 SELECT
                     u.user_id,
@@ -927,75 +1336,42 @@ def view_daily_trackers():
                     t.team_id,
                     t.team_name,
 
-                    m.mon AS month_year,
+                    %s AS month_year,
                     umt.user_monthly_tracker_id,
-                    COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0) AS monthly_target,
+                    COALESCE(umt.monthly_target, 0) AS monthly_target,
                     COALESCE(umt.extra_assigned_hours, 0) AS extra_assigned_hours,
                     (
-                      COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0)
+                      COALESCE(umt.monthly_target, 0)
                       + COALESCE(umt.extra_assigned_hours, 0)
                     ) AS monthly_total_target,
-                    COALESCE((
-                      SELECT SUM(twt3.production / NULLIF(twt3.tenure_target, 0))
-                      FROM task_work_tracker twt3
-                      WHERE twt3.user_id = u.user_id
-                        AND twt3.is_active = 1
-                        AND (YEAR(CAST(twt3.date_time AS DATETIME))*100 + MONTH(CAST(twt3.date_time AS DATETIME))) = m.yyyymm
-                    ), 0) AS total_billable_hours_month,
+                    COALESCE(agg.total_billable_hours_month, 0) AS total_billable_hours_month,
                     CASE
                       WHEN umt.user_monthly_tracker_id IS NULL THEN NULL
                       ELSE GREATEST(
-                             COALESCE(CAST(umt.working_days AS SIGNED), 0)
-                             - COALESCE((
-                                 SELECT COUNT(DISTINCT DATE(CAST(twt2.date_time AS DATETIME)))
-                                 FROM task_work_tracker twt2
-                                 WHERE twt2.user_id = u.user_id
-                                   AND twt2.is_active = 1
-                                   AND (YEAR(CAST(twt2.date_time AS DATETIME))*100 + MONTH(CAST(twt2.date_time AS DATETIME))) = m.yyyymm
-                                   AND DATE(CAST(twt2.date_time AS DATETIME)) <= m.cutoff
-                               ), 0),
+                             COALESCE(umt.working_days, 0)
+                             - COALESCE(agg.worked_days_till_cutoff, 0),
                              0
                            )
                     END AS pending_days,
                     CASE
                       WHEN umt.user_monthly_tracker_id IS NULL THEN NULL
                       WHEN GREATEST(
-                             COALESCE(CAST(umt.working_days AS SIGNED), 0)
-                             - COALESCE((
-                                 SELECT COUNT(DISTINCT DATE(CAST(twt2.date_time AS DATETIME)))
-                                 FROM task_work_tracker twt2
-                                 WHERE twt2.user_id = u.user_id
-                                   AND twt2.is_active = 1
-                                   AND (YEAR(CAST(twt2.date_time AS DATETIME))*100 + MONTH(CAST(twt2.date_time AS DATETIME))) = m.yyyymm
-                                   AND DATE(CAST(twt2.date_time AS DATETIME)) <= m.cutoff
-                               ), 0),
+                             COALESCE(umt.working_days, 0)
+                             - COALESCE(agg.worked_days_till_cutoff, 0),
                              0
                            ) = 0 THEN NULL
                       ELSE
                         (
                           (
-                            COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0)
+                            COALESCE(umt.monthly_target, 0)
                             + COALESCE(umt.extra_assigned_hours, 0)
                           )
-                          - COALESCE((
-                              SELECT SUM(twt3.production / NULLIF(twt3.tenure_target, 0))
-                              FROM task_work_tracker twt3
-                              WHERE twt3.user_id = u.user_id
-                                AND twt3.is_active = 1
-                                AND (YEAR(CAST(twt3.date_time AS DATETIME))*100 + MONTH(CAST(twt3.date_time AS DATETIME))) = m.yyyymm
-                            ), 0)
+                          - COALESCE(agg.total_billable_hours_month, 0)
                         )
                         / NULLIF(
                             GREATEST(
-                              COALESCE(CAST(umt.working_days AS SIGNED), 0)
-                              - COALESCE((
-                                  SELECT COUNT(DISTINCT DATE(CAST(twt2.date_time AS DATETIME)))
-                                  FROM task_work_tracker twt2
-                                  WHERE twt2.user_id = u.user_id
-                                    AND twt2.is_active = 1
-                                    AND (YEAR(CAST(twt2.date_time AS DATETIME))*100 + MONTH(CAST(twt2.date_time AS DATETIME))) = m.yyyymm
-                                    AND DATE(CAST(twt2.date_time AS DATETIME)) <= m.cutoff
-                                ), 0),
+                              COALESCE(umt.working_days, 0)
+                              - COALESCE(agg.worked_days_till_cutoff, 0),
                               0
                             ),
                             0
@@ -1003,30 +1379,32 @@ def view_daily_trackers():
                     END AS daily_required_hours
                 FROM tfs_user u
                 LEFT JOIN team t ON t.team_id = u.team_id
-                CROSS JOIN (
+                LEFT JOIN (
                     SELECT
-                      %s AS mon,
-                      CAST(DATE_FORMAT(STR_TO_DATE(CONCAT('01-', %s), '%d-%b%Y'), '%Y%m') AS UNSIGNED) AS yyyymm,
-                      CASE
-                        WHEN (YEAR(CURDATE())*100 + MONTH(CURDATE())) =
-                             CAST(DATE_FORMAT(STR_TO_DATE(CONCAT('01-', %s), '%d-%b%Y'), '%Y%m') AS UNSIGNED)
-                        THEN CURDATE()
-                        WHEN (YEAR(CURDATE())*100 + MONTH(CURDATE())) >
-                             CAST(DATE_FORMAT(STR_TO_DATE(CONCAT('01-', %s), '%d-%b%Y'), '%Y%m') AS UNSIGNED)
-                        THEN LAST_DAY(STR_TO_DATE(CONCAT('01-', %s), '%d-%b%Y'))
-                        ELSE DATE_SUB(STR_TO_DATE(CONCAT('01-', %s), '%d-%b%Y'), INTERVAL 1 DAY)
-                      END AS cutoff
-                ) m
+                        r.user_id,
+                        SUM(r.billable_hours) AS total_billable_hours_month,
+                        COUNT(DISTINCT CASE WHEN r.work_date <= %s THEN r.work_date END) AS worked_days_till_cutoff
+                    FROM tracker_daily_rollup r
+                    WHERE r.user_id IN ({in_ph})
+                      AND r.work_date >= %s AND r.work_date < %s
+                    GROUP BY r.user_id
+                ) agg ON agg.user_id = u.user_id
                 LEFT JOIN user_monthly_tracker umt
                   ON umt.user_id = u.user_id
                  AND umt.is_active = 1
-                 AND umt.month_year = m.mon
+                 AND umt.yyyymm = %s
                 WHERE u.user_id IN ({in_ph})
                   -- ✅ team filter applied to summary too
                   AND (%s IS NULL OR u.team_id = %s)
             """
 
-            summary_params = [month_year] * 6 + user_ids + [team_id, team_id]
+            summary_params = (
+                [month_year, cutoff]
+                + user_ids
+                + [month_start, month_end, month_year_to_yyyymm(month_year)]
+                + user_ids
+                + [team_id, team_id]
+            )
             cursor.execute(summary_query, tuple(summary_params))
             month_summary = cursor.fetchall()
 
@@ -5,6 +5,8 @@ from config import get_db_connection, UPLOAD_SUBDIRS, BASE_UPLOAD_URL, UPLOAD_FO
 from utils.security import decrypt_password, encrypt_password, safe_decrypt_password
 from utils.validators import validate_request
 from utils.json_utils import to_db_json
+from utils.hierarchy import relation_for_role, subordinate_scope_sql, sync_user_supervisors, invalidate_subordinate_cache
+from utils.role_context import get_user_role, invalidate_role_context
 from datetime import datetime
 import json
 import os
@@ -148,19 +150,11 @@ def list_users():
     cursor = conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
-            SELECT r.role_name
-            FROM tfs_user u
-            JOIN user_role r ON r.role_id = u.role_id
-            WHERE u.user_id = %s AND u.is_active = 1 AND u.is_delete = 1
-        """, (user_id,))
-        role_row = cursor.fetchone()
+        role = get_user_role(cursor, user_id)
 
-        if not role_row:
+        if role is None:
             return api_response(404, "User not found")
 
-        role = (role_row["role_name"] or "").strip().lower()
-
         if role == "agent":
             return api_response(200, "No users available", [])
 
@@ -191,46 +185,12 @@ def list_users():
 
         params: list = []
 
-        # ✅ Role-based filtering (MariaDB-safe; supports BOTH JSON arrays and comma/bracket strings)
-        # This avoids: invalid JSON errors + missing matches when stored value isn't valid JSON
-        if role == "qa":
-            query += """
-                AND (
-                    TRIM(COALESCE(u.qa_id, '')) = %s
-                    OR FIND_IN_SET(
-                        %s,
-                        REPLACE(REPLACE(REPLACE(REPLACE(COALESCE(u.qa_id,''), '[',''), ']',''), '"',''), ' ', '')
-                    ) > 0
-                )
-            """
-            params.append(str(int(user_id)))   # exact match
-            params.append(str(int(user_id)))   # FIND_IN_SET
-
-        elif role == "assistant manager":
-            query += """
-                AND (
-                    TRIM(COALESCE(u.asst_manager_id, '')) = %s
-                    OR FIND_IN_SET(
-                        %s,
-                        REPLACE(REPLACE(REPLACE(REPLACE(COALESCE(u.asst_manager_id,''), '[',''), ']',''), '"',''), ' ', '')
-                    ) > 0
-                )
-            """
-            params.append(str(int(user_id)))   # exact match
-            params.append(str(int(user_id)))   # FIND_IN_SET
-
-        elif role in ["manager", "project manager"]:
-            query += """
-                AND (
-                    TRIM(COALESCE(u.project_manager_id, '')) = %s
-                    OR FIND_IN_SET(
-                        %s,
-                        REPLACE(REPLACE(REPLACE(REPLACE(COALESCE(u.project_manager_id,''), '[',''), ']',''), '"',''), ' ', '')
-                    ) > 0
-                )
-            """
-            params.append(str(int(user_id)))   # exact match
-            params.append(str(int(user_id)))   # FIND_IN_SET
+        # ✅ Role-based filtering: users mapped to the logged-in user through
+        # the relation of their role (qa / asst_manager / project_manager)
+        if role in ["qa", "assistant manager", "manager", "project manager"]:
+            query += " AND " + subordinate_scope_sql(
+                "u.user_id", int(user_id), params, relations=[relation_for_role(role)]
+            )
 
         if data.get("is_active") is not None:
             query += " AND u.is_active = %s"
@@ -388,7 +348,16 @@ def update_user():
         user_update_vals.append(user_id)
         cursor.execute(update_user_query, user_update_vals)
 
+        # keep user_supervisor in step with the id-list columns (same transaction)
+        sync_user_supervisors(cursor, int(user_id), {
+            "project_manager": user_fields["project_manager_id"],
+            "asst_manager": user_fields["asst_manager_id"],
+            "qa": user_fields["qa_id"],
+        })
+
         conn.commit()
+        invalidate_role_context(user_id)
+        invalidate_subordinate_cache()
         return api_response(200, "User updated successfully")
 
     except Exception as e:
@@ -433,6 +402,8 @@ def delete_user():
             WHERE user_id = %s
         """, (user_id,))
         conn.commit()
+        invalidate_role_context(user_id)
+        invalidate_subordinate_cache()
 
         try:
             safe_remove_profile_pic(profile_file)
@@ -1,71 +1,103 @@
 # routes/user_monthly_tracker.py
 
+import mysql.connector
 from flask import Blueprint, request
+from mysql.connector import errorcode
 from config import get_db_connection
 from utils.response import api_response
+from utils.date_utils import month_year_bounds, month_year_to_yyyymm, normalize_month_year
+from utils.hierarchy import subordinate_scope_sql
+from utils.role_context import get_role_context
+from utils.session_token import current_user_id
+from utils.validators import parse_decimal, parse_int
 from datetime import datetime
 
-user_monthly_tracker_bp = Blueprint("user_monthly_tracker", __name__)
+# rows per multi-row INSERT in /add
+UPSERT_CHUNK_ROWS = 500
+
+# /add takes over a soft-deleted row on uq_umt_user_yyyymm, never an active one;
+# is_active goes last so the IF()s above it still see the old value
+REVIVE_ON_DUPLICATE_SQL = """
+    ON DUPLICATE KEY UPDATE
+        month_year=IF(is_active=0, VALUES(month_year), month_year),
+        monthly_target=IF(is_active=0, VALUES(monthly_target), monthly_target),
+        extra_assigned_hours=IF(is_active=0, VALUES(extra_assigned_hours), extra_assigned_hours),
+        working_days=IF(is_active=0, VALUES(working_days), working_days),
+        created_date=IF(is_active=0, VALUES(created_date), created_date),
+        is_active=1
+"""
 
-# task_work_tracker.date_time is TEXT like "YYYY-MM-DD HH:MM:SS"
-TRACKER_DT = "CAST(twt.date_time AS DATETIME)"
-TRACKER_YEAR_MONTH = f"(YEAR({TRACKER_DT})*100 + MONTH({TRACKER_DT}))"
+user_monthly_tracker_bp = Blueprint("user_monthly_tracker", __name__)
 
 
 def now_str() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-def month_year_to_yyyymm_sql(month_year_col: str) -> str:
-    """
-    Your DB stores month_year like 'JAN2026', 'DEC2025' (MONYYYY).
-    Convert MONYYYY -> integer YYYYMM inside SQL.
+def _write_user_targets(cursor, candidates: list[dict], active_users: set) -> tuple[list[dict], list[dict]]:
     """
-    return f"""
-    CAST(
-      DATE_FORMAT(
-        STR_TO_DATE(CONCAT('01-', {month_year_col}), '%d-%b%Y'),
-        '%Y%m'
-      ) AS UNSIGNED
-    )
-    """
-
+    Inserts the new (user, month) targets and revives soft-deleted ones.
+    Returns (written candidates, skipped entries).
 
-# ---------------------------
-# Single helper (role_name + agent_role_id)
-# ---------------------------
-def get_role_context(cursor, user_id: int) -> dict:
-    """
-    Returns:
-      {
-        "user_role_id": int|None,
-        "user_role_name": str,
-        "agent_role_id": int|None
-      }
+    The existing rows are read FOR UPDATE, so an active target is never
+    overwritten; brand-new keys go in with a plain INSERT, which fails with a
+    duplicate-key error if a concurrent /add got there first (the caller
+    rolls back and calls again).
     """
-    cursor.execute(
-        """
-        SELECT
-            u.role_id AS user_role_id,
-            r.role_name AS user_role_name,
-            (
-                SELECT ur2.role_id
-                FROM user_role ur2
-                WHERE LOWER(TRIM(ur2.role_name)) = 'agent'
-                LIMIT 1
-            ) AS agent_role_id
-        FROM tfs_user u
-        JOIN user_role r ON r.role_id = u.role_id
-        WHERE u.user_id=%s AND u.is_active=1 AND u.is_delete=1
-        """,
-        (int(user_id),),
-    )
-    row = cursor.fetchone() or {}
-    return {
-        "user_role_id": row.get("user_role_id"),
-        "user_role_name": (row.get("user_role_name") or "").strip().lower(),
-        "agent_role_id": row.get("agent_role_id"),
-    }
+    existing = {}
+    user_ids = sorted({c["user_id"] for c in candidates})
+    if user_ids:
+        months = sorted({c["yyyymm"] for c in candidates})
+        cursor.execute(
+            f"""
+            SELECT user_id, yyyymm, is_active
+            FROM user_monthly_tracker
+            WHERE user_id IN ({",".join(["%s"] * len(user_ids))})
+              AND yyyymm IN ({",".join(["%s"] * len(months))})
+            FOR UPDATE
+            """,
+            tuple(user_ids + months),
+        )
+        existing = {(r["user_id"], r["yyyymm"]): r["is_active"] for r in cursor.fetchall()}
+
+    skipped, new_rows, revive_rows = [], [], []
+    for c in candidates:
+        key = (c["user_id"], c["yyyymm"])
+        if c["user_id"] not in active_users:
+            skipped.append({"index": c["index"], "user_id": c["user_id"], "reason": "User not found or inactive"})
+        elif existing.get(key):
+            skipped.append({
+                "index": c["index"],
+                "user_id": c["user_id"],
+                "month_year": c["month_year"],
+                "reason": "Monthly target already exists for this user and month",
+            })
+        else:
+            (new_rows if key not in existing else revive_rows).append(c)
+            existing[key] = 1  # a repeat later in the same payload is a duplicate too
+
+    for rows, on_duplicate in ((new_rows, ""), (revive_rows, REVIVE_ON_DUPLICATE_SQL)):
+        for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+            chunk = rows[start:start + UPSERT_CHUNK_ROWS]
+            values_sql = ",".join(["(%s, %s, %s, %s, %s, %s, 1, %s)"] * len(chunk))
+            params = []
+            for c in chunk:
+                params.extend([
+                    c["user_id"], c["month_year"], c["yyyymm"], c["monthly_target"],
+                    c["extra_assigned_hours"], c["working_days"], c["created_date"],
+                ])
+            cursor.execute(
+                f"""
+                INSERT INTO user_monthly_tracker
+                    (user_id, month_year, yyyymm, monthly_target, extra_assigned_hours, working_days, is_active, created_date)
+                VALUES {values_sql}
+                {on_duplicate}
+                """,
+                tuple(params),
+            )
+
+    written = sorted(new_rows + revive_rows, key=lambda c: c["index"])
+    return written, skipped
 
 
 # ---------------------------
@@ -98,84 +130,97 @@ def add_user_monthly_target():
 
     required_fields = ["user_id", "month_year", "monthly_target", "working_days"]
 
+    # ---- per-record validation (no DB yet)
+    skipped = []
+    candidates = []
+    for idx, data in enumerate(records):
+        missing = None
+        for f in required_fields:
+            if data.get(f) in [None, ""]:
+                missing = f
+                break
+        if missing:
+            skipped.append({"index": idx + 1, "reason": f"{missing} is required"})
+            continue
+
+        try:
+            user_id = int(data["user_id"])
+        except (TypeError, ValueError):
+            skipped.append({"index": idx + 1, "reason": "user_id must be a number"})
+            continue
+        month_year = normalize_month_year(data["month_year"])  # JAN2026 -> Jan2026
+        if not month_year:
+            skipped.append({"index": idx + 1, "user_id": user_id, "reason": "month_year must be like Jan2026"})
+            continue
+        try:
+            monthly_target = parse_decimal(data["monthly_target"], "monthly_target")
+            extra_assigned_hours = parse_int(data.get("extra_assigned_hours") or 0, "extra_assigned_hours")
+            working_days = parse_int(data["working_days"], "working_days")
+        except ValueError as e:
+            skipped.append({"index": idx + 1, "user_id": user_id, "reason": str(e)})
+            continue
+
+        candidates.append({
+            "index": idx + 1,
+            "user_id": user_id,
+            "month_year": month_year,
+            "yyyymm": month_year_to_yyyymm(month_year),
+            "monthly_target": monthly_target,
+            "extra_assigned_hours": extra_assigned_hours,
+            "working_days": working_days,
+            "created_date": str(data.get("created_date") or now_str()),
+        })
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        inserted_ids = []
-        skipped = []
-
-        for idx, data in enumerate(records):
-            # ---- required validation per record
-            missing = None
-            for f in required_fields:
-                if data.get(f) in [None, ""]:
-                    missing = f
-                    break
-            if missing:
-                skipped.append({"index": idx + 1, "reason": f"{missing} is required"})
-                continue
+        user_ids = sorted({c["user_id"] for c in candidates})
 
-            user_id = int(data["user_id"])
-            month_year = str(data["month_year"]).strip()  # MONYYYY like JAN2026
-            monthly_target = str(data["monthly_target"]).strip()  # TEXT in DB
-            extra_assigned_hours = int(data.get("extra_assigned_hours") or 0)
-            working_days = str(data["working_days"]).strip()  # TEXT in DB
-            created_date = str(data.get("created_date") or now_str())
-
-            # ---- Validate user exists
+        # ---- Validate users exist (one IN-query)
+        active_users = set()
+        if user_ids:
+            in_ph = ",".join(["%s"] * len(user_ids))
             cursor.execute(
-                """
+                f"""
                 SELECT user_id
                 FROM tfs_user
-                WHERE user_id=%s AND is_active=1 AND is_delete=1
+                WHERE user_id IN ({in_ph}) AND is_active=1 AND is_delete=1
                 """,
-                (user_id,),
+                tuple(user_ids),
             )
-            if not cursor.fetchone():
-                skipped.append(
-                    {"index": idx + 1, "user_id": user_id, "reason": "User not found or inactive"}
-                )
-                continue
+            active_users = {r["user_id"] for r in cursor.fetchall()}
+
+        # ---- insert new / revive soft-deleted (user + month) rows
+        for attempt in (1, 2):
+            try:
+                written, db_skipped = _write_user_targets(cursor, candidates, active_users)
+                break
+            except mysql.connector.IntegrityError as e:
+                # a key that was new here got inserted by a concurrent /add first: look again
+                if e.errno != errorcode.ER_DUP_ENTRY or attempt == 2:
+                    raise
+                conn.rollback()
+        skipped.extend(db_skipped)
 
-            # ---- Prevent duplicate active (user + month)
+        inserted_ids = []
+        if written:
+            ins_users = sorted({c["user_id"] for c in written})
+            ins_months = sorted({c["yyyymm"] for c in written})
             cursor.execute(
-                """
-                SELECT user_monthly_tracker_id
+                f"""
+                SELECT user_monthly_tracker_id, user_id, yyyymm
                 FROM user_monthly_tracker
-                WHERE user_id=%s AND month_year=%s AND is_active=1
-                """,
-                (user_id, month_year),
-            )
-            if cursor.fetchone():
-                skipped.append(
-                    {
-                        "index": idx + 1,
-                        "user_id": user_id,
-                        "month_year": month_year,
-                        "reason": "Monthly target already exists for this user and month",
-                    }
-                )
-                continue
-
-            cursor.execute(
-                """
-                INSERT INTO user_monthly_tracker
-                    (user_id, month_year, monthly_target, extra_assigned_hours, working_days, is_active, created_date)
-                VALUES (%s, %s, %s, %s, %s, 1, %s)
+                WHERE user_id IN ({",".join(["%s"] * len(ins_users))})
+                  AND yyyymm IN ({",".join(["%s"] * len(ins_months))})
                 """,
-                (
-                    user_id,
-                    month_year,
-                    monthly_target,
-                    extra_assigned_hours,
-                    working_days,
-                    created_date,
-                ),
+                tuple(ins_users + ins_months),
             )
-            inserted_ids.append(cursor.lastrowid)
+            ids = {(r["user_id"], r["yyyymm"]): r["user_monthly_tracker_id"] for r in cursor.fetchall()}
+            inserted_ids = [ids.get((c["user_id"], c["yyyymm"])) for c in written]
 
         conn.commit()
+        skipped.sort(key=lambda x: x["index"])
 
         # If nothing inserted but there are skipped => conflict-ish
         if not inserted_ids and skipped:
@@ -219,21 +264,31 @@ def update_user_monthly_target():
         updates.append("user_id=%s")
         params.append(int(data["user_id"]))
 
+    new_yyyymm = None
     if "month_year" in data and data["month_year"] not in [None, ""]:
+        month_year = normalize_month_year(data["month_year"])
+        if not month_year:
+            return api_response(400, "month_year must be like Jan2026")
+        new_yyyymm = month_year_to_yyyymm(month_year)
         updates.append("month_year=%s")
-        params.append(str(data["month_year"]).strip())  # keep as-is (MONYYYY)
+        params.append(month_year)
+        updates.append("yyyymm=%s")
+        params.append(new_yyyymm)
 
-    if "monthly_target" in data and data["monthly_target"] not in [None, ""]:
-        updates.append("monthly_target=%s")
-        params.append(str(data["monthly_target"]).strip())
+    try:
+        if "monthly_target" in data and data["monthly_target"] not in [None, ""]:
+            updates.append("monthly_target=%s")
+            params.append(parse_decimal(data["monthly_target"], "monthly_target"))
 
-    if "extra_assigned_hours" in data and data["extra_assigned_hours"] not in [None, ""]:
-        updates.append("extra_assigned_hours=%s")
-        params.append(int(data["extra_assigned_hours"])) 
+        if "extra_assigned_hours" in data and data["extra_assigned_hours"] not in [None, ""]:
+            updates.append("extra_assigned_hours=%s")
+            params.append(parse_int(data["extra_assigned_hours"], "extra_assigned_hours"))
 
-    if "working_days" in data and data["working_days"] not in [None, ""]:
-        updates.append("working_days=%s")
-        params.append(str(data["working_days"]).strip())
+        if "working_days" in data and data["working_days"] not in [None, ""]:
+            updates.append("working_days=%s")
+            params.append(parse_int(data["working_days"], "working_days"))
+    except ValueError as e:
+        return api_response(400, str(e))
 
     if not updates:
         return api_response(400, "Nothing to update")
@@ -245,7 +300,7 @@ def update_user_monthly_target():
         # Current row
         cursor.execute(
             """
-            SELECT user_id, month_year
+            SELECT user_id, yyyymm
             FROM user_monthly_tracker
             WHERE user_monthly_tracker_id=%s
             """,
@@ -269,30 +324,26 @@ def update_user_monthly_target():
             if not cursor.fetchone():
                 return api_response(404, "User not found or inactive")
 
-        # Prevent duplicate active (final user_id + final month_year)
+        # Prevent duplicate active (final user_id + final month)
         if (
             ("user_id" in data and data["user_id"] not in [None, ""])
-            or ("month_year" in data and data["month_year"] not in [None, ""])
+            or new_yyyymm is not None
         ):
             final_user_id = (
                 int(data["user_id"])
                 if ("user_id" in data and data["user_id"] not in [None, ""])
                 else int(current["user_id"])
             )
-            final_month_year = (
-                str(data["month_year"]).strip()
-                if ("month_year" in data and data["month_year"] not in [None, ""])
-                else str(current["month_year"])
-            )
+            final_yyyymm = new_yyyymm if new_yyyymm is not None else current["yyyymm"]
 
             cursor.execute(
                 """
                 SELECT user_monthly_tracker_id
                 FROM user_monthly_tracker
-                WHERE user_id=%s AND month_year=%s 
+                WHERE user_id=%s AND yyyymm=%s
                   AND user_monthly_tracker_id<>%s
                 """,
-                (final_user_id, final_month_year, umt_id),
+                (final_user_id, final_yyyymm, umt_id),
             )
             if cursor.fetchone():
                 return api_response(409, "Monthly target already exists for this user and month")
@@ -367,7 +418,7 @@ def delete_user_monthly_target():
 def list_user_monthly_targets():
     data = request.get_json(silent=True) or {}
 
-    logged_in_user_id = data.get("logged_in_user_id")
+    logged_in_user_id = current_user_id(data)
     month_year = (data.get("month_year") or "").strip()  # OPTIONAL (MonYYYY)
     filter_user_id = data.get("user_id")  # OPTIONAL
     filter_team_id = data.get("team_id")  # OPTIONAL
@@ -408,36 +459,35 @@ def list_user_monthly_targets():
             user_where += " AND u.user_id=%s"
             user_params.append(int(logged_in_user_id))
         else:
-            mid = str(logged_in_user_id)
-            user_where += """
-                AND (
-                    JSON_CONTAINS(u.project_manager_id, %s)
-                    OR JSON_CONTAINS(u.asst_manager_id, %s)
-                    OR JSON_CONTAINS(u.qa_id, %s)
-                )
-            """
-
-            user_params.extend([str(mid), str(mid), str(mid)])
+            # agents reporting to the logged-in user as PM / AM / QA
+            user_where += " AND " + subordinate_scope_sql("u.user_id", int(logged_in_user_id), user_params)
 
         # ---------------- Joins: month_year optional ----------------
-        # temp_qc.date is TEXT 'YYYY-MM-DD'
-        QC_YEAR_MONTH = "DATE_FORMAT(STR_TO_DATE(tq.date, '%Y-%m-%d'), '%Y%m')"
+        # twt.date_time_dt is an indexed DATETIME and temp_qc.date is TEXT
+        # 'YYYY-MM-DD', so both are filtered with a half-open month range
+        month_start = month_end = None
+        if month_year:
+            bounds = month_year_bounds(month_year)
+            if not bounds:
+                return api_response(400, "month_year must be like Jan2026", None)
+            month_start, month_end = bounds
 
         if month_year:
             umt_join = """
                 INNER JOIN user_monthly_tracker umt
                   ON umt.user_id = u.user_id
                  AND umt.is_active=1
-                 AND umt.month_year=%s
+                 AND umt.yyyymm=%s
             """
-            twt_join = f"""
+            twt_join = """
                 LEFT JOIN task_work_tracker twt
                   ON twt.user_id = u.user_id
                  AND twt.is_active=1
-                 AND {TRACKER_YEAR_MONTH} = {month_year_to_yyyymm_sql('%s')}
+                 AND twt.date_time_dt >= %s
+                 AND twt.date_time_dt < %s
             """
             # ✅ avg_qc_score = SUM(qc_score) / COUNT(days having qc_score)
-            qc_join = f"""
+            qc_join = """
                 LEFT JOIN (
                     SELECT
                         tq.user_id,
@@ -445,7 +495,8 @@ def list_user_monthly_targets():
                         COUNT(DISTINCT tq.date) AS qc_days_count
                     FROM temp_qc tq
                     WHERE tq.qc_score IS NOT NULL
-                      AND {QC_YEAR_MONTH} = {month_year_to_yyyymm_sql('%s')}
+                      AND tq.date >= %s
+                      AND tq.date < %s
                     GROUP BY tq.user_id
                 ) qc ON qc.user_id = u.user_id
             """
@@ -481,10 +532,10 @@ def list_user_monthly_targets():
                 umt.user_monthly_tracker_id,
                 umt.month_year,
                 umt.working_days,
-                COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0) AS monthly_target,
+                COALESCE(umt.monthly_target, 0) AS monthly_target,
                 COALESCE(umt.extra_assigned_hours, 0) AS extra_assigned_hours,
                 (
-                    COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0)
+                    COALESCE(umt.monthly_target, 0)
                     + COALESCE(umt.extra_assigned_hours, 0)
                 ) AS monthly_total_target,
 
@@ -498,7 +549,7 @@ def list_user_monthly_targets():
 
                 GREATEST(
                     (
-                        COALESCE(CAST(umt.monthly_target AS DECIMAL(10,2)), 0)
+                        COALESCE(umt.monthly_target, 0)
                         + COALESCE(umt.extra_assigned_hours, 0)
                     ) - COALESCE(SUM(twt.billable_hours), 0),
                     0
@@ -524,9 +575,13 @@ def list_user_monthly_targets():
         """
 
         # Params order:
-        # if month_year: umt_join(%s), twt_join(%s), qc_join(%s), then user_where params
+        # if month_year: umt_join(%s), twt_join(2x %s), qc_join(2x %s), then user_where params
         if month_year:
-            final_params = [month_year, month_year, month_year]
+            final_params = [
+                month_year_to_yyyymm(month_year),
+                month_start, month_end,
+                month_start[:10], month_end[:10],
+            ]
         else:
             final_params = []
         final_params.extend(user_params)
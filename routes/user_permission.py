@@ -1,6 +1,8 @@
 from flask import Blueprint, request
 from utils.response import api_response
 from config import get_db_connection
+from utils.role_context import get_user_role, invalidate_role_context
+from utils.session_token import current_user_id
 
 permission_bp = Blueprint("permission", __name__, url_prefix="/permission")
 
@@ -8,7 +10,7 @@ permission_bp = Blueprint("permission", __name__, url_prefix="/permission")
 @permission_bp.route("/user_list", methods=["POST"])
 def user_list_with_permissions():
     data = request.get_json() or {}
-    logged_in_user_id = data.get("logged_in_user_id")
+    logged_in_user_id = current_user_id(data)
     filter_role = data.get("role")  # Optional role filter
 
     if not logged_in_user_id:
@@ -19,19 +21,11 @@ def user_list_with_permissions():
 
     try:
         # 1) Get role of logged-in user
-        cursor.execute("""
-            SELECT r.role_name
-            FROM tfs_user u
-            JOIN user_role r ON r.role_id = u.role_id
-            WHERE u.user_id = %s AND u.is_active = 1 AND u.is_delete = 1
-        """, (logged_in_user_id,))
-        role_row = cursor.fetchone()
+        role = get_user_role(cursor, logged_in_user_id)
 
-        if not role_row:
+        if role is None:
             return api_response(404, "User not found")
 
-        role = (role_row["role_name"] or "").lower()
-
         # 2) Block QA and Agent
         if role in ["qa", "agent"]:
             return api_response(403, "You are not allowed to view user permissions", [])
@@ -126,19 +120,11 @@ def update_user_permission():
         # --------------------------------------------------
         # 1) Get role of logged-in user
         # --------------------------------------------------
-        cursor.execute("""
-            SELECT r.role_name
-            FROM tfs_user u
-            JOIN user_role r ON r.role_id = u.role_id
-            WHERE u.user_id = %s AND u.is_active = 1 AND u.is_delete = 1
-        """, (user_id,))
-        role_row = cursor.fetchone()
+        role = get_user_role(cursor, user_id)
 
-        if not role_row:
+        if role is None:
             return api_response(404, "User not found")
 
-        role = role_row["role_name"].lower()
-
         # --------------------------------------------------
         # 2) Block QA & Agent
         # --------------------------------------------------
@@ -210,6 +196,7 @@ def update_user_permission():
             ))
 
         conn.commit()
+        invalidate_role_context(target_user_id)
         return api_response(200, "User permissions updated successfully")
 
     except Exception as e:
@@ -1,31 +1,58 @@
-import requests
 import os
+import threading
+
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from utils.daily_hours import catch_up_range, run_assign_daily_hours
+
+# days before today the daily job re-checks, so a day missed while the app was
+# down (or the job failed) is filled on the next run
+SCHEDULER_CATCHUP_DAYS = int(os.getenv("SCHEDULER_CATCHUP_DAYS", "7"))
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1").strip().lower() in ("1", "true", "yes", "on")
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
 def assign_daily_hours_job():
     """
-    Job to call the /qc/assign-daily-hours endpoint.
+    Fills today's and the last SCHEDULER_CATCHUP_DAYS days' assigned hours
+    for every active agent (days that already have hours are left alone).
+    Every process schedules it; the GET_LOCK in run_assign_daily_hours() lets
+    only one of them do the work at a time.
     """
+    date_from, date_to = catch_up_range(SCHEDULER_CATCHUP_DAYS)
     try:
-        # Use an environment variable for the base URL, with a default for local development
-        base_url = os.getenv("API_BASE_URL", "http://127.0.0.1:5000")
-        url = f"{base_url}/qc/assign-daily-hours"
-        response = requests.post(url)
-        if response.status_code == 200:
-            print(f"Successfully triggered daily hour assignment: {response.json().get('message')}")
+        affected = run_assign_daily_hours(date_from, date_to)
+        if affected is None:
+            print("Daily hour assignment skipped: another process holds the lock.")
         else:
-            print(f"Failed to trigger daily hour assignment. Status: {response.status_code}, Response: {response.text}")
+            print(f"Daily hour assignment done for {date_from} to {date_to}: {affected} row(s) affected.")
     except Exception as e:
-        print(f"An error occurred during the scheduled job: {e}"
-              
-              )
+        print(f"An error occurred during the scheduled job: {e}")
+
 
 def start_scheduler():
     """
-    Initializes and starts the scheduler.
+    Starts this process' scheduler once (threads don't survive a fork, so
+    each gunicorn worker starts its own from app.before_request).
     """
-    scheduler = BackgroundScheduler(daemon=True)
-    # Schedule the job to run every day at 8:00 AM
-    scheduler.add_job(assign_daily_hours_job, 'cron', hour=8, minute=0)
-    scheduler.start()
-    print("Scheduler started. Daily hours assignment job is scheduled for 8:00 AM.")
+    global _scheduler, _scheduler_pid
+
+    if not SCHEDULER_ENABLED:
+        return
+    pid = os.getpid()
+    if _scheduler is not None and _scheduler_pid == pid:
+        return
+
+    with _scheduler_lock:
+        if _scheduler is not None and _scheduler_pid == pid:
+            return
+        scheduler = BackgroundScheduler(daemon=True)
+        # every day at 8:00 AM, plus one catch-up run right after start
+        scheduler.add_job(assign_daily_hours_job, 'cron', hour=8, minute=0)
+        scheduler.add_job(assign_daily_hours_job, 'date')
+        scheduler.start()
+        _scheduler, _scheduler_pid = scheduler, pid
+        print("Scheduler started. Daily hours assignment job is scheduled for 8:00 AM.")
@@ -1,3 +1,6 @@
+import json
+import time
+
 import requests
 
 BASE_URL = "http://192.168.125.158:5000/auth/user"
@@ -47,14 +50,55 @@ def test_register():
         print(response.text)
 
 
+def expired_session_token(user_id=1):
+    """A correctly signed session token issued just past SESSION_TOKEN_TTL_SECONDS."""
+    from itsdangerous import TimestampSigner, URLSafeTimedSerializer
+    from config import SESSION_SECRET_KEY, SESSION_TOKEN_TTL_SECONDS
+    from utils.session_token import SESSION_SALT
+
+    class IssuedLongAgo(TimestampSigner):
+        def get_timestamp(self):
+            return int(time.time()) - SESSION_TOKEN_TTL_SECONDS - 60
+
+    serializer = URLSafeTimedSerializer(SESSION_SECRET_KEY, signer=IssuedLongAgo)
+    return serializer.dumps({"uid": user_id, "role": "", "perm": {}}, salt=SESSION_SALT)
+
+
+def test_login_with_expired_token():
+    print("\n---- LOGIN WITH EXPIRED TOKEN TEST ----")
+
+    payload = {
+        "user_email": "sunny@transform.com",
+        "user_password": "123456"
+    }
+    headers = {"Authorization": f"Bearer {expired_session_token()}"}
+
+    response = requests.post(BASE_URL, json=payload, headers=headers)
+
+    print("STATUS:", response.status_code)
+    print("RESPONSE:")
+    try:
+        body = response.json()
+        print(json.dumps(body, indent=4))
+    except:
+        body = {}
+        print(response.text)
+
+    # the stale token must be ignored: same answer as a login without one
+    assert body.get("message") != "Invalid or expired session token", "login rejected the stale token"
+    assert response.status_code == 200, f"login failed: {response.status_code}"
+
+
 if __name__ == "__main__":
     choice = input(
-        "\nEnter 1 for LOGIN test or 2 for REGISTER test: "
+        "\nEnter 1 for LOGIN test, 2 for REGISTER test or 3 for LOGIN WITH EXPIRED TOKEN test: "
     ).strip()
 
     if choice == "1":
         test_login()
     elif choice == "2":
         test_register()
+    elif choice == "3":
+        test_login_with_expired_token()
     else:
         print("Invalid selection.")
\ No newline at end of file
@@ -1,22 +1,194 @@
-from config import get_db_connection
+# utils/api_log_utils.py
+#
+# Buffered API call logging.
+#
+# log_api_call() only appends a row to an in-process buffer; a background
+# thread writes the buffer to api_call_logs with one executemany() + commit
+# when API_LOG_BATCH_SIZE rows are waiting or every API_LOG_FLUSH_SECONDS,
+# whichever comes first. The buffer is drained on interpreter exit.
+#
+# Memory is bounded by API_LOG_MAX_BUFFER: when the DB is down or slow and the
+# buffer is full, new rows are dropped (and counted) instead of blocking the
+# request.
+#
+# Env:
+#   API_LOG_BATCH_SIZE    (default 100)
+#   API_LOG_FLUSH_SECONDS (default 2)
+#   API_LOG_MAX_BUFFER    (default 10000)
+
+import atexit
+import os
+import threading
+from collections import deque
 from datetime import datetime
 
-def log_api_call(api_name, user_id, device_id, device_type, api_call_time=None):
+from config import get_db_connection
+
+API_LOG_BATCH_SIZE = max(1, int(os.getenv("API_LOG_BATCH_SIZE", "100")))
+API_LOG_FLUSH_SECONDS = float(os.getenv("API_LOG_FLUSH_SECONDS", "2"))
+API_LOG_MAX_BUFFER = max(API_LOG_BATCH_SIZE, int(os.getenv("API_LOG_MAX_BUFFER", "10000")))
+
+INSERT_SQL = """
+    INSERT INTO api_call_logs (api_name, user_id, device_id, device_type, timestamp)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+class _ApiLogBuffer:
+    def __init__(self):
+        self._rows = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one writer at a time (thread vs atexit)
+        self._pid = None
+        self._thread = None
+        self.dropped = 0
+        self.written = 0
+        self.failed_flushes = 0
+
+    def add(self, row: tuple) -> bool:
+        self._ensure_thread()
+        with self._cond:
+            if len(self._rows) >= API_LOG_MAX_BUFFER:
+                self.dropped += 1
+                return False
+            self._rows.append(row)
+            if len(self._rows) >= API_LOG_BATCH_SIZE:
+                self._cond.notify()
+        return True
+
+    def _ensure_thread(self):
+        # threads don't survive a fork: each gunicorn worker starts its own
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._cond:
+            if self._pid != pid:
+                if self._pid is not None:
+                    self._rows.clear()  # parent's rows are the parent's to write
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name="api-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._rows) < API_LOG_BATCH_SIZE:
+                    self._cond.wait(timeout=API_LOG_FLUSH_SECONDS)
+            self.flush()
+
+    def _take_batch(self) -> list:
+        with self._cond:
+            n = min(len(self._rows), API_LOG_BATCH_SIZE)
+            return [self._rows.popleft() for _ in range(n)]
+
+    def _put_back(self, batch: list):
+        with self._cond:
+            room = API_LOG_MAX_BUFFER - len(self._rows)
+            keep = batch[:max(room, 0)]
+            self.dropped += len(batch) - len(keep)
+            self._rows.extendleft(reversed(keep))
+
+    def flush(self) -> int:
+        """Writes everything buffered so far; returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                try:
+                    _write_batch(batch)
+                except Exception as e:
+                    self.failed_flushes += 1
+                    print(f"API log error: {e} ({len(batch)} rows kept for retry)")
+                    self._put_back(batch)
+                    break
+                written += len(batch)
+                self.written += len(batch)
+        return written
+
+    def stats(self) -> dict:
+        with self._cond:
+            buffered = len(self._rows)
+        return {
+            "buffered": buffered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+def _write_batch(batch: list) -> None:
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        if api_call_time is None:
-            api_call_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute(
-            """
-            INSERT INTO api_call_logs (api_name, user_id, device_id, device_type, timestamp)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (api_name, user_id, device_id, device_type, api_call_time)
-        )
+        cursor.executemany(INSERT_SQL, batch)
         conn.commit()
-    except Exception as e:
-        print(f"API log error: {e}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+_buffer = _ApiLogBuffer()
+
+
+def log_api_call(api_name, user_id, device_id, device_type, api_call_time=None):
+    """Queues one api_call_logs row; never blocks on the database."""
+    if api_call_time is None:
+        api_call_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if not _buffer.add((api_name, user_id, device_id, device_type, api_call_time)):
+        if _buffer.dropped % 1000 == 1:  # don't flood stdout while the DB is away
+            print(f"API log buffer full, {_buffer.dropped} row(s) dropped so far")
+
+
+def flush_api_logs() -> int:
+    """Writes all buffered rows now (shutdown, scripts, tests)."""
+    return _buffer.flush()
+
+
+def api_log_stats() -> dict:
+    return _buffer.stats()
+
+
+atexit.register(flush_api_logs)
+
+
+def archive_api_logs(before: str, batch_size: int = 5000) -> int:
+    """
+    Moves api_call_logs rows with timestamp < before into api_call_logs_archive,
+    batch_size rows per transaction so the live table is never locked for long.
+    Returns the number of rows moved.
+    """
+    moved = 0
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        while True:
+            conn.start_transaction()
+            cursor.execute(
+                "SELECT id FROM api_call_logs WHERE timestamp < %s ORDER BY timestamp, id LIMIT %s FOR UPDATE",
+                (before, int(batch_size)),
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                conn.rollback()
+                break
+
+            marks = ",".join(["%s"] * len(ids))
+            cursor.execute(
+                f"INSERT IGNORE INTO api_call_logs_archive SELECT * FROM api_call_logs WHERE id IN ({marks})",
+                tuple(ids),
+            )
+            cursor.execute(f"DELETE FROM api_call_logs WHERE id IN ({marks})", tuple(ids))
+            conn.commit()
+            moved += len(ids)
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cursor.close()
         conn.close()
+    return moved
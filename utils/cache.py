@@ -0,0 +1,90 @@
+# utils/cache.py
+#
+# Small in-process TTL cache.
+#
+# Each gunicorn worker has its own copy, so invalidate() only reaches the
+# worker that handled the write; the TTL bounds how long the other workers
+# can serve a stale entry. Keep TTLs short for anything permission-related.
+
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int = 10000):
+        self.name = name
+        self.ttl = float(ttl_seconds)
+        self.max_entries = max(int(max_entries), 1)
+        self._data = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_load(self, key, loader, cache_none: bool = False):
+        """Cached value for key, else loader() (stored unless it returned None)."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        if value is not None or cache_none:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key=_MISSING) -> None:
+        """Drops one key, or everything when called without a key."""
+        with self._lock:
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def _evict(self) -> None:
+        # caller holds the lock: drop expired entries, then the oldest half if still full
+        now = time.monotonic()
+        for k in [k for k, (exp, _) in self._data.items() if exp <= now]:
+            del self._data[k]
+        if len(self._data) >= self.max_entries:
+            by_age = sorted(self._data, key=lambda k: self._data[k][0])
+            for k in by_age[: len(by_age) // 2 or 1]:
+                del self._data[k]
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        return {"size": size, "hits": self.hits, "misses": self.misses, "ttl": self.ttl}
+
+
+_registry = {}
+
+
+def make_cache(name: str, ttl_seconds: float, max_entries: int = 10000) -> TTLCache:
+    """Creates a named cache and registers it for cache_stats()."""
+    cache = TTLCache(name, ttl_seconds, max_entries)
+    _registry[name] = cache
+    return cache
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -1,5 +1,8 @@
 import os
+import shutil
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
@@ -11,6 +14,45 @@ FOLDER_TASK     = "hrms/task_files"
 FOLDER_PROFILE  = "hrms/profile_pictures"
 FOLDER_QC_REWORK = "hrms/qc_rework_files"
 
+# upper bound on concurrent Cloudinary calls made by upload_many()/delete_many()
+CLOUDINARY_MAX_WORKERS = max(1, int(os.getenv("CLOUDINARY_MAX_WORKERS", "4")))
+
+# CLOUDINARY_BACKEND=stub keeps uploads on local disk under
+# uploads/cloudinary_stub/upload/<public_id> instead of calling Cloudinary
+# (offline dev / testing). Stub URLs keep the ".../upload/<public_id>" shape,
+# so _extract_public_id() and delete_from_cloudinary() work unchanged.
+CLOUDINARY_BACKEND = os.getenv("CLOUDINARY_BACKEND", "cloudinary").strip().lower()
+_STUB_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads", "cloudinary_stub")
+_STUB_URL = os.getenv("BASE_UPLOAD_URL", "/uploads").rstrip("/") + "/cloudinary_stub/upload/"
+
+
+def _stub_path(public_id: str) -> str:
+    path = os.path.abspath(os.path.join(_STUB_ROOT, "upload", public_id))
+    if os.path.commonpath([_STUB_ROOT, path]) != _STUB_ROOT:
+        raise ValueError("Invalid public_id")
+    return path
+
+
+def _stub_upload(source, folder: str, stem: str):
+    public_id = f"{folder}/{stem}"
+    path = _stub_path(public_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if hasattr(source, "read"):
+        source.save(path)
+    else:
+        shutil.copyfile(source, path)
+    print(f"✅ Cloudinary stub upload OK: {public_id}")
+    return _STUB_URL + public_id, public_id
+
+
+def _stub_delete(public_id: str) -> bool:
+    path = _stub_path(public_id)
+    if os.path.exists(path):
+        os.remove(path)
+        print(f"✅ Cloudinary stub delete OK: {public_id}")
+        return True
+    return False
+
 
 def _extract_public_id(url_or_public_id: str) -> str:
     """
@@ -60,6 +102,9 @@ def upload_to_cloudinary(source, folder: str, display_name: str = None, resource
     # Note: Using the explicit `folder` argument ensures Cloudinary places
     # the file in the correct visual folder in their Media Library GUI.
     
+    if CLOUDINARY_BACKEND == "stub":
+        return _stub_upload(source, folder, stem)
+
     # Accept both FileStorage and file paths
     if hasattr(source, "read"):
         # werkzeug FileStorage
@@ -97,6 +142,9 @@ def delete_from_cloudinary(url_or_public_id: str, resource_type: str = "raw") ->
     public_id = _extract_public_id(url_or_public_id)
 
     try:
+        if CLOUDINARY_BACKEND == "stub":
+            return _stub_delete(public_id)
+
         result = cloudinary.uploader.destroy(public_id, resource_type=resource_type)
         success = result.get("result") == "ok"
         if success:
@@ -109,6 +157,69 @@ def delete_from_cloudinary(url_or_public_id: str, resource_type: str = "raw") ->
         return False
 
 
+def _timed_upload(item: dict) -> dict:
+    started = time.monotonic()
+    url, public_id = upload_to_cloudinary(
+        item["source"],
+        item["folder"],
+        display_name=item.get("display_name"),
+        resource_type=item.get("resource_type", "raw"),
+    )
+    return {"url": url, "public_id": public_id, "seconds": round(time.monotonic() - started, 3)}
+
+
+def upload_many(items: list[dict]) -> list[dict]:
+    """
+    Upload several files concurrently (at most CLOUDINARY_MAX_WORKERS at a time).
+
+    Args:
+        items: [{"source": FileStorage | path, "folder": FOLDER_*,
+                 "display_name": str, "resource_type": "raw"}, ...]
+
+    Returns:
+        [{"url", "public_id", "seconds"}, ...] in the same order as items.
+
+    All-or-nothing: if any upload fails, the ones that succeeded are deleted
+    again and the first error is raised.
+    """
+    if not items:
+        return []
+
+    started = time.monotonic()
+    results = [None] * len(items)
+    errors = []
+
+    with ThreadPoolExecutor(max_workers=min(CLOUDINARY_MAX_WORKERS, len(items))) as pool:
+        futures = [pool.submit(_timed_upload, item) for item in items]
+        for idx, future in enumerate(futures):
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                errors.append(e)
+
+    if errors:
+        delete_many([r["url"] for r in results if r])
+        raise errors[0]
+
+    for item, r in zip(items, results):
+        print(f"⏱  Cloudinary upload {item.get('display_name')}: {r['seconds']:.2f}s")
+    print(f"⏱  Cloudinary upload_many: {len(items)} file(s) in {time.monotonic() - started:.2f}s")
+    return results
+
+
+def delete_many(urls_or_public_ids, resource_type: str = "raw") -> int:
+    """
+    Delete several files concurrently. Never raises; returns how many were deleted.
+    """
+    refs = [u for u in urls_or_public_ids or [] if u]
+    if not refs:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=min(CLOUDINARY_MAX_WORKERS, len(refs))) as pool:
+        deleted = sum(pool.map(lambda ref: delete_from_cloudinary(ref, resource_type=resource_type), refs))
+    return deleted
+
+
 def check_cloudinary_connection() -> bool:
     """
     Test Cloudinary connection.
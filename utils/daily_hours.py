@@ -0,0 +1,123 @@
+# utils/daily_hours.py
+#
+# Daily assigned hours for agents (temp_qc.assigned_hours).
+#
+# One INSERT ... SELECT ... ON DUPLICATE KEY UPDATE covers every active agent
+# for every day of a range (a recursive CTE generates the days), so today's
+# run and a catch-up over missed days are the same single statement.
+#
+# run_assign_daily_hours() wraps it in a MySQL advisory lock (GET_LOCK), so
+# with several gunicorn workers / nodes only one of them runs a given job.
+#
+# Env:
+#   DAILY_ASSIGNED_HOURS   (default 9)
+#   DAILY_HOURS_MAX_DAYS   (default 366; longest range one call may fill)
+
+import os
+from datetime import date, datetime, timedelta
+
+from config import get_db_connection
+
+DAILY_ASSIGNED_HOURS = float(os.getenv("DAILY_ASSIGNED_HOURS", "9"))
+DAILY_HOURS_MAX_DAYS = int(os.getenv("DAILY_HOURS_MAX_DAYS", "366"))
+
+ASSIGN_LOCK_NAME = "tfshrms:assign_daily_hours"
+
+QC_DATE_COL = "date"  # temp_qc date column (TEXT 'YYYY-MM-DD')
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date()
+
+
+def assign_daily_hours(cursor, date_from, date_to=None, hours=None, overwrite=False) -> int:
+    """
+    Gives every active agent `hours` (default DAILY_ASSIGNED_HOURS) for each
+    day in [date_from, date_to] in one statement; returns the affected rows.
+
+    overwrite=True replaces assigned_hours on existing rows (what the daily
+    endpoint always did for today). overwrite=False only fills days that have
+    no assigned_hours yet, so a backfill never undoes manual edits.
+    """
+    d_from = _as_date(date_from)
+    d_to = _as_date(date_to) if date_to else d_from
+    if d_to < d_from:
+        raise ValueError("date_to is before date_from")
+    if (d_to - d_from).days + 1 > DAILY_HOURS_MAX_DAYS:
+        raise ValueError(f"At most {DAILY_HOURS_MAX_DAYS} days per call")
+
+    hours = DAILY_ASSIGNED_HOURS if hours is None else float(hours)
+    now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    if overwrite:
+        on_duplicate = """
+            assigned_hours = VALUES(assigned_hours),
+            updated_date = VALUES(updated_date)
+        """
+    else:
+        # updated_date first: it must still see the old assigned_hours
+        on_duplicate = """
+            updated_date = IF(temp_qc.assigned_hours IS NULL, VALUES(updated_date), temp_qc.updated_date),
+            assigned_hours = COALESCE(temp_qc.assigned_hours, VALUES(assigned_hours))
+        """
+
+    cursor.execute(
+        f"""
+        INSERT INTO temp_qc (user_id, assigned_hours, {QC_DATE_COL}, updated_date)
+        WITH RECURSIVE days (d) AS (
+            SELECT CAST(%s AS DATE)
+            UNION ALL
+            SELECT d + INTERVAL 1 DAY FROM days WHERE d < CAST(%s AS DATE)
+        )
+        SELECT u.user_id, %s, CAST(days.d AS CHAR(10)), %s
+        FROM tfs_user u
+        JOIN user_role ur ON u.role_id = ur.role_id
+        CROSS JOIN days
+        WHERE ur.role_name = 'agent' AND u.is_active = 1 AND u.is_delete = 1
+        ON DUPLICATE KEY UPDATE {on_duplicate}
+        """,
+        (d_from.isoformat(), d_to.isoformat(), hours, now_str),
+    )
+    return cursor.rowcount
+
+
+def run_assign_daily_hours(date_from, date_to=None, overwrite=False, lock_timeout=0) -> int | None:
+    """
+    assign_daily_hours() in its own transaction under GET_LOCK.
+    Returns the affected rows, or None when another process holds the lock.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    locked = False
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (ASSIGN_LOCK_NAME, int(lock_timeout)))
+        locked = (cursor.fetchone() or [0])[0] == 1
+        if not locked:
+            return None
+
+        affected = assign_daily_hours(cursor, date_from, date_to, overwrite=overwrite)
+        conn.commit()
+        return affected
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if locked:
+            # the lock belongs to the session: release before the connection goes back to the pool
+            try:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (ASSIGN_LOCK_NAME,))
+                cursor.fetchall()
+            except Exception as e:
+                print(f"assign_daily_hours: RELEASE_LOCK failed: {e}")
+        cursor.close()
+        conn.close()
+
+
+def catch_up_range(days: int, today: date | None = None) -> tuple[date, date]:
+    """[today - days, today]: the window the scheduler keeps filled."""
+    today = today or date.today()
+    return today - timedelta(days=max(int(days), 0)), today
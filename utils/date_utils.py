@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+SQL_DT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_month_year(month_year) -> datetime | None:
+    """
+    Accepts: Jan2026 / jan2026 / JAN2026
+    Returns: datetime for the 1st of that month, or None if not parseable.
+    """
+    s = str(month_year or "").strip()
+    if not s:
+        return None
+    try:
+        return datetime.strptime(s.title(), "%b%Y")
+    except ValueError:
+        return None
+
+
+def normalize_month_year(month_year) -> str | None:
+    """Jan2026 / jan2026 / JAN2026 -> 'Jan2026'; None if not parseable."""
+    dt = parse_month_year(month_year)
+    return dt.strftime("%b%Y") if dt else None
+
+
+def month_year_to_yyyymm(month_year) -> int | None:
+    """Jan2026 -> 202601, the integer month key stored in the yyyymm columns."""
+    dt = parse_month_year(month_year)
+    return dt.year * 100 + dt.month if dt else None
+
+
+def month_bounds(year: int, month: int) -> tuple[str, str]:
+    """
+    Half-open range [first day of month, first day of next month) as
+    'YYYY-MM-DD HH:MM:SS' strings, for sargable predicates like
+    twt.date_time_dt >= %s AND twt.date_time_dt < %s
+    """
+    start = datetime(int(year), int(month), 1)
+    if start.month == 12:
+        end = datetime(start.year + 1, 1, 1)
+    else:
+        end = datetime(start.year, start.month + 1, 1)
+    return start.strftime(SQL_DT_FORMAT), end.strftime(SQL_DT_FORMAT)
+
+
+def month_year_bounds(month_year) -> tuple[str, str] | None:
+    """month_bounds() for a MonYYYY string; None if month_year is invalid."""
+    dt = parse_month_year(month_year)
+    if not dt:
+        return None
+    return month_bounds(dt.year, dt.month)
+
+
+def day_bounds(value) -> tuple[str, str] | None:
+    """Half-open range for one calendar day given 'YYYY-MM-DD[ ...]'."""
+    try:
+        day = datetime.strptime(str(value or "").strip()[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    return day.strftime(SQL_DT_FORMAT), (day + timedelta(days=1)).strftime(SQL_DT_FORMAT)
@@ -0,0 +1,259 @@
+import os
+import queue
+import threading
+import time
+
+import mysql.connector
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be borrowed within the pool timeout."""
+
+
+class PooledConnection:
+    """
+    Thin proxy around a mysql.connector connection.
+
+    Route code keeps calling conn.close() exactly like before; for a pooled
+    connection that hands it back to the pool instead of closing the socket.
+    Everything else (cursor, commit, rollback, start_transaction, ...) is
+    forwarded to the real connection.
+    """
+
+    def __init__(self, pool, raw, is_overflow=False):
+        self._pool = pool
+        self._raw = raw
+        self._is_overflow = is_overflow
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._release(self._raw, self._is_overflow)
+
+
+class ConnectionPool:
+    """
+    Fixed-size MySQL connection pool with bounded overflow.
+
+    - pool_size connections are kept open and reused between requests
+    - up to max_overflow extra connections are opened under burst load and
+      closed again when returned
+    - borrowing blocks for at most timeout seconds, then raises PoolTimeoutError
+    - every borrowed connection is pinged first (pre_ping) and reconnected if
+      the server dropped it (wait_timeout, restarts, ...)
+
+    One pool exists per process (see get_pool); gunicorn forks workers after
+    importing the app, so the pool is created lazily and re-created if the pid
+    changes, which means sockets are never shared between workers.
+    """
+
+    def __init__(self, connect_kwargs, pool_size=5, max_overflow=10, timeout=30.0, pre_ping=True):
+        self._connect_kwargs = dict(connect_kwargs)
+        self.pool_size = max(int(pool_size), 1)
+        self.max_overflow = max(int(max_overflow), 0)
+        self.timeout = float(timeout)
+        self.pre_ping = bool(pre_ping)
+
+        self._idle = queue.LifoQueue(maxsize=self.pool_size)
+        self._lock = threading.Lock()
+        self._created = 0      # permanent connections opened so far
+        self._overflow = 0     # overflow connections currently open
+        self._in_use = 0
+
+        # metrics
+        self._borrow_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._peak_in_use = 0
+
+    # ------------------------
+    # borrow / release
+    # ------------------------
+    def _connect(self):
+        return mysql.connector.connect(**self._connect_kwargs)
+
+    def get_connection(self) -> PooledConnection:
+        started = time.monotonic()
+        raw, is_overflow = self._acquire(started)
+        try:
+            raw = self._check_health(raw)
+        except Exception:
+            self._discard(is_overflow)
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._borrow_count += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        return PooledConnection(self, raw, is_overflow)
+
+    def _acquire(self, started):
+        while True:
+            # 1) idle connection available right away
+            try:
+                return self._idle.get_nowait(), False
+            except queue.Empty:
+                pass
+
+            # 2) room to open a new permanent or overflow connection
+            with self._lock:
+                if self._created < self.pool_size:
+                    self._created += 1
+                    slot = "permanent"
+                elif self._overflow < self.max_overflow:
+                    self._overflow += 1
+                    slot = "overflow"
+                else:
+                    slot = None
+
+            if slot:
+                try:
+                    return self._connect(), slot == "overflow"
+                except Exception:
+                    self._discard(slot == "overflow")
+                    raise
+
+            # 3) wait for someone to give one back; re-check slots periodically
+            #    because closed overflow / broken connections free a slot
+            #    without putting anything on the idle queue
+            remaining = self.timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeoutError(
+                    f"No database connection available within {self.timeout:.1f}s "
+                    f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+                )
+            try:
+                return self._idle.get(timeout=min(remaining, 0.25)), False
+            except queue.Empty:
+                continue
+
+    def _check_health(self, raw):
+        if not self.pre_ping:
+            return raw
+        try:
+            raw.ping(reconnect=False)
+            return raw
+        except Exception:
+            with self._lock:
+                self._reconnects += 1
+            try:
+                raw.close()
+            except Exception:
+                pass
+            return self._connect()
+
+    def _release(self, raw, is_overflow):
+        with self._lock:
+            self._in_use = max(self._in_use - 1, 0)
+
+        # never hand an open transaction / snapshot to the next borrower
+        try:
+            if raw.is_connected():
+                raw.rollback()
+            else:
+                raise ConnectionError("connection lost")
+        except Exception:
+            try:
+                raw.close()
+            except Exception:
+                pass
+            self._discard(is_overflow)
+            return
+
+        if is_overflow:
+            try:
+                raw.close()
+            finally:
+                self._discard(True)
+            return
+
+        try:
+            self._idle.put_nowait(raw)
+        except queue.Full:
+            raw.close()
+            self._discard(False)
+
+    def _discard(self, is_overflow):
+        """Forget a slot whose connection was closed or never opened."""
+        with self._lock:
+            if is_overflow:
+                self._overflow = max(self._overflow - 1, 0)
+            else:
+                self._created = max(self._created - 1, 0)
+
+    # ------------------------
+    # metrics
+    # ------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            capacity = self.pool_size + self.max_overflow
+            return {
+                "pid": os.getpid(),
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "open_connections": self._created + self._overflow,
+                "idle": self._idle.qsize(),
+                "in_use": self._in_use,
+                "overflow_in_use": self._overflow,
+                "peak_in_use": self._peak_in_use,
+                "utilization": round(self._in_use / capacity, 4) if capacity else 0,
+                "borrow_count": self._borrow_count,
+                "wait_time_total_ms": round(self._wait_total * 1000, 2),
+                "wait_time_avg_ms": round(self._wait_total * 1000 / self._borrow_count, 3) if self._borrow_count else 0,
+                "wait_time_max_ms": round(self._wait_max * 1000, 2),
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    val = os.getenv(name)
+    if val is None:
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_pool(connect_kwargs: dict) -> ConnectionPool:
+    """Per-process pool, (re)created lazily so forked gunicorn workers never share sockets."""
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = ConnectionPool(
+                connect_kwargs,
+                pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+                max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            )
+            _pool_pid = pid
+    return _pool
+
+
+def pool_stats() -> dict | None:
+    """Metrics for the current process' pool (None until the first borrow)."""
+    if _pool is None or _pool_pid != os.getpid():
+        return None
+    return _pool.stats()
@@ -0,0 +1,360 @@
+# utils/email_outbox.py
+#
+# Outgoing mail goes through the email_outbox table instead of being sent
+# while the HTTP request waits.
+#
+# A request calls queue_email() (ideally with its own cursor, so the mail is
+# committed together with whatever caused it) and wake_email_sender() after
+# the commit. A sender thread (one per process) claims due rows in batches,
+# sends each batch over one SMTP session and writes the outcome back:
+#   sent    -> status 'sent'
+#   5xx     -> status 'failed' (the relay will never take it)
+#   other   -> retried with exponential backoff, 'failed' after EMAIL_MAX_ATTEMPTS
+# If the connection itself fails, the rest of the batch is released untouched
+# and the sender backs off until its next poll.
+#
+# Rows are claimed with one UPDATE ... LIMIT, so several gunicorn workers can
+# run a sender each without sending a mail twice. A claim older than
+# EMAIL_CLAIM_TIMEOUT_SECONDS (process died mid-batch) is taken over again.
+# Delivery is at-least-once: a crash between the SMTP send and the status
+# write sends that mail again.
+#
+# `python manage.py send-emails` drains the outbox once from the command line
+# (e.g. against a local SMTP stand-in, see utils/email_utils.py).
+#
+# Env:
+#   EMAIL_BATCH_SIZE            (default 50)
+#   EMAIL_MAX_ATTEMPTS          (default 6)
+#   EMAIL_RETRY_BASE_SECONDS    (default 30; delay = base * 2**(attempt-1), max 1 h)
+#   EMAIL_POLL_SECONDS          (default 10)
+#   EMAIL_CLAIM_TIMEOUT_SECONDS (default 600)
+
+import os
+import smtplib
+import threading
+import time
+import uuid
+
+from config import get_db_connection
+from utils.email_utils import build_message, open_smtp, smtp_settings
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = 60 * 60
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", "10"))
+EMAIL_CLAIM_TIMEOUT_SECONDS = int(os.getenv("EMAIL_CLAIM_TIMEOUT_SECONDS", "600"))
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+# ------------------------
+# request side
+# ------------------------
+def queue_email(to_email: str, subject: str, html_body: str, cursor=None) -> int:
+    """
+    Adds a mail to the outbox and returns its id.
+
+    With a cursor the row is part of the caller's transaction: commit, then
+    call wake_email_sender(). Without one it is committed (and the sender
+    woken) right away on a pooled connection.
+    """
+    sql = """
+        INSERT INTO email_outbox (to_email, subject, html_body, status, attempts, next_attempt_at, created_at)
+        VALUES (%s, %s, %s, %s, 0, NOW(), NOW())
+    """
+    params = (to_email, subject, html_body, STATUS_PENDING)
+    if cursor is not None:
+        cursor.execute(sql, params)
+        return cursor.lastrowid
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        conn.commit()
+        outbox_id = cur.lastrowid
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    wake_email_sender()
+    return outbox_id
+
+
+def wake_email_sender() -> None:
+    """Lets this process' sender pick up just-committed mail without waiting for its poll."""
+    ensure_email_sender()
+    _sender.wake()
+
+
+# ------------------------
+# claiming / bookkeeping
+# ------------------------
+def _claim_batch(limit: int) -> list[dict]:
+    token = uuid.uuid4().hex
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            UPDATE email_outbox
+            SET status = %s, locked_by = %s, locked_at = NOW()
+            WHERE (status = %s AND next_attempt_at <= NOW())
+               OR (status = %s AND locked_at < NOW() - INTERVAL %s SECOND)
+            ORDER BY id
+            LIMIT %s
+            """,
+            (STATUS_SENDING, token, STATUS_PENDING, STATUS_SENDING, EMAIL_CLAIM_TIMEOUT_SECONDS, int(limit)),
+        )
+        conn.commit()
+        if not cursor.rowcount:
+            return []
+        cursor.execute(
+            """
+            SELECT id, to_email, subject, html_body, attempts, locked_by
+            FROM email_outbox
+            WHERE locked_by = %s AND status = %s
+            ORDER BY id
+            """,
+            (token, STATUS_SENDING),
+        )
+        return cursor.fetchall() or []
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _retry_delay(attempts: int) -> int:
+    return int(min(EMAIL_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), EMAIL_RETRY_MAX_SECONDS))
+
+
+def _record_results(token: str, sent: list, errors: list, released: list) -> None:
+    """
+    sent:     outbox ids delivered
+    errors:   [(row, error text, permanent)]
+    released: outbox ids never attempted (connection went away first)
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if sent:
+            placeholders = ", ".join(["%s"] * len(sent))
+            cursor.execute(
+                f"""
+                UPDATE email_outbox
+                SET status = %s, attempts = attempts + 1, sent_at = NOW(),
+                    last_error = NULL, locked_by = NULL, locked_at = NULL
+                WHERE locked_by = %s AND id IN ({placeholders})
+                """,
+                (STATUS_SENT, token, *sent),
+            )
+        if errors:
+            params = []
+            for row, error, permanent in errors:
+                attempts = int(row.get("attempts") or 0) + 1
+                give_up = permanent or attempts >= EMAIL_MAX_ATTEMPTS
+                params.append((
+                    STATUS_FAILED if give_up else STATUS_PENDING,
+                    0 if give_up else _retry_delay(attempts),
+                    error[:2000],
+                    row["id"],
+                    token,
+                ))
+            cursor.executemany(
+                """
+                UPDATE email_outbox
+                SET status = %s, attempts = attempts + 1,
+                    next_attempt_at = NOW() + INTERVAL %s SECOND,
+                    last_error = %s, locked_by = NULL, locked_at = NULL
+                WHERE id = %s AND locked_by = %s
+                """,
+                params,
+            )
+        if released:
+            placeholders = ", ".join(["%s"] * len(released))
+            cursor.execute(
+                f"""
+                UPDATE email_outbox
+                SET status = %s, locked_by = NULL, locked_at = NULL
+                WHERE locked_by = %s AND id IN ({placeholders})
+                """,
+                (STATUS_PENDING, token, *released),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# ------------------------
+# sending
+# ------------------------
+def _permanent(error: Exception) -> bool:
+    """5xx from the relay: retrying the same mail won't help."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(code >= 500 for code in codes)
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def send_batch(rows: list[dict]) -> dict:
+    """
+    Sends claimed rows over one SMTP session and records the outcome.
+    Returns {"sent", "retry", "failed", "released", "connection_error"}.
+    """
+    sent, errors, released = [], [], []
+    connection_error = None
+
+    server = None
+    try:
+        settings = smtp_settings()
+        server = open_smtp(settings)
+    except Exception as e:
+        connection_error = e
+
+    if server is not None:
+        try:
+            for idx, row in enumerate(rows):
+                try:
+                    sender, msg = build_message(row["to_email"], row["subject"], row["html_body"], settings)
+                    server.sendmail(sender, [row["to_email"]], msg.as_string())
+                    sent.append(row["id"])
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                    # the session is still usable (smtplib resets it)
+                    errors.append((row, str(e), _permanent(e)))
+                except Exception as e:
+                    # connection dropped / timed out: this row counts as an attempt, the rest wait
+                    errors.append((row, str(e), False))
+                    released = [r["id"] for r in rows[idx + 1:]]
+                    connection_error = e
+                    break
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+    else:
+        errors = [(row, f"SMTP connect failed: {connection_error}", False) for row in rows[:1]]
+        released = [row["id"] for row in rows[1:]]
+
+    token = rows[0]["locked_by"] if rows else None
+    if rows:
+        _record_results(token, sent, errors, released)
+
+    result = {
+        "sent": len(sent),
+        "retry": sum(1 for row, _, permanent in errors
+                     if not permanent and int(row.get("attempts") or 0) + 1 < EMAIL_MAX_ATTEMPTS),
+        "failed": 0,
+        "released": len(released),
+        "connection_error": str(connection_error) if connection_error else None,
+    }
+    result["failed"] = len(errors) - result["retry"]
+    _note(result)
+    return result
+
+
+def drain_outbox(max_batches: int | None = None) -> dict:
+    """
+    Sends due mail batch by batch until none is left (or max_batches), and
+    stops early on a connection error. Returns the summed counters.
+    """
+    totals = {"sent": 0, "retry": 0, "failed": 0, "released": 0, "batches": 0, "connection_error": None}
+    while max_batches is None or totals["batches"] < max_batches:
+        rows = _claim_batch(EMAIL_BATCH_SIZE)
+        if not rows:
+            break
+        result = send_batch(rows)
+        totals["batches"] += 1
+        for key in ("sent", "retry", "failed", "released"):
+            totals[key] += result[key]
+        if result["connection_error"]:
+            totals["connection_error"] = result["connection_error"]
+            break
+    return totals
+
+
+# ------------------------
+# worker
+# ------------------------
+_stats = {"sent": 0, "retry": 0, "failed": 0, "last_error": None, "last_batch_at": None}
+_stats_lock = threading.Lock()
+
+
+def _note(result: dict) -> None:
+    with _stats_lock:
+        for key in ("sent", "retry", "failed"):
+            _stats[key] += result[key]
+        _stats["last_batch_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        if result["connection_error"]:
+            _stats["last_error"] = result["connection_error"]
+
+
+class _EmailSender:
+    def __init__(self):
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                totals = drain_outbox()
+                if totals["batches"]:
+                    print(
+                        f"Email outbox: sent {totals['sent']}, retry {totals['retry']}, "
+                        f"failed {totals['failed']} in {totals['batches']} batch(es)"
+                        + (f"; connection error: {totals['connection_error']}" if totals["connection_error"] else "")
+                    )
+            except Exception as e:
+                print(f"Email outbox: drain failed: {e}")
+                with _stats_lock:
+                    _stats["last_error"] = str(e)
+            self._wake.wait(timeout=EMAIL_POLL_SECONDS)
+            self._wake.clear()
+
+
+_sender = None
+_sender_pid = None
+_sender_lock = threading.Lock()
+
+
+def ensure_email_sender() -> None:
+    """Starts this process' sender thread once (threads don't survive a fork)."""
+    global _sender, _sender_pid
+
+    pid = os.getpid()
+    if _sender is not None and _sender_pid == pid:
+        return
+
+    with _sender_lock:
+        if _sender is None or _sender_pid != pid:
+            sender = _EmailSender()
+            _sender, _sender_pid = sender, pid
+            sender.start()
+
+
+def email_outbox_stats() -> dict | None:
+    if _sender is None or _sender_pid != os.getpid():
+        return None
+    with _stats_lock:
+        return {"pid": _sender_pid, **_stats}
@@ -3,26 +3,70 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+# Env:
+#   SMTP_HOST, SMTP_PORT (587), SMTP_USER, SMTP_PASS, SMTP_FROM_NAME
+#   SMTP_FROM_EMAIL      (default SMTP_USER)
+#   SMTP_STARTTLS        (default 1; 0 for a plain local relay / test server)
+#   SMTP_TIMEOUT_SECONDS (default 30)
+#
+# Login only happens when SMTP_USER and SMTP_PASS are both set, so a local
+# stand-in such as `python -m aiosmtpd -n -l localhost:1025` works with
+# SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=0 SMTP_FROM_EMAIL=...
 
-def send_email(to_email: str, subject: str, html_body: str):
-    host = os.getenv("SMTP_HOST")
-    port = int(os.getenv("SMTP_PORT", "587"))
-    user = os.getenv("SMTP_USER")
-    password = os.getenv("SMTP_PASS")
-    from_name = os.getenv("SMTP_FROM_NAME", "No-Reply")
 
-    if not all([host, user, password]):
+def smtp_settings() -> dict:
+    settings = {
+        "host": os.getenv("SMTP_HOST"),
+        "port": int(os.getenv("SMTP_PORT", "587")),
+        "user": os.getenv("SMTP_USER"),
+        "password": os.getenv("SMTP_PASS"),
+        "from_name": os.getenv("SMTP_FROM_NAME", "No-Reply"),
+        "from_email": os.getenv("SMTP_FROM_EMAIL") or os.getenv("SMTP_USER"),
+        "starttls": os.getenv("SMTP_STARTTLS", "1").strip().lower() in ("1", "true", "yes", "on"),
+        "timeout": float(os.getenv("SMTP_TIMEOUT_SECONDS", "30")),
+    }
+    if not settings["host"] or not settings["from_email"]:
+        raise RuntimeError("SMTP configuration missing")
+    if settings["starttls"] and not (settings["user"] and settings["password"]):
         raise RuntimeError("SMTP configuration missing")
+    return settings
+
+
+def open_smtp(settings: dict | None = None) -> smtplib.SMTP:
+    """Connected (and logged in) SMTP session; the caller closes it (or uses `with`)."""
+    settings = settings or smtp_settings()
+    server = smtplib.SMTP(settings["host"], settings["port"], timeout=settings["timeout"])
+    try:
+        server.ehlo()
+        if settings["starttls"]:
+            server.starttls()
+            server.ehlo()
+        if settings["user"] and settings["password"]:
+            server.login(settings["user"], settings["password"])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def build_message(to_email: str, subject: str, html_body: str, settings: dict | None = None):
+    """(envelope sender, message) for an HTML mail."""
+    settings = settings or smtp_settings()
+    sender = settings["from_email"]
 
     msg = MIMEMultipart("alternative")
-    msg["From"] = f"{from_name} <{user}>"
+    msg["From"] = f"{settings['from_name']} <{sender}>"
     msg["To"] = to_email
     msg["Subject"] = subject
 
     msg.attach(MIMEText(html_body, "html"))
+    return sender, msg
 
-    with smtplib.SMTP(host, port) as server:
-        server.ehlo()
-        server.starttls()
-        server.login(user, password)
-        server.sendmail(user, [to_email], msg.as_string())
+
+def send_email(to_email: str, subject: str, html_body: str):
+    """Sends one mail right away (own SMTP session). Requests should use email_outbox.queue_email()."""
+    settings = smtp_settings()
+    sender, msg = build_message(to_email, subject, html_body, settings)
+
+    with open_smtp(settings) as server:
+        server.sendmail(sender, [to_email], msg.as_string())
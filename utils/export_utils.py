@@ -0,0 +1,117 @@
+# utils/export_utils.py
+#
+# Streaming exports (NDJSON / CSV).
+#
+# The query runs on its own pooled connection with an unbuffered cursor and is
+# read in fetchmany() batches inside a generator, so a worker only ever holds
+# one batch in memory no matter how many rows the export has.
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, stream_with_context
+
+from config import get_db_connection
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_format(value) -> str | None:
+    """'ndjson' (default) or 'csv'; None if unsupported."""
+    fmt = (value or "ndjson").strip().lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+def iter_query_rows(query: str, params, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yields dict rows from an unbuffered cursor, batch_size at a time."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(query, tuple(params))
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                yield row
+    finally:
+        # client may disconnect mid-stream: unread rows make close() complain,
+        # the pool then drops that connection instead of reusing it
+        try:
+            cursor.close()
+        except Exception as e:
+            print(f"Export cursor close failed: {e}")
+        conn.close()
+
+
+def _ndjson_chunks(rows, transform):
+    for row in rows:
+        if transform:
+            row = transform(row)
+        yield json.dumps({k: _plain(v) for k, v in row.items()}, default=str) + "\n"
+
+
+def _csv_chunks(rows, transform, columns):
+    buf = io.StringIO()
+    writer = None
+    pending = 0
+
+    for row in rows:
+        if transform:
+            row = transform(row)
+        if writer is None:
+            writer = csv.DictWriter(buf, fieldnames=list(columns or row.keys()), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow({k: _plain(v) for k, v in row.items()})
+        pending += 1
+
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            pending = 0
+
+    if writer is None and columns:
+        csv.writer(buf).writerow(columns)
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def stream_export(rows, fmt: str, filename: str, columns=None, transform=None) -> Response:
+    """
+    Wraps a row iterator into a streamed download.
+
+    rows: iterator of dicts (usually iter_query_rows(...))
+    columns: CSV header order (defaults to the first row's keys)
+    transform: optional per-row callable (e.g. URL normalization)
+    """
+    if fmt == "csv":
+        body = _csv_chunks(rows, transform, columns)
+    else:
+        body = _ndjson_chunks(rows, transform)
+
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
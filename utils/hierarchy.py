@@ -0,0 +1,204 @@
+# utils/hierarchy.py
+#
+# Reporting hierarchy (who reports to whom).
+#
+# tfs_user.project_manager_id / asst_manager_id / qa_id hold JSON-or-CSV id
+# lists ('[78,81]', '78,81', '78', ...). They stay the source the UI reads,
+# but visibility checks go through the normalized user_supervisor table so
+# "users under X" is an index seek instead of a FIND_IN_SET scan of tfs_user.
+#
+# cached_reporting_user_ids() keeps those id sets in memory for
+# SUBORDINATE_CACHE_TTL_SECONDS (default 120); routes that change the
+# hierarchy or a user's active flag call invalidate_subordinate_cache()
+# after their commit.
+
+import json
+import os
+
+from utils.cache import make_cache
+
+SUBORDINATE_CACHE_TTL_SECONDS = float(os.getenv("SUBORDINATE_CACHE_TTL_SECONDS", "120"))
+
+_subordinate_cache = make_cache("subordinates", SUBORDINATE_CACHE_TTL_SECONDS)
+
+# relation -> tfs_user column it mirrors
+RELATION_COLUMNS = {
+    "project_manager": "project_manager_id",
+    "asst_manager": "asst_manager_id",
+    "qa": "qa_id",
+}
+
+# role_name (lowercase) -> relation that role supervises through
+ROLE_RELATIONS = {
+    "manager": "project_manager",
+    "project manager": "project_manager",
+    "product manager": "project_manager",
+    "assistant manager": "asst_manager",
+    "qa": "qa",
+}
+
+
+def parse_id_list(value) -> list[int]:
+    """
+    Converts a stored/submitted id list to unique ints (order kept).
+    Handles: None, '', 78, '78', '78,81', '[78,81]', '["78","81"]', [78, '81']
+    """
+    if value is None:
+        return []
+
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif isinstance(value, int):
+        items = [value]
+    else:
+        s = str(value).strip()
+        if not s:
+            return []
+        try:
+            parsed = json.loads(s)
+            items = parsed if isinstance(parsed, list) else [parsed]
+        except Exception:
+            items = s.strip("[]").replace('"', "").split(",")
+
+    ids = []
+    for x in items:
+        sx = str(x).strip()
+        if sx.isdigit() and int(sx) not in ids:
+            ids.append(int(sx))
+    return ids
+
+
+def relation_for_role(role_name) -> str | None:
+    return ROLE_RELATIONS.get((role_name or "").strip().lower())
+
+
+def sync_user_supervisors(cursor, user_id: int, supervisors: dict) -> None:
+    """
+    Rewrites user_supervisor rows of one user.
+
+    supervisors: {relation: raw id list}; only relations present with a
+    non-None value are replaced, so partial updates leave the rest alone.
+    Runs on the caller's cursor so it commits/rolls back with the tfs_user write.
+    """
+    for relation, raw in supervisors.items():
+        if relation not in RELATION_COLUMNS or raw is None:
+            continue
+
+        cursor.execute(
+            "DELETE FROM user_supervisor WHERE user_id=%s AND relation=%s",
+            (user_id, relation),
+        )
+        supervisor_ids = parse_id_list(raw)
+        if supervisor_ids:
+            cursor.executemany(
+                """
+                INSERT INTO user_supervisor (user_id, supervisor_id, relation)
+                VALUES (%s, %s, %s)
+                """,
+                [(user_id, sid, relation) for sid in supervisor_ids],
+            )
+
+
+def rebuild_user_supervisors(cursor) -> int:
+    """Re-derives the whole user_supervisor table from tfs_user. Returns rows written."""
+    cols = ", ".join(RELATION_COLUMNS.values())
+    cursor.execute(f"SELECT user_id, {cols} FROM tfs_user")
+    users = cursor.fetchall() or []
+
+    rows = []
+    for u in users:
+        for relation, col in RELATION_COLUMNS.items():
+            for sid in parse_id_list(u.get(col)):
+                rows.append((int(u["user_id"]), sid, relation))
+
+    cursor.execute("DELETE FROM user_supervisor")
+    if rows:
+        cursor.executemany(
+            "INSERT INTO user_supervisor (user_id, supervisor_id, relation) VALUES (%s, %s, %s)",
+            rows,
+        )
+    return len(rows)
+
+
+def subordinate_scope_sql(
+    col: str,
+    supervisor_id: int,
+    params: list,
+    relations: list[str] | None = None,
+    include_self: bool = False,
+    active_only: bool = False,
+) -> str:
+    """
+    SQL condition limiting `col` (a user_id column) to users reporting to
+    supervisor_id. Appends its params in order.
+
+    relations: restrict to these relations (None = any)
+    include_self: also match supervisor_id itself
+    active_only: only active, non-deleted subordinates
+    """
+    sub = "SELECT us.user_id FROM user_supervisor us"
+    if active_only:
+        sub += " JOIN tfs_user su ON su.user_id = us.user_id AND su.is_active = 1 AND su.is_delete = 1"
+    sub += " WHERE us.supervisor_id = %s"
+
+    cond_params = [int(supervisor_id)]
+    if relations:
+        sub += f" AND us.relation IN ({','.join(['%s'] * len(relations))})"
+        cond_params.extend(relations)
+
+    if include_self:
+        params.append(int(supervisor_id))
+        params.extend(cond_params)
+        return f"({col} = %s OR {col} IN ({sub}))"
+
+    params.extend(cond_params)
+    return f"{col} IN ({sub})"
+
+
+def get_reporting_user_ids(
+    cursor,
+    supervisor_id: int,
+    relations: list[str] | None = None,
+    include_self: bool = True,
+) -> list[int]:
+    """Active, non-deleted users reporting to supervisor_id (plus self if asked)."""
+    sql = """
+        SELECT DISTINCT us.user_id
+        FROM user_supervisor us
+        JOIN tfs_user tu ON tu.user_id = us.user_id
+        WHERE us.supervisor_id = %s
+          AND tu.is_active = 1 AND tu.is_delete = 1
+    """
+    params = [int(supervisor_id)]
+    if relations:
+        sql += f" AND us.relation IN ({','.join(['%s'] * len(relations))})"
+        params.extend(relations)
+
+    cursor.execute(sql, tuple(params))
+    ids = [int(r["user_id"]) for r in (cursor.fetchall() or []) if r.get("user_id") is not None]
+    if include_self and int(supervisor_id) not in ids:
+        ids.append(int(supervisor_id))
+    return ids
+
+
+def cached_reporting_user_ids(
+    cursor,
+    supervisor_id: int,
+    relations: list[str] | None = None,
+    include_self: bool = True,
+) -> list[int]:
+    """get_reporting_user_ids() through the subordinate cache (returns a fresh list)."""
+    key = (int(supervisor_id), tuple(sorted(relations or ())), bool(include_self))
+    ids = _subordinate_cache.get_or_load(
+        key,
+        lambda: tuple(get_reporting_user_ids(cursor, supervisor_id, relations, include_self)),
+    )
+    return list(ids)
+
+
+def invalidate_subordinate_cache() -> None:
+    """
+    Drops every cached subordinate set. A hierarchy edit moves a user between
+    supervisors (old and new), so clearing everything is the simple safe option.
+    """
+    _subordinate_cache.invalidate()
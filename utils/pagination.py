@@ -0,0 +1,35 @@
+# utils/pagination.py
+#
+# Opaque keyset-pagination cursors. A cursor is the sort key of the last row
+# of a page, JSON-encoded and base64url'd so clients pass it back verbatim.
+
+import base64
+import json
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict | None:
+    """Returns the cursor dict, or None if it is missing/garbled."""
+    if not cursor:
+        return None
+    try:
+        s = str(cursor).strip()
+        raw = base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+        values = json.loads(raw.decode("utf-8"))
+        return values if isinstance(values, dict) else None
+    except Exception:
+        return None
+
+
+def parse_limit(value, default=DEFAULT_PAGE_LIMIT, maximum=MAX_PAGE_LIMIT) -> int:
+    """Page size from request data, clamped to [1, maximum]. Raises ValueError if not a number."""
+    if value in (None, ""):
+        return default
+    return max(1, min(int(value), maximum))
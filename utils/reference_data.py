@@ -0,0 +1,75 @@
+# utils/reference_data.py
+#
+# Versioned cache for reference-data dropdowns (designations, roles, teams,
+# project categories, AFD).
+#
+# reference_data_version holds one counter per table. Routes that write one
+# of these tables call bump_reference_version(cursor, table) inside their
+# transaction; readers compare the counter (a single PK lookup) with the
+# version of their cached list and only rerun the list query when it moved.
+# Because the counter lives in MySQL, a write in one gunicorn worker is seen
+# by all of them on their next read.
+#
+# Tables without a write route here (user_designation, user_role, team) are
+# bumped by hand after editing them directly:
+#   UPDATE reference_data_version SET version = version + 1 WHERE table_name = 'team';
+
+import hashlib
+import json
+
+from utils.cache import make_cache
+
+# dropdown payloads only change when the version does; the TTL just lets
+# unused entries age out
+_reference_cache = make_cache("reference_data", ttl_seconds=3600, max_entries=64)
+
+
+def bump_reference_version(cursor, table: str) -> None:
+    """Call in the same transaction as the write to `table`."""
+    cursor.execute(
+        """
+        INSERT INTO reference_data_version (table_name, version)
+        VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+        """,
+        (table,),
+    )
+
+
+def get_reference_version(cursor, table: str) -> int:
+    cursor.execute("SELECT version FROM reference_data_version WHERE table_name=%s", (table,))
+    row = cursor.fetchone()
+    if not row:
+        return 0
+    return int(row["version"] if isinstance(row, dict) else row[0])
+
+
+def make_etag(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return '"' + hashlib.sha1(raw).hexdigest() + '"'
+
+
+def get_reference_list(cursor, key: str, table: str, loader) -> tuple[list, str]:
+    """
+    (rows, etag) for one reference list.
+
+    key: cache key (the dropdown_type)
+    table: table whose version guards the entry
+    loader: callable returning the rows when the cache is cold or stale
+    """
+    version = get_reference_version(cursor, table)
+    cached = _reference_cache.get(key)
+    if cached and cached["version"] == version:
+        return cached["rows"], cached["etag"]
+
+    rows = loader()
+    etag = make_etag(rows)
+    _reference_cache.set(key, {"version": version, "rows": rows, "etag": etag})
+    return rows, etag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
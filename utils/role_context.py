@@ -0,0 +1,91 @@
+# utils/role_context.py
+#
+# Cached role lookups for the logged-in user.
+#
+# Almost every endpoint starts by resolving the caller's role; these helpers
+# keep the answer per user_id for ROLE_CONTEXT_TTL_SECONDS (default 60).
+# Writes that change a user's role or active flag call
+# invalidate_role_context(user_id).
+#
+# A session token only vouches for who the caller is; role and active flag
+# always come from here, so a role change or deactivation applies within
+# ROLE_CONTEXT_TTL_SECONDS on other workers (immediately on the one that
+# made it) instead of when the token expires.
+
+import os
+
+from utils.cache import make_cache
+
+ROLE_CONTEXT_TTL_SECONDS = float(os.getenv("ROLE_CONTEXT_TTL_SECONDS", "60"))
+
+_role_cache = make_cache("role_context", ROLE_CONTEXT_TTL_SECONDS)
+
+AGENT_ROLE_KEY = "__agent_role_id__"
+
+
+def _load_user_role(cursor, user_id: int) -> dict | None:
+    cursor.execute(
+        """
+        SELECT u.role_id AS user_role_id, r.role_name AS user_role_name
+        FROM tfs_user u
+        JOIN user_role r ON r.role_id = u.role_id
+        WHERE u.user_id=%s AND u.is_active=1 AND u.is_delete=1
+        """,
+        (int(user_id),),
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    if not isinstance(row, dict):
+        row = {"user_role_id": row[0], "user_role_name": row[1]}
+    return {
+        "user_role_id": row.get("user_role_id"),
+        "user_role_name": (row.get("user_role_name") or "").strip().lower(),
+    }
+
+
+def get_agent_role_id(cursor) -> int | None:
+    def load():
+        cursor.execute(
+            "SELECT role_id FROM user_role WHERE LOWER(TRIM(role_name)) = 'agent' LIMIT 1"
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return row["role_id"] if isinstance(row, dict) else row[0]
+
+    return _role_cache.get_or_load(AGENT_ROLE_KEY, load)
+
+
+def get_role_context(cursor, user_id: int) -> dict:
+    """
+    Returns:
+      {
+        "user_role_id": int|None,
+        "user_role_name": str,    # lower-cased, "" if user not found/inactive
+        "agent_role_id": int|None
+      }
+    """
+    user = _role_cache.get_or_load(int(user_id), lambda: _load_user_role(cursor, user_id)) or {}
+    return {
+        "user_role_id": user.get("user_role_id"),
+        "user_role_name": user.get("user_role_name") or "",
+        "agent_role_id": get_agent_role_id(cursor),
+    }
+
+
+def get_user_role(cursor, user_id: int) -> str | None:
+    """Lower-cased role name, or None if the user does not exist / is inactive."""
+    user = _role_cache.get_or_load(int(user_id), lambda: _load_user_role(cursor, user_id))
+    return user["user_role_name"] if user else None
+
+
+def invalidate_role_context(user_id=None) -> None:
+    """Forget one user's cached role (or all of them, e.g. after a role rename)."""
+    if user_id is None:
+        _role_cache.invalidate()
+    else:
+        try:
+            _role_cache.invalidate(int(user_id))
+        except (TypeError, ValueError):
+            pass
@@ -0,0 +1,80 @@
+# utils/session_token.py
+#
+# Signed, expiring session tokens issued at login (/auth/user).
+#
+# The token proves who the caller is without a DB round trip. app.py's
+# before_request hook verifies it (Authorization: Bearer <token> or
+# X-Session-Token) and puts the payload on flask.g.identity for every
+# blueprint.
+#
+# Only the user id is trusted from it: role and active flag are looked up
+# through utils/role_context.py (cached, invalidated on role / status
+# changes), so a demoted or deactivated user loses access without waiting
+# for SESSION_TOKEN_TTL_SECONDS. The role / permission fields are a snapshot
+# of the login for clients. Requests without a token still work with the
+# body's logged_in_user_id until SESSION_TOKEN_REQUIRED=1; until then an
+# invalid or expired token counts as no token. Login, password reset and
+# health ignore the token altogether.
+
+from flask import g, has_request_context, request
+from itsdangerous import URLSafeTimedSerializer
+
+from config import SESSION_SECRET_KEY, SESSION_TOKEN_TTL_SECONDS
+
+SESSION_SALT = "tfshrms-session"
+serializer = URLSafeTimedSerializer(SESSION_SECRET_KEY)
+
+
+def issue_session_token(user: dict, role_name: str | None) -> str:
+    """user: the login row (tfs_user + user_permission flags)."""
+    return serializer.dumps(
+        {
+            "uid": int(user["user_id"]),
+            "rid": user.get("role_id"),
+            "role": (role_name or "").strip().lower(),
+            "team": user.get("team_id"),
+            "perm": {
+                "project_creation": int(user.get("project_creation_permission") or 0),
+                "user_creation": int(user.get("user_creation_permission") or 0),
+            },
+        },
+        salt=SESSION_SALT,
+    )
+
+
+def load_session_token(token: str) -> dict:
+    """Verified identity dict; raises BadSignature / SignatureExpired."""
+    payload = serializer.loads(token, salt=SESSION_SALT, max_age=SESSION_TOKEN_TTL_SECONDS)
+    return {
+        "user_id": int(payload["uid"]),
+        "role_id": payload.get("rid"),
+        "role": payload.get("role") or "",
+        "team_id": payload.get("team"),
+        "permissions": payload.get("perm") or {},
+    }
+
+
+def request_token() -> str | None:
+    auth = request.headers.get("Authorization") or ""
+    if auth[:7].lower() == "bearer ":
+        return auth[7:].strip() or None
+    return (request.headers.get("X-Session-Token") or "").strip() or None
+
+
+def current_identity() -> dict | None:
+    """The verified token payload for this request, if one was sent."""
+    if not has_request_context():
+        return None
+    return getattr(g, "identity", None)
+
+
+def current_user_id(data=None):
+    """
+    Logged-in user for this request: the token's user when one was sent
+    (the body can't override it), else the body's logged_in_user_id.
+    """
+    identity = current_identity()
+    if identity:
+        return identity["user_id"]
+    return (data or {}).get("logged_in_user_id")
+
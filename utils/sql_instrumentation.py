@@ -0,0 +1,199 @@
+# utils/sql_instrumentation.py
+#
+# Per-request SQL accounting.
+#
+# config.get_db_connection() wraps every connection it hands out; cursors of
+# that connection record, for the Flask request running on the current thread:
+#   statements  execute() / executemany() calls
+#   db_ms       time spent inside them (fetches included)
+#   rows        rows fetched
+#   slowest     the slowest statement (ms + normalized text)
+# Work outside a request (background writers, scheduler, manage.py) is not
+# recorded.
+#
+# At the end of a request, a statement shape (SQL with whitespace and IN /
+# VALUES lists collapsed) that ran SQL_REPEAT_WARN_THRESHOLD or more times is
+# printed as a likely N+1 loop: a per-row query that wants an IN (...) or an
+# executemany().
+#
+# With SQL_DEBUG_HEADERS=1 (or app.debug) the numbers go out as X-SQL-*
+# response headers.
+#
+# Env:
+#   SQL_INSTRUMENTATION        (default 1; 0 hands out unwrapped connections)
+#   SQL_DEBUG_HEADERS          (default 0)
+#   SQL_REPEAT_WARN_THRESHOLD  (default 5; 0 disables the warning)
+
+import os
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "1").strip().lower() in ("1", "true", "yes", "on")
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "0").strip().lower() in ("1", "true", "yes", "on")
+SQL_REPEAT_WARN_THRESHOLD = int(os.getenv("SQL_REPEAT_WARN_THRESHOLD", "5"))
+
+SHAPE_MAX_CHARS = 300
+
+_WS_RE = re.compile(r"\s+")
+_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_VALUES_RE = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+
+
+def statement_shape(sql) -> str:
+    """'SELECT ... WHERE id IN (%s, %s)' and '... IN (%s)' are the same shape."""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    shape = _WS_RE.sub(" ", str(sql)).strip()
+    shape = _VALUES_RE.sub(r"\1", _LIST_RE.sub("(...)", shape))
+    return shape[:SHAPE_MAX_CHARS]
+
+
+class RequestSqlStats:
+    __slots__ = ("statements", "db_ms", "rows", "slowest_ms", "slowest_sql", "shapes")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_ms = 0.0
+        self.rows = 0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+        self.shapes = Counter()
+
+    def as_dict(self) -> dict:
+        return {
+            "statements": self.statements,
+            "db_ms": round(self.db_ms, 2),
+            "rows": self.rows,
+            "slowest_ms": round(self.slowest_ms, 2),
+            "slowest_sql": self.slowest_sql,
+        }
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        if threshold <= 0:
+            return []
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def current_sql_stats(create: bool = False) -> RequestSqlStats | None:
+    """This request's stats (None outside a request, or before its first statement unless create)."""
+    if not has_request_context():
+        return None
+    stats = g.get("_sql_stats")
+    if stats is None and create:
+        stats = g._sql_stats = RequestSqlStats()
+    return stats
+
+
+def _record_statement(sql, elapsed_ms: float) -> None:
+    stats = current_sql_stats(create=True)
+    if stats is None:
+        return
+    shape = statement_shape(sql)
+    stats.statements += 1
+    stats.db_ms += elapsed_ms
+    stats.shapes[shape] += 1
+    if elapsed_ms > stats.slowest_ms:
+        stats.slowest_ms = elapsed_ms
+        stats.slowest_sql = shape
+
+
+def _record_fetch(rows: int, elapsed_ms: float) -> None:
+    stats = current_sql_stats()
+    if stats is None:
+        return
+    stats.rows += rows
+    stats.db_ms += elapsed_ms
+
+
+class InstrumentedCursor:
+    """Forwards to the real cursor, timing statements and counting fetched rows."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+        return False
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            _record_statement(operation, (time.perf_counter() - started) * 1000)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            _record_statement(operation, (time.perf_counter() - started) * 1000)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        _record_fetch(0 if row is None else 1, (time.perf_counter() - started) * 1000)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        _record_fetch(len(rows or []), (time.perf_counter() - started) * 1000)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        _record_fetch(len(rows or []), (time.perf_counter() - started) * 1000)
+        return rows
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are InstrumentedCursor; close() etc. pass through."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+
+def instrument_connection(conn):
+    return InstrumentedConnection(conn) if SQL_INSTRUMENTATION else conn
+
+
+def finish_request_sql(response, debug: bool = False):
+    """after_request hook: N+1 warning and (debug) X-SQL-* headers."""
+    stats = current_sql_stats()
+    if stats is None:
+        return response
+
+    for shape, n in stats.repeated_shapes(SQL_REPEAT_WARN_THRESHOLD):
+        print(f"[sql] {request.method} {request.path}: same statement ran {n}x (N+1?): {shape}")
+
+    if debug or SQL_DEBUG_HEADERS:
+        response.headers["X-SQL-Statements"] = str(stats.statements)
+        response.headers["X-SQL-Time-Ms"] = f"{stats.db_ms:.2f}"
+        response.headers["X-SQL-Rows"] = str(stats.rows)
+        response.headers["X-SQL-Slowest-Ms"] = f"{stats.slowest_ms:.2f}"
+        if stats.slowest_sql:
+            response.headers["X-SQL-Slowest"] = stats.slowest_sql.encode("ascii", "replace").decode("ascii")
+        repeated = stats.repeated_shapes(SQL_REPEAT_WARN_THRESHOLD)
+        if repeated:
+            response.headers["X-SQL-Repeated"] = str(max(n for _, n in repeated))
+    return response
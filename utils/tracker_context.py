@@ -0,0 +1,78 @@
+# utils/tracker_context.py
+#
+# Task / project / user metadata the tracker write routes need, in one query.
+#
+# task_target, task_name and project_code change rarely, so they are kept per
+# task_id / project_id for TRACKER_CONTEXT_TTL_SECONDS (default 60). User
+# name and tenure are always read fresh (tenure feeds the targets). Task and
+# project writes call invalidate_tracker_context().
+
+import os
+
+from utils.cache import make_cache
+
+TRACKER_CONTEXT_TTL_SECONDS = float(os.getenv("TRACKER_CONTEXT_TTL_SECONDS", "60"))
+
+_context_cache = make_cache("tracker_context", TRACKER_CONTEXT_TTL_SECONDS)
+
+
+def load_tracker_context(cursor, task_id, project_id, user_id) -> dict:
+    """
+    One round trip; task/project columns are only joined when not cached.
+
+    Returns (each part None when the row does not exist):
+      {
+        "task": {"task_target", "task_name"},
+        "project": {"project_code"},
+        "user": {"user_name", "user_tenure"}
+      }
+    """
+    task_key = ("task", int(task_id)) if task_id is not None else None
+    project_key = ("project", int(project_id)) if project_id is not None else None
+    task = _context_cache.get(task_key) if task_key else None
+    project = _context_cache.get(project_key) if project_key else None
+
+    selects = ["u.user_id", "u.user_name", "u.user_tenure"]
+    joins = ["LEFT JOIN tfs_user u ON u.user_id = %s"]
+    params = [int(user_id)]
+    if task is None and task_key:
+        selects += ["t.task_id", "t.task_target", "t.task_name"]
+        joins.append("LEFT JOIN task t ON t.task_id = %s")
+        params.append(task_key[1])
+    if project is None and project_key:
+        selects += ["p.project_id", "p.project_code"]
+        joins.append("LEFT JOIN project p ON p.project_id = %s")
+        params.append(project_key[1])
+
+    cursor.execute(
+        f"SELECT {', '.join(selects)} FROM (SELECT 1) x {' '.join(joins)}",
+        tuple(params),
+    )
+    row = cursor.fetchone() or {}
+
+    if task is None and row.get("task_id") is not None:
+        task = {"task_target": row.get("task_target"), "task_name": row.get("task_name")}
+        _context_cache.set(task_key, task)
+    if project is None and row.get("project_id") is not None:
+        project = {"project_code": row.get("project_code")}
+        _context_cache.set(project_key, project)
+
+    user = None
+    if row.get("user_id") is not None:
+        user = {"user_name": row.get("user_name"), "user_tenure": row.get("user_tenure")}
+
+    return {"task": task, "project": project, "user": user}
+
+
+def invalidate_tracker_context(task_id=None, project_id=None) -> None:
+    """Forget a task's / project's cached metadata (everything when called without ids)."""
+    if task_id is None and project_id is None:
+        _context_cache.invalidate()
+        return
+    try:
+        if task_id is not None:
+            _context_cache.invalidate(("task", int(task_id)))
+        if project_id is not None:
+            _context_cache.invalidate(("project", int(project_id)))
+    except (TypeError, ValueError):
+        pass
@@ -0,0 +1,343 @@
+# utils/tracker_rollup.py
+#
+# Rollups maintained from task_work_tracker:
+#
+# - tracker_daily_rollup: one row per (user_id, work_date, shift) with the
+#   billable hours / tracker count of that day, so /tracker/view_daily and its
+#   month summary don't re-aggregate task_work_tracker on every request.
+# - project_month_rollup: one row per (project_id, yyyymm) with the achieved
+#   hours /project_monthly_tracker/list shows next to each monthly target.
+#
+# Tracker add/update/delete change both rollups on their own cursor before
+# commit, so they move in the same transaction as the tracker:
+# remove_tracker_contribution() before the row changes (the caller holds it
+# FOR UPDATE), add_tracker_contribution() after. Each is one signed
+# `col = col + delta` upsert computed from the tracker rows themselves, so
+# concurrent writers to the same bucket serialize on the rollup row and never
+# overwrite each other with a total read from an older snapshot.
+# manage.py rebuild-rollup / verify-rollup repair and check both.
+
+from datetime import date, datetime, timedelta
+
+# trackers that count; the month summary the daily rollup replaced used is_active = 1
+ACTIVE_TRACKER_SQL = "twt.is_active = 1"
+
+# same expression /view_daily used on the raw table
+BILLABLE_HOURS_SQL = "COALESCE(twt.production, 0) / NULLIF(twt.tenure_target, 0)"
+
+# same expressions /project_monthly_tracker/list used on the raw table
+# (DECIMAL columns; a NULL hour value counts as 0)
+ACHIEVED_HOURS_SQL = "COALESCE(SUM(twt.actual_billable_hours), 0)"
+TENURE_ACHIEVED_HOURS_SQL = "COALESCE(SUM(twt.billable_hours), 0)"
+
+
+def _as_date(value) -> date | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _id_list(tracker_ids) -> list[int]:
+    return sorted({int(t) for t in tracker_ids if t is not None})
+
+
+def _apply_daily_delta(cursor, tracker_ids: list[int], sign: int) -> None:
+    """Adds (sign=1) or takes away (sign=-1) these trackers' share of their daily buckets."""
+    placeholders = ", ".join(["%s"] * len(tracker_ids))
+    cursor.execute(
+        f"""
+        INSERT INTO tracker_daily_rollup (user_id, work_date, shift, billable_hours, tracker_count)
+        SELECT
+            twt.user_id,
+            DATE(twt.date_time_dt),
+            COALESCE(twt.shift, 'DAY'),
+            %s * COALESCE(SUM({BILLABLE_HOURS_SQL}), 0),
+            %s * COUNT(*)
+        FROM task_work_tracker twt
+        WHERE twt.tracker_id IN ({placeholders})
+          AND {ACTIVE_TRACKER_SQL}
+          AND twt.date_time_dt IS NOT NULL
+        GROUP BY twt.user_id, DATE(twt.date_time_dt), COALESCE(twt.shift, 'DAY')
+        ON DUPLICATE KEY UPDATE
+            billable_hours = COALESCE(tracker_daily_rollup.billable_hours, 0) + VALUES(billable_hours),
+            tracker_count = tracker_daily_rollup.tracker_count + VALUES(tracker_count)
+        """,
+        (sign, sign, *tracker_ids),
+    )
+    if sign < 0:
+        cursor.execute(
+            f"""
+            DELETE r FROM tracker_daily_rollup r
+            JOIN task_work_tracker twt
+              ON r.user_id = twt.user_id
+             AND r.work_date = DATE(twt.date_time_dt)
+             AND r.shift = COALESCE(twt.shift, 'DAY')
+            WHERE twt.tracker_id IN ({placeholders})
+              AND r.tracker_count <= 0
+            """,
+            tuple(tracker_ids),
+        )
+
+
+def _apply_project_month_delta(cursor, tracker_ids: list[int], sign: int) -> None:
+    """Same as _apply_daily_delta() for the trackers' (project, month) rows."""
+    placeholders = ", ".join(["%s"] * len(tracker_ids))
+    cursor.execute(
+        f"""
+        INSERT INTO project_month_rollup (project_id, yyyymm, achieved_hours, tenure_achieved_hours, tracker_count)
+        SELECT
+            twt.project_id,
+            twt.yyyymm,
+            %s * {ACHIEVED_HOURS_SQL},
+            %s * {TENURE_ACHIEVED_HOURS_SQL},
+            %s * COUNT(*)
+        FROM task_work_tracker twt
+        WHERE twt.tracker_id IN ({placeholders})
+          AND {ACTIVE_TRACKER_SQL}
+          AND twt.project_id IS NOT NULL
+          AND twt.yyyymm IS NOT NULL
+        GROUP BY twt.project_id, twt.yyyymm
+        ON DUPLICATE KEY UPDATE
+            achieved_hours = project_month_rollup.achieved_hours + VALUES(achieved_hours),
+            tenure_achieved_hours = project_month_rollup.tenure_achieved_hours + VALUES(tenure_achieved_hours),
+            tracker_count = project_month_rollup.tracker_count + VALUES(tracker_count)
+        """,
+        (sign, sign, sign, *tracker_ids),
+    )
+    if sign < 0:
+        cursor.execute(
+            f"""
+            DELETE r FROM project_month_rollup r
+            JOIN task_work_tracker twt
+              ON r.project_id = twt.project_id
+             AND r.yyyymm = twt.yyyymm
+            WHERE twt.tracker_id IN ({placeholders})
+              AND r.tracker_count <= 0
+            """,
+            tuple(tracker_ids),
+        )
+
+
+def add_tracker_contribution(cursor, *tracker_ids) -> None:
+    """After inserting / updating trackers: add their (active) rows to the rollups."""
+    ids = _id_list(tracker_ids)
+    if ids:
+        _apply_daily_delta(cursor, ids, 1)
+        _apply_project_month_delta(cursor, ids, 1)
+
+
+def remove_tracker_contribution(cursor, *tracker_ids) -> None:
+    """
+    Before updating / deactivating trackers (rows locked FOR UPDATE by the
+    caller): take their current share out of the rollups.
+    """
+    ids = _id_list(tracker_ids)
+    if ids:
+        _apply_daily_delta(cursor, ids, -1)
+        _apply_project_month_delta(cursor, ids, -1)
+
+
+def _month_range(yyyymm: int) -> tuple[datetime, datetime]:
+    start = datetime(yyyymm // 100, yyyymm % 100, 1)
+    end = datetime(start.year + 1, 1, 1) if start.month == 12 else datetime(start.year, start.month + 1, 1)
+    return start, end
+
+
+# ------------------------
+# backfill / verification (manage.py)
+# ------------------------
+def _range_where(date_from, date_to, col: str, params: list) -> str:
+    where = ""
+    if date_from:
+        where += f" AND {col} >= %s"
+        params.append(_as_date(date_from))
+    if date_to:
+        where += f" AND {col} < %s"
+        params.append(_as_date(date_to) + timedelta(days=1))
+    return where
+
+
+def rebuild_daily_rollup(cursor, date_from=None, date_to=None) -> int:
+    """Recompute the rollup for [date_from, date_to] (whole table if both None)."""
+    del_params: list = []
+    cursor.execute(
+        "DELETE FROM tracker_daily_rollup WHERE 1=1" + _range_where(date_from, date_to, "work_date", del_params),
+        tuple(del_params),
+    )
+
+    params: list = []
+    cursor.execute(
+        f"""
+        INSERT INTO tracker_daily_rollup (user_id, work_date, shift, billable_hours, tracker_count)
+        SELECT
+            twt.user_id,
+            DATE(twt.date_time_dt),
+            COALESCE(twt.shift, 'DAY'),
+            SUM({BILLABLE_HOURS_SQL}),
+            COUNT(*)
+        FROM task_work_tracker twt
+        WHERE {ACTIVE_TRACKER_SQL}
+          AND twt.date_time_dt IS NOT NULL
+          {_range_where(date_from, date_to, "twt.date_time_dt", params)}
+        GROUP BY twt.user_id, DATE(twt.date_time_dt), COALESCE(twt.shift, 'DAY')
+        """,
+        tuple(params),
+    )
+    return cursor.rowcount
+
+
+def verify_daily_rollup(cursor, date_from=None, date_to=None, tolerance=0.0001) -> list[dict]:
+    """Buckets where the rollup disagrees with task_work_tracker (empty list = in sync)."""
+    params: list = []
+    cursor.execute(
+        f"""
+        SELECT
+            twt.user_id,
+            DATE(twt.date_time_dt) AS work_date,
+            COALESCE(twt.shift, 'DAY') AS shift,
+            SUM({BILLABLE_HOURS_SQL}) AS billable_hours,
+            COUNT(*) AS tracker_count
+        FROM task_work_tracker twt
+        WHERE {ACTIVE_TRACKER_SQL}
+          AND twt.date_time_dt IS NOT NULL
+          {_range_where(date_from, date_to, "twt.date_time_dt", params)}
+        GROUP BY twt.user_id, DATE(twt.date_time_dt), COALESCE(twt.shift, 'DAY')
+        """,
+        tuple(params),
+    )
+    raw = {(r["user_id"], _as_date(r["work_date"]), r["shift"]): r for r in (cursor.fetchall() or [])}
+
+    params = []
+    cursor.execute(
+        "SELECT user_id, work_date, shift, billable_hours, tracker_count FROM tracker_daily_rollup WHERE 1=1"
+        + _range_where(date_from, date_to, "work_date", params),
+        tuple(params),
+    )
+    rolled = {(r["user_id"], _as_date(r["work_date"]), r["shift"]): r for r in (cursor.fetchall() or [])}
+
+    mismatches = []
+    for key in sorted(set(raw) | set(rolled), key=lambda k: (k[1], k[0], k[2])):
+        a, b = raw.get(key), rolled.get(key)
+        a_hours = float((a or {}).get("billable_hours") or 0)
+        b_hours = float((b or {}).get("billable_hours") or 0)
+        a_count = int((a or {}).get("tracker_count") or 0)
+        b_count = int((b or {}).get("tracker_count") or 0)
+        if a_count != b_count or abs(a_hours - b_hours) > tolerance:
+            mismatches.append({
+                "user_id": key[0],
+                "work_date": key[1].isoformat(),
+                "shift": key[2],
+                "raw_billable_hours": a_hours,
+                "rollup_billable_hours": b_hours,
+                "raw_tracker_count": a_count,
+                "rollup_tracker_count": b_count,
+            })
+    return mismatches
+
+
+def _month_span(date_from, date_to) -> tuple:
+    """Widens [date_from, date_to] to whole months (project_month_rollup is per month)."""
+    d_from, d_to = _as_date(date_from), _as_date(date_to)
+    if d_from:
+        d_from = d_from.replace(day=1)
+    if d_to:
+        d_to = _month_range(d_to.year * 100 + d_to.month)[1].date() - timedelta(days=1)
+    return d_from, d_to
+
+
+def _yyyymm_where(date_from, date_to, params: list) -> str:
+    where = ""
+    if date_from:
+        where += " AND yyyymm >= %s"
+        params.append(date_from.year * 100 + date_from.month)
+    if date_to:
+        where += " AND yyyymm <= %s"
+        params.append(date_to.year * 100 + date_to.month)
+    return where
+
+
+def rebuild_project_month_rollup(cursor, date_from=None, date_to=None) -> int:
+    """Recompute project_month_rollup for the months touching [date_from, date_to]."""
+    date_from, date_to = _month_span(date_from, date_to)
+
+    del_params: list = []
+    cursor.execute(
+        "DELETE FROM project_month_rollup WHERE 1=1" + _yyyymm_where(date_from, date_to, del_params),
+        tuple(del_params),
+    )
+
+    params: list = []
+    cursor.execute(
+        f"""
+        INSERT INTO project_month_rollup (project_id, yyyymm, achieved_hours, tenure_achieved_hours, tracker_count)
+        SELECT
+            twt.project_id,
+            twt.yyyymm,
+            {ACHIEVED_HOURS_SQL},
+            {TENURE_ACHIEVED_HOURS_SQL},
+            COUNT(*)
+        FROM task_work_tracker twt
+        WHERE {ACTIVE_TRACKER_SQL}
+          AND twt.date_time_dt IS NOT NULL
+          {_range_where(date_from, date_to, "twt.date_time_dt", params)}
+        GROUP BY twt.project_id, twt.yyyymm
+        """,
+        tuple(params),
+    )
+    return cursor.rowcount
+
+
+def verify_project_month_rollup(cursor, date_from=None, date_to=None, tolerance=0.0001) -> list[dict]:
+    """(project, month) rows where project_month_rollup disagrees with task_work_tracker."""
+    date_from, date_to = _month_span(date_from, date_to)
+
+    params: list = []
+    cursor.execute(
+        f"""
+        SELECT
+            twt.project_id,
+            twt.yyyymm,
+            {ACHIEVED_HOURS_SQL} AS achieved_hours,
+            {TENURE_ACHIEVED_HOURS_SQL} AS tenure_achieved_hours,
+            COUNT(*) AS tracker_count
+        FROM task_work_tracker twt
+        WHERE {ACTIVE_TRACKER_SQL}
+          AND twt.date_time_dt IS NOT NULL
+          {_range_where(date_from, date_to, "twt.date_time_dt", params)}
+        GROUP BY twt.project_id, twt.yyyymm
+        """,
+        tuple(params),
+    )
+    raw = {(int(r["project_id"]), int(r["yyyymm"])): r for r in (cursor.fetchall() or [])}
+
+    params = []
+    cursor.execute(
+        "SELECT project_id, yyyymm, achieved_hours, tenure_achieved_hours, tracker_count"
+        " FROM project_month_rollup WHERE 1=1" + _yyyymm_where(date_from, date_to, params),
+        tuple(params),
+    )
+    rolled = {(int(r["project_id"]), int(r["yyyymm"])): r for r in (cursor.fetchall() or [])}
+
+    mismatches = []
+    for key in sorted(set(raw) | set(rolled), key=lambda k: (k[1], k[0])):
+        a, b = raw.get(key) or {}, rolled.get(key) or {}
+        fields = ("achieved_hours", "tenure_achieved_hours")
+        if int(a.get("tracker_count") or 0) != int(b.get("tracker_count") or 0) or any(
+            abs(float(a.get(f) or 0) - float(b.get(f) or 0)) > tolerance for f in fields
+        ):
+            mismatches.append({
+                "project_id": key[0],
+                "yyyymm": key[1],
+                "raw_achieved_hours": float(a.get("achieved_hours") or 0),
+                "rollup_achieved_hours": float(b.get("achieved_hours") or 0),
+                "raw_tracker_count": int(a.get("tracker_count") or 0),
+                "rollup_tracker_count": int(b.get("tracker_count") or 0),
+            })
+    return mismatches
@@ -0,0 +1,360 @@
+# utils/upload_queue.py
+#
+# Background Cloudinary uploads.
+#
+# A request spools its file(s) to uploads/spool/<job_id>/, writes the owning
+# row with <file>_status='pending' and <file>_job_id=<job_id> and returns. A worker thread (one per
+# process) then uploads the files, writes the URL(s) + status 'uploaded' back
+# onto the owning row, deletes any replaced Cloudinary files and removes the
+# spool directory. The write-back only matches while the row still carries
+# this job's id: a job overtaken by a newer upload for the same row (the
+# user replaced the file again) deletes its own Cloudinary files instead and
+# leaves the row to the newer job. Failures retry with exponential backoff; after
+# UPLOAD_MAX_ATTEMPTS the row is marked 'failed', files uploaded so far are
+# deleted again (all-or-nothing) and the spool dir is kept for inspection.
+#
+# Every job has a job.json manifest on disk, so jobs left behind by a restart
+# are picked up again when the worker starts in a new process.
+#
+# Env:
+#   UPLOAD_MAX_ATTEMPTS      (default 5)
+#   UPLOAD_RETRY_BASE_SECONDS (default 5; delay = base * 2**(attempt-1), max 15 min)
+
+import heapq
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from config import UPLOAD_FOLDER, get_db_connection
+from utils.cloudinary_utils import upload_many, delete_many, _extract_public_id
+
+SPOOL_DIR = os.path.join(UPLOAD_FOLDER, "spool")
+MANIFEST = "job.json"
+OWNER_FILE = "owner.pid"
+
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "5"))
+UPLOAD_RETRY_BASE_SECONDS = float(os.getenv("UPLOAD_RETRY_BASE_SECONDS", "5"))
+UPLOAD_RETRY_MAX_SECONDS = 15 * 60
+
+STATUS_PENDING = "pending"
+STATUS_UPLOADED = "uploaded"
+STATUS_FAILED = "failed"
+
+# Owning rows a job may write back to: table -> (key column, url column, status column, job id column).
+# Keeps table/column names out of the manifest's free text (they end up in SQL).
+OWNERS = {
+    "task_work_tracker": ("tracker_id", "tracker_file", "tracker_file_status", "tracker_file_job_id"),
+    "qc_rework_tracker": ("tracker_id", "rework_file_path", "rework_file_status", "rework_file_job_id"),
+    "qc_audit": ("id", "qc_checked_file", "qc_checked_file_status", "qc_checked_file_job_id"),
+    "project": ("project_id", "project_pprt", "project_pprt_status", "project_pprt_job_id"),
+}
+
+
+# ------------------------
+# request side
+# ------------------------
+def spool_files(files: list[dict]) -> dict:
+    """
+    Saves uploaded files to a fresh spool directory.
+
+    files: [{"file": FileStorage, "folder": FOLDER_*, "display_name": str, "resource_type": "raw"}, ...]
+    Returns a job dict; store job["job_id"] in the owning row's <file>_job_id
+    column, then pass the job to enqueue_upload() once that row is committed
+    (or to discard_job() if it is not).
+    """
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(SPOOL_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    job = {"job_id": job_id, "created_at": time.time(), "files": [], "uploaded": []}
+    try:
+        for idx, f in enumerate(files):
+            local_name = f"{idx}_{os.path.basename(f['display_name'])}"
+            f["file"].save(os.path.join(job_dir, local_name))
+            job["files"].append({
+                "local_name": local_name,
+                "folder": f["folder"],
+                "display_name": f["display_name"],
+                "resource_type": f.get("resource_type", "raw"),
+            })
+    except Exception:
+        discard_job(job)
+        raise
+    return job
+
+
+def discard_job(job: dict | None) -> None:
+    """Drops a spooled job whose owning row was never committed."""
+    if job:
+        shutil.rmtree(os.path.join(SPOOL_DIR, job["job_id"]), ignore_errors=True)
+
+
+def enqueue_upload(job: dict, table: str, key, delete_after: list | None = None, as_json_list: bool = False) -> None:
+    """
+    Hands a spooled job to the worker.
+
+    table/key: owning row (see OWNERS); its url/status columns are written on completion
+    delete_after: Cloudinary URLs replaced by this upload, deleted only after success
+    as_json_list: store the URL list as a JSON array (project_pprt) instead of one URL
+    """
+    if table not in OWNERS:
+        raise ValueError(f"Unknown upload owner table: {table}")
+
+    # start (and let it recover old jobs) before this job's manifest exists
+    ensure_upload_worker()
+
+    job.update({
+        "table": table,
+        "key": key,
+        "as_json_list": bool(as_json_list),
+        "delete_after": [u for u in (delete_after or []) if u],
+        "attempts": 0,
+        "next_attempt_at": time.time(),
+        "state": STATUS_PENDING,
+    })
+    _claim(job["job_id"])
+    _write_manifest(job)
+    _worker.push(job)
+
+
+# ------------------------
+# manifest helpers
+# ------------------------
+def _job_dir(job_id: str) -> str:
+    return os.path.join(SPOOL_DIR, job_id)
+
+
+def _write_manifest(job: dict) -> None:
+    path = os.path.join(_job_dir(job["job_id"]), MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(job, fh)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _claim(job_id: str) -> bool:
+    """Marks this process as owner of a job dir; False if a live process already owns it."""
+    path = os.path.join(_job_dir(job_id), OWNER_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            owner = int(fh.read().strip() or 0)
+        if owner == os.getpid():
+            return True
+        if owner and _pid_alive(owner):
+            return False
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError):
+        return False
+
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as fh:
+        fh.write(str(os.getpid()))
+    return True
+
+
+def _recover_jobs() -> list[dict]:
+    """Pending manifests left by a previous / dead process."""
+    jobs = []
+    if not os.path.isdir(SPOOL_DIR):
+        return jobs
+    for job_id in os.listdir(SPOOL_DIR):
+        path = os.path.join(SPOOL_DIR, job_id, MANIFEST)
+        if not os.path.isfile(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                job = json.load(fh)
+        except Exception as e:
+            print(f"Upload queue: unreadable manifest {path}: {e}")
+            continue
+        if job.get("state") == STATUS_PENDING and _claim(job_id):
+            jobs.append(job)
+    return jobs
+
+
+# ------------------------
+# worker
+# ------------------------
+class _UploadWorker:
+    def __init__(self):
+        self._heap = []  # (next_attempt_at, seq, job)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="upload-queue", daemon=True)
+
+    def start(self):
+        for job in _recover_jobs():
+            print(f"Upload queue: resuming job {job['job_id']} ({job.get('table')} {job.get('key')})")
+            self.push(job)
+        self._thread.start()
+
+    def push(self, job: dict):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (job.get("next_attempt_at") or 0, self._seq, job))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _next_job(self) -> dict:
+        with self._cond:
+            while True:
+                if self._heap:
+                    wait = self._heap[0][0] - time.time()
+                    if wait <= 0:
+                        return heapq.heappop(self._heap)[2]
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            try:
+                _process(job)
+            except Exception as e:
+                _retry_or_fail(job, e)
+                if job.get("state") == STATUS_PENDING:
+                    self.push(job)
+
+
+def _process(job: dict) -> None:
+    started = time.monotonic()
+    job_dir = _job_dir(job["job_id"])
+
+    # multi-file jobs upload in parallel; upload_many() removes its own partial
+    # uploads on failure, so a retry starts again from the first file
+    if not job["uploaded"]:
+        results = upload_many([
+            {
+                "source": os.path.join(job_dir, f["local_name"]),
+                "folder": f["folder"],
+                "display_name": f["display_name"],
+                "resource_type": f["resource_type"],
+            }
+            for f in job["files"]
+        ])
+        job["uploaded"] = [r["url"] for r in results]
+        _write_manifest(job)
+
+    value = json.dumps(job["uploaded"]) if job["as_json_list"] else (job["uploaded"][0] if job["uploaded"] else None)
+    if not _write_owner(job, value, STATUS_UPLOADED):
+        # a newer upload owns the row now; its delete_after covers the file this one replaced
+        delete_many(job["uploaded"])
+        shutil.rmtree(job_dir, ignore_errors=True)
+        print(f"Upload queue: job {job['job_id']} superseded ({job['table']} {job['key']}), upload discarded")
+        return
+
+    # same public_id means the upload overwrote it in place: nothing to delete
+    new_ids = {_extract_public_id(u) for u in job["uploaded"]}
+    delete_many([u for u in job.get("delete_after") or [] if _extract_public_id(u) not in new_ids])
+
+    shutil.rmtree(job_dir, ignore_errors=True)
+    print(
+        f"Upload queue: job {job['job_id']} done "
+        f"({job['table']} {job['key']}, {len(job['uploaded'])} file(s), "
+        f"attempt {job['attempts'] + 1}, {time.monotonic() - started:.2f}s)"
+    )
+
+
+def _write_owner(job: dict, value, status: str) -> bool:
+    """False if the row no longer belongs to this job (gone, or taken over by a newer upload)."""
+    key_col, url_col, status_col, job_col = OWNERS[job["table"]]
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if status == STATUS_UPLOADED:
+            cursor.execute(
+                f"UPDATE {job['table']} SET {url_col}=%s, {status_col}=%s WHERE {key_col}=%s AND {job_col}=%s",
+                (value, status, job["key"], job["job_id"]),
+            )
+        else:
+            cursor.execute(
+                f"UPDATE {job['table']} SET {status_col}=%s WHERE {key_col}=%s AND {job_col}=%s",
+                (status, job["key"], job["job_id"]),
+            )
+        if cursor.rowcount:
+            conn.commit()
+            return True
+        # 0 rows can also mean "already written" (a retry after a crash)
+        cursor.execute(f"SELECT 1 FROM {job['table']} WHERE {key_col}=%s AND {job_col}=%s", (job["key"], job["job_id"]))
+        owned = cursor.fetchone() is not None
+        conn.commit()
+        return owned
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _retry_or_fail(job: dict, error: Exception) -> None:
+    job["attempts"] = int(job.get("attempts") or 0) + 1
+    job["last_error"] = str(error)
+
+    if job["attempts"] < UPLOAD_MAX_ATTEMPTS:
+        delay = min(UPLOAD_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1)), UPLOAD_RETRY_MAX_SECONDS)
+        job["next_attempt_at"] = time.time() + delay
+        print(f"Upload queue: job {job['job_id']} attempt {job['attempts']} failed ({error}); retry in {delay:.0f}s")
+        _write_manifest(job)
+        return
+
+    print(f"Upload queue: job {job['job_id']} failed after {job['attempts']} attempts: {error}")
+    job["state"] = STATUS_FAILED
+
+    # all-or-nothing: don't leave half of a multi-file upload on Cloudinary
+    delete_many(job.get("uploaded"))
+    job["uploaded"] = []
+
+    try:
+        if not _write_owner(job, None, STATUS_FAILED):
+            print(f"Upload queue: job {job['job_id']} superseded, {job['table']} {job['key']} left to the newer upload")
+    except Exception as e:
+        print(f"Upload queue: could not mark {job['table']} {job['key']} failed: {e}")
+    _write_manifest(job)
+
+
+_worker = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def ensure_upload_worker() -> None:
+    """Starts this process' worker thread once (threads don't survive a fork)."""
+    global _worker, _worker_pid
+
+    pid = os.getpid()
+    if _worker is not None and _worker_pid == pid:
+        return
+
+    with _worker_lock:
+        if _worker is None or _worker_pid != pid:
+            os.makedirs(SPOOL_DIR, exist_ok=True)
+            worker = _UploadWorker()
+            _worker, _worker_pid = worker, pid
+            worker.start()
+
+
+def upload_queue_stats() -> dict | None:
+    if _worker is None or _worker_pid != os.getpid():
+        return None
+    return {"pid": _worker_pid, "queued_jobs": _worker.pending()}
@@ -1,5 +1,6 @@
 from flask import request
 from utils.response import api_response
+from decimal import Decimal, ROUND_HALF_UP
 import re
 
 # USERNAME Validation
@@ -51,6 +52,30 @@ def is_valid_phone(number):
     # return bool(re.match(pattern, base64_string))
 
 
+# NUMERIC Validation (DECIMAL / INT columns)
+
+def parse_decimal(value, field, places=2, minimum=0):
+    """Plain non-negative number -> Decimal rounded to `places`; raises ValueError"""
+    s = str(value).strip() if value is not None else ""
+    if isinstance(value, bool) or not re.match(r'^-?\d+(\.\d+)?$', s):
+        raise ValueError(f"{field} must be a number")
+    number = Decimal(s).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{field} must be >= {minimum}")
+    return number
+
+
+def parse_int(value, field, minimum=0):
+    """Whole number (e.g. 22 or "22") -> int; raises ValueError"""
+    s = str(value).strip() if value is not None else ""
+    if isinstance(value, bool) or not re.match(r'^-?\d+$', s):
+        raise ValueError(f"{field} must be a whole number")
+    number = int(s)
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{field} must be >= {minimum}")
+    return number
+
+
 GLOBAL_REQUIRED = ["device_id", "device_type"]
 
 def validate_request(required=None, any_of=None, allow_empty_json=False, include_global=True):